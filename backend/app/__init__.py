@@ -1,26 +1,121 @@
 # backend/app/__init__.py
-from flask import Flask
+from flask import Flask, g, request
 from flask_cors import CORS
 import os
+from app.utils.config import Config
+from app.utils.responses import FastJSONProvider, registrar_compressao
 
 def create_app():
     app = Flask(__name__)
     
+    # Serialização JSON rápida (orjson, quando instalado)
+    app.json = FastJSONProvider(app)
+    
     # Habilita CORS para que o frontend possa se comunicar com a API
     CORS(app)
     
     # Configurações básicas
     app.config['SECRET_KEY'] = 'dev-secret-key'  # Troque por uma chave segura em produção!
-    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
+    # Pasta dos uploads e datasets (UPLOAD_FOLDER no ambiente, ex.: uma pasta temporária nos testes de carga)
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER') or os.path.join(os.path.dirname(__file__), 'static', 'uploads')
+    
+    app.config.from_object(Config)
     
     # Garante que a pasta de uploads existe
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Cópias temporárias dos uploads que não estão em memória nem em arquivo
+    app.config['UPLOAD_TMP_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'tmp')
+    
+    # Regras de padronização: validadas e compiladas aqui (um arquivo inválido impede a
+    # inicialização) e recarregadas quando o arquivo muda, sem reiniciar os workers
+    from app.utils.standardization_rules import regras_padronizacao
+    regras_padronizacao.configure(
+        app.config['STANDARDIZATION_RULES_FILE'],
+        intervalo=app.config['STANDARDIZATION_RULES_RELOAD_SECONDS']
+    )
+    
+    # Configura o cache de datasets limpos (compartilhado pelas blueprints)
+    from app.services.cache_service import dataset_cache
+    dataset_cache.configure(
+        max_entries=app.config['DATASET_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['DATASET_CACHE_MAX_BYTES'],
+        spill_folder=os.path.join(app.config['UPLOAD_FOLDER'], 'cache') if app.config['DATASET_CACHE_SPILL'] else None
+    )
+    
+    # Repositório dos datasets enviados (consultados depois pelo dataset_id)
+    from app.services.dataset_store import dataset_store
+    dataset_store.configure(os.path.join(app.config['UPLOAD_FOLDER'], 'datasets'))
+    
+    # Pool das análises em segundo plano (uploads aguardando ficam em UPLOAD_FOLDER/jobs)
+    from app.services.job_service import job_manager
+    job_manager.configure(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'jobs'),
+        max_workers=app.config['JOBS_MAX_WORKERS'],
+        max_pendentes=app.config['JOBS_MAX_PENDING'],
+        max_historico=app.config['JOBS_HISTORY'],
+        chunksize=app.config['STREAMING_CHUNK_ROWS']
+    )
+    
+    # Contadores de /api/metrics: cada worker grava os seus em UPLOAD_FOLDER/metrics
+    # e a rota soma os de todos
+    registrar_metricas_compartilhadas(app, os.path.join(app.config['UPLOAD_FOLDER'], 'metrics'))
+    
+    # Compressão das respostas grandes (registrada primeiro para ser aplicada por último)
+    registrar_compressao(app, tamanho_minimo=app.config['COMPRESSION_MIN_BYTES'])
+    
+    # Perfil das etapas do pipeline, devolvido na resposta com ?profile=1
+    registrar_perfil_por_requisicao(app)
     
     # Registra as blueprints (rotas)
     from app.routes.data_routes import data_bp
     from app.routes.analysis_routes import analysis_bp
+    from app.routes.metrics_routes import metrics_bp
     
     app.register_blueprint(data_bp, url_prefix='/api/data')
     app.register_blueprint(analysis_bp, url_prefix='/api/analysis')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    
+    return app
+
+def registrar_metricas_compartilhadas(app, pasta):
+    """
+    Grava os contadores do processo ao fim das requisições, respeitando o
+    intervalo mínimo entre gravações (ver MetricsRegistry.gravar).
+    """
+    from app.routes.metrics_routes import contadores_cache
+    from app.utils.profiling import metrics
+    
+    metrics.configure(pasta, extras=contadores_cache)
+    
+    @app.after_request
+    def gravar_metricas(response):
+        metrics.gravar()
+        return response
+
+def registrar_perfil_por_requisicao(app):
+    """
+    Com ?profile=1, registra o tempo, as linhas e a variação de memória de cada
+    etapa executada na requisição e inclui o resultado em 'profile' na resposta JSON.
+    """
+    from app.utils.profiling import encerrar_perfil, iniciar_perfil, perfil_atual
+    
+    @app.before_request
+    def iniciar():
+        if request.args.get('profile') == '1':
+            g.perfil_token = iniciar_perfil()
+    
+    @app.after_request
+    def anexar(response):
+        perfil = perfil_atual()
+        if perfil is not None and response.is_json:
+            dados = response.get_json(silent=True)
+            if isinstance(dados, dict):
+                dados['profile'] = perfil.to_dict()
+                response.set_data(app.json.dumps(dados))
+        return response
     
-    return app
\ No newline at end of file
+    @app.teardown_request
+    def encerrar(exc):
+        token = g.pop('perfil_token', None)
+        if token is not None:
+            encerrar_perfil(token)
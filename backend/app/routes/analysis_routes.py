@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-import pandas as pd
-import io
-from app.services.data_service import clean_and_standardize_data
-from app.services.analysis_service import generate_detailed_analysis
+from flask import Blueprint, request, jsonify, current_app, url_for
+import os
+import shutil
+import uuid
+from app.services.data_service import load_clean_dataset
+from app.services.analysis_service import generate_filtered_analysis, get_dataset_analysis_sketch
+from app.services.cube_service import DIMENSOES_CUBO, DimensaoAusente, get_dataset_cube
+from app.services.dataset_store import dataset_store
+from app.services.filter_service import FiltroDataset
+from app.services.streaming_service import process_csv_stream
+from app.services.batch_service import analisar_arquivos
+from app.services.job_service import JobsOcupados, job_manager
+from app.utils.responses import etag_condicional
 
 analysis_bp = Blueprint('analysis', __name__)
 
@@ -10,6 +18,8 @@ analysis_bp = Blueprint('analysis', __name__)
 def get_detailed_analysis():
     """
     Endpoint para análise detalhada dos dados
+    Com ?async=1 retorna imediatamente um job_id (202); o andamento e o
+    resultado são consultados em GET /jobs/<job_id>
     """
     try:
         if 'file' not in request.files:
@@ -20,26 +30,162 @@ def get_detailed_analysis():
             return jsonify({'error': 'Nome de arquivo vazio'}), 400
         
         if file and file.filename.endswith('.csv'):
-            # Lê e processa o CSV
-            file_content = file.stream.read().decode('utf-8')
-            df = pd.read_csv(io.StringIO(file_content))
+            # Análise em segundo plano: o mesmo conteúdo em andamento reaproveita o job
+            if request.args.get('async') == '1':
+                job, deduplicado = job_manager.submit(file.stream, file.filename)
+                return jsonify({
+                    'success': True,
+                    'job_id': job.id,
+                    'status': job.status,
+                    'deduplicated': deduplicado,
+                    'status_url': url_for('analysis.get_analysis_job', job_id=job.id)
+                }), 202
             
-            # Limpa e padroniza
-            df_clean, _ = clean_and_standardize_data(df)
+            # Arquivos grandes (ou ?stream=1): leitura, limpeza e análise em blocos
+            stream_mode = request.args.get('stream') == '1' or \
+                (request.content_length or 0) > current_app.config['STREAMING_THRESHOLD_BYTES']
+            if stream_mode:
+                result = process_csv_stream(
+                    file.stream, file.filename, chunksize=current_app.config['STREAMING_CHUNK_ROWS'],
+                    incluir_analise=True)
+                return jsonify({
+                    'success': True,
+                    'dataset_id': result['data']['dataset_id'],
+                    'analysis': result['analysis']
+                })
+            
+            # Lê o CSV do stream do upload e busca o dataset limpo no cache (ou limpa e padroniza)
+            dataset, cache_hit = load_clean_dataset(file.stream, current_app.config['UPLOAD_TMP_FOLDER'])
+            dataset_store.save(dataset, file.filename)
             
             # Gera análise detalhada
-            analysis = generate_detailed_analysis(df_clean)
+            analysis = get_dataset_analysis_sketch(dataset.key).result()
             
             return jsonify({
                 'success': True,
-                'analysis': analysis
+                'dataset_id': dataset.key,
+                'analysis': analysis,
+                'cache': {'key': dataset.key, 'hit': cache_hit}
             })
             
         else:
             return jsonify({'error': 'Apenas arquivos CSV são permitidos'}), 400
             
+    except JobsOcupados as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+
+@analysis_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """
+    Andamento de uma análise em segundo plano: status (pendente, executando,
+    concluido, erro), etapa, linhas já processadas e, ao final, o resultado
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    
+    return jsonify({'success': True, **job.to_dict()})
+
+@analysis_bp.route('/detailed/<dataset_id>', methods=['GET'])
+@etag_condicional(dataset_store.content_version)
+def get_stored_detailed_analysis(dataset_id):
+    """
+    Análise detalhada de um dataset já enviado, sem reenviar o CSV
+    Filtros opcionais na query string (valores repetidos = qualquer um deles):
+    ?curso=...&instituicao=...&faixa_etaria=...&inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+    """
+    try:
+        filtro = FiltroDataset.from_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Sem filtro usa os agregados salvos com o dataset (não relê as linhas);
+        # com filtro lê do disco apenas as partições e colunas necessárias
+        resultado = generate_filtered_analysis(dataset_id, filtro) if dataset_store.is_valid_id(dataset_id) else None
+        if resultado is None:
+            return jsonify({'error': 'Dataset não encontrado'}), 404
+        
+        return jsonify({
+            'success': True,
+            'dataset_id': dataset_id,
+            'filtro': filtro.to_dict(),
+            'linhas_analisadas': resultado['linhas'],
+            'analysis': resultado['analysis']
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+
+@analysis_bp.route('/crosstab', methods=['GET'])
+def get_crosstab():
+    """
+    Tabela cruzada de um dataset armazenado, respondida pelo cubo pré-calculado
+    ?dataset_id=...&agrupar=faixa_etaria&agrupar=renda_categoria
+    Filtros: qualquer dimensão do cubo, com valores repetidos = qualquer um deles
+    (ex.: &curso=Informática&escolaridade_simplificada=Ensino Médio)
+    Dimensão desconhecida: 400; dimensão sem coluna no dataset: 422
+    """
+    dataset_id = request.args.get('dataset_id', '')
+    agrupar = request.args.getlist('agrupar')
+    filtros = {dimensao: request.args.getlist(dimensao) for dimensao in DIMENSOES_CUBO if dimensao in request.args}
+
+    try:
+        cubo = get_dataset_cube(dataset_id) if dataset_store.is_valid_id(dataset_id) else None
+        if cubo is None:
+            return jsonify({'error': 'Dataset não encontrado'}), 404
+
+        resultado = cubo.consultar(agrupar, filtros)
+        return jsonify({
+            'success': True,
+            'dataset_id': dataset_id,
+            'agrupar': agrupar,
+            'filtros': filtros,
+            **resultado
+        })
+
+    except DimensaoAusente as e:
+        return jsonify({'error': str(e)}), 422
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+
+@analysis_bp.route('/batch', methods=['POST'])
+def get_batch_analysis():
+    """
+    Análise de vários arquivos CSV (campo 'files', ex.: um por campus) em paralelo.
+    Retorna a análise de cada arquivo e um relatório geral combinado.
+    """
+    files = [f for f in request.files.getlist('files') if f and f.filename]
+    if not files:
+        return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+    if any(not f.filename.endswith('.csv') for f in files):
+        return jsonify({'error': 'Apenas arquivos CSV são permitidos'}), 400
+    
+    # Os workers leem os arquivos do disco: grava os uploads em uma pasta temporária
+    pasta = os.path.join(current_app.config['UPLOAD_FOLDER'], f'batch-{uuid.uuid4().hex}')
+    os.makedirs(pasta)
+    try:
+        caminhos = []
+        for indice, file in enumerate(files):
+            caminho = os.path.join(pasta, f'{indice}.csv')
+            file.save(caminho)
+            caminhos.append(caminho)
+        
+        result = analisar_arquivos(
+            caminhos, nomes=[f.filename for f in files],
+            max_workers=current_app.config['BATCH_MAX_WORKERS'] or None,
+            limite_memoria_mb=current_app.config['BATCH_WORKER_MEMORY_MB'] or None)
+        
+        return jsonify({'success': True, **result})
+        
     except Exception as e:
         return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
 
 @analysis_bp.route('/test', methods=['GET'])
 def test_analysis():
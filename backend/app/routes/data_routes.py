@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import os
 import pandas as pd
-import io
-from app.services.data_service import process_csv_data, clean_and_standardize_data 
+from app.services.data_service import (
+    process_csv_data, clean_and_standardize_data, build_dataset_summary, build_preview,
+    generate_basic_stats, get_column_types
+)
+from app.services.append_service import DatasetNaoEncontrado, anexar_respostas
+from app.services.cache_service import dataset_cache
+from app.services.dataset_store import dataset_store
+from app.services.streaming_service import process_csv_stream
+from app.utils.processos import TravaOcupada
+from app.utils.responses import etag_condicional
+from app.utils.standardization_rules import regras_padronizacao
 
 data_bp = Blueprint('data', __name__)
 
@@ -29,12 +38,18 @@ def upload_file():
             return jsonify({'error': 'Nome de arquivo vazio'}), 400
         
         if file and file.filename.endswith('.csv'):
-            # Lê o conteúdo do arquivo
-            file_content = file.stream.read().decode('utf-8')
-            file.stream.seek(0)  # Reset do ponteiro do arquivo
+            # Arquivos grandes (ou ?stream=1) são lidos e processados em blocos
+            if _usar_streaming():
+                result = process_csv_stream(
+                    file.stream, file.filename, chunksize=current_app.config['STREAMING_CHUNK_ROWS'])
+                return jsonify({
+                    'success': True,
+                    'message': 'Arquivo processado com sucesso',
+                    'data': result['data']
+                })
             
-            # Processa o CSV
-            result = process_csv_data(file_content)
+            # Processa o CSV direto do stream do upload (e armazena o dataset limpo no servidor)
+            result = process_csv_data(file.stream, file.filename, current_app.config['UPLOAD_TMP_FOLDER'])
             
             return jsonify({
                 'success': True,
@@ -51,13 +66,24 @@ def upload_file():
             'error': f'Erro no processamento do arquivo: {str(e)}'
         }), 500
 
+def _usar_streaming() -> bool:
+    """Decide se o upload atual deve ser processado em blocos"""
+    if request.args.get('stream') == '1':
+        return True
+    return (request.content_length or 0) > current_app.config['STREAMING_THRESHOLD_BYTES']
+
 @data_bp.route('/basic-stats', methods=['POST'])
 def get_basic_stats():
     """
     Endpoint alternativo: envia dados CSV via JSON para análise
     Útil para desenvolvimento e teste
+    Também aceita o CSV direto no corpo da requisição (Content-Type: text/csv)
     """
     try:
+        if request.mimetype == 'text/csv':
+            result = process_csv_data(request.stream, pasta_temp=current_app.config['UPLOAD_TMP_FOLDER'])
+            return jsonify({'success': True, 'data': result})
+        
         data = request.get_json()
         if not data or 'csv_content' not in data:
             return jsonify({'error': 'Conteúdo CSV não fornecido'}), 400
@@ -66,4 +92,104 @@ def get_basic_stats():
         return jsonify({'success': True, 'data': result})
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@data_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Estatísticas do cache de datasets (hits, misses, memória ocupada) e das
+    regras de padronização em uso (versão, recargas e memória de valores padronizados)
+    """
+    return jsonify({'success': True, 'cache': dataset_cache.stats(),
+                    'regras_padronizacao': regras_padronizacao.stats()})
+
+# --- Consultas a datasets já enviados (pelo dataset_id retornado no upload) ---
+# Respondem com ETag: com If-None-Match o dashboard recebe 304 se nada mudou
+
+@data_bp.route('/datasets/<dataset_id>', methods=['GET'])
+@etag_condicional(dataset_store.content_version)
+def get_dataset(dataset_id):
+    """Resumo completo de um dataset armazenado (mesmo formato do upload)"""
+    try:
+        dataset = dataset_store.load(dataset_id)
+        if dataset is None:
+            return jsonify({'error': 'Dataset não encontrado'}), 404
+        
+        return jsonify({'success': True, 'data': build_dataset_summary(dataset)})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@data_bp.route('/datasets/<dataset_id>/stats', methods=['GET'])
+@etag_condicional(dataset_store.content_version)
+def get_dataset_stats(dataset_id):
+    """Estatísticas básicas de um dataset armazenado"""
+    try:
+        dataset = dataset_store.load(dataset_id)
+        if dataset is None:
+            return jsonify({'error': 'Dataset não encontrado'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'dataset_id': dataset.key,
+                'shape': {'rows': dataset.shape[0], 'columns': dataset.shape[1]},
+                'column_types': get_column_types(dataset.df_clean),
+                'basic_stats': generate_basic_stats(dataset.df_clean)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@data_bp.route('/datasets/<dataset_id>/preview', methods=['GET'])
+@etag_condicional(dataset_store.content_version)
+def get_dataset_preview(dataset_id):
+    """Primeiras linhas de um dataset armazenado (?rows=N, padrão 5)"""
+    try:
+        rows = request.args.get('rows', 5, type=int)
+        dataset = dataset_store.load(dataset_id)
+        if dataset is None:
+            return jsonify({'error': 'Dataset não encontrado'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'dataset_id': dataset.key,
+                'preview': build_preview(dataset.df_clean, max(rows, 0))
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@data_bp.route('/datasets/<dataset_id>/append', methods=['POST'])
+def append_to_dataset(dataset_id):
+    """
+    Acrescenta a um dataset armazenado as respostas novas de um export mais
+    recente do formulário (arquivo no campo 'file' ou CSV no corpo, text/csv).
+    Apenas as linhas com timestamp posterior à última resposta do dataset
+    são processadas; as demais são ignoradas.
+    """
+    try:
+        if request.mimetype == 'text/csv':
+            stream = request.stream
+        else:
+            file = request.files.get('file')
+            if file is None or file.filename == '':
+                return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+            if not file.filename.lower().endswith('.csv'):
+                return jsonify({'error': 'Apenas arquivos CSV são permitidos'}), 400
+            stream = file.stream
+        
+        result = anexar_respostas(dataset_id, stream, current_app.config['UPLOAD_TMP_FOLDER'])
+        return jsonify({'success': True, 'data': result})
+        
+    except DatasetNaoEncontrado:
+        return jsonify({'error': 'Dataset não encontrado'}), 404
+    except TravaOcupada:
+        return jsonify({'error': 'Outro acréscimo a este dataset está em andamento; tente novamente'}), 503
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': f'Erro ao acrescentar respostas: {str(e)}'}), 500
@@ -0,0 +1,32 @@
+from flask import Blueprint, Response
+from app.services.cache_service import dataset_cache
+from app.utils.profiling import exportar_prometheus, memoria_rss
+
+metrics_bp = Blueprint('metrics', __name__)
+
+def contadores_cache():
+    """Estado do cache de datasets deste processo (somado entre os workers em /metrics)"""
+    cache = dataset_cache.stats()
+    return {
+        'cache_hits_total': cache['hits'],
+        'cache_disk_hits_total': cache['disk_hits'],
+        'cache_misses_total': cache['misses'],
+        'cache_evictions_total': cache['evictions'],
+        'cache_entries': cache['entries'],
+        'cache_bytes': cache['bytes']
+    }
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Métricas no formato de texto do Prometheus: contadores acumulados de cada
+    etapa do pipeline (execuções, segundos, linhas) e o estado do cache de
+    datasets, somados entre todos os workers; a memória é a do worker que responde
+    """
+    extras = {}
+    rss = memoria_rss()
+    if rss is not None:
+        extras['process_resident_memory_bytes'] = rss
+
+    return Response(exportar_prometheus(extras=extras),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
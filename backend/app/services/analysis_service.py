@@ -1,29 +1,56 @@
 # backend/app/services/analysis_service.py
 import pandas as pd
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from collections import Counter
+from app.services.dataset_store import dataset_store
+from app.services.filter_service import FiltroDataset
+from app.utils.profiling import etapa
+from app.utils.standardization_rules import RegrasPadronizacao, regras_padronizacao
+
+# --- Taxonomias de palavras-chave ---
+# Definidas em app/utils/standardization_rules.json ('desafios' e 'cursos_desejados')
+# e compiladas junto com as demais regras (regras_padronizacao.atuais()):
+# desafios contam palavras inteiras ('casa' não conta em 'casamento'), sem diferenciar acentos;
+# nos cursos basta o trecho aparecer ('cuidador' vale para 'cuidadora de idosos') e
+# vale a primeira área (na ordem do arquivo) com alguma palavra presente
+
+# Colunas 0/1 geradas na limpeza, uma por categoria de desafio (ver marcar_desafios).
+# As categorias não mudam com a recarga das regras (ver GerenciadorRegras)
+PREFIXO_DESAFIO = 'desafio_'
+COLUNAS_DESAFIOS = [f'{PREFIXO_DESAFIO}{categoria}'
+                    for categoria in regras_padronizacao.atuais().matcher_desafios.categorias]
 
 # --- Funções de Análise Específicas ---
 
 def analisar_desafios(desafios_series: pd.Series) -> Dict[str, int]:
     """Analisa e categoriza os desafios mais mencionados."""
-    texto = ' '.join(desafios_series.dropna().astype(str)).lower()
-    palavras_chave = {
-        'transporte': ['transporte', 'ônibus', 'onibus', 'locomoção', 'deslocamento', 'distancia', 'distância'],
-        'tempo': ['tempo', 'horário', 'cronograma', 'corrido'],
-        'material': ['material', 'camiseta', 'uniforme', 'kit', 'apostila'],
-        'financeiro': ['dinheiro', 'bolsa', 'recurso', 'financeiro', 'passagem'],
-        'familia': ['filho', 'filhos', 'criança', 'crianças', 'família', 'casa', 'marido'],
-        'saude': ['saúde', 'doença', 'medicamento', 'cansada']
-    }
-    
-    resultados = {}
-    for categoria, palavras in palavras_chave.items():
-        count = sum(texto.count(palavra) for palavra in palavras)
-        if count > 0:
-            resultados[categoria] = count
-    
+    return ordenar_desafios(contar_desafios(desafios_series))
+
+def contar_desafios(desafios_series: pd.Series) -> Dict[str, int]:
+    """Conta as menções de cada categoria de desafio (inclusive as que não aparecem)."""
+    return regras_padronizacao.atuais().matcher_desafios.contar(desafios_series)
+
+def analisar_desafios_por_resposta(desafios_series: pd.Series) -> pd.DataFrame:
+    """
+    Menções de cada categoria de desafio em cada resposta
+    (uma linha por resposta, uma coluna por categoria).
+    """
+    return regras_padronizacao.atuais().matcher_desafios.hits_por_resposta(desafios_series)
+
+def marcar_desafios(desafios_series: pd.Series, regras: Optional[RegrasPadronizacao] = None) -> pd.DataFrame:
+    """
+    Marca em cada resposta as categorias de desafio citadas: uma coluna uint8
+    por categoria (desafio_transporte, desafio_tempo, ...), 1 se citada.
+    Permite cruzar desafios com renda, idade etc. com um simples groupby.
+    regras: versão das regras a usar (padrão: as atuais)
+    """
+    matcher = (regras or regras_padronizacao.atuais()).matcher_desafios
+    return matcher.presenca_por_resposta(desafios_series).add_prefix(PREFIXO_DESAFIO)
+
+def ordenar_desafios(contagens: Dict[str, int]) -> Dict[str, int]:
+    """Mantém apenas as categorias mencionadas, da mais para a menos citada."""
+    resultados = {categoria: count for categoria, count in contagens.items() if count > 0}
     return dict(sorted(resultados.items(), key=lambda item: item[1], reverse=True))
 
 def extrair_insights_desafios(analise_desafios: Dict[str, int]) -> List[str]:
@@ -39,26 +66,16 @@ def extrair_insights_desafios(analise_desafios: Dict[str, int]) -> List[str]:
 
 def analisar_proximos_cursos(cursos_series: pd.Series) -> Dict[str, int]:
     """Analisa e categoriza os cursos mais solicitados."""
+    return dict(Counter(categorizar_cursos(cursos_series)).most_common(10))
+
+def categorizar_cursos(cursos_series: pd.Series) -> List[str]:
+    """Agrupa os cursos desejados em áreas (uma entrada por resposta preenchida)."""
     cursos = cursos_series.dropna().astype(str)
-    cursos = cursos[cursos != '']
+    cursos = cursos[cursos != ''].str.strip().str.lower()
     
-    cursos_limpos = []
-    for curso in cursos:
-        curso = curso.strip().lower()
-        if 'informática' in curso or 'computação' in curso or 'computador' in curso:
-            cursos_limpos.append('Informática')
-        elif 'enfermagem' in curso or 'cuidador' in curso or 'saude' in curso:
-            cursos_limpos.append('Área da Saúde/Cuidado')
-        elif 'costura' in curso:
-            cursos_limpos.append('Corte e Costura')
-        elif 'estética' in curso or 'beleza' in curso or 'cabelo' in curso:
-            cursos_limpos.append('Beleza e Estética')
-        elif 'eletricista' in curso:
-            cursos_limpos.append('Elétrica')
-        else:
-            cursos_limpos.append(curso.capitalize())
-            
-    return dict(Counter(cursos_limpos).most_common(10))
+    # Cursos fora das áreas conhecidas são mantidos com a primeira letra maiúscula
+    areas = regras_padronizacao.atuais().matcher_cursos.primeira_categoria(cursos)
+    return areas.fillna(cursos.str.capitalize()).tolist()
 
 def gerar_recomendacoes(analysis: Dict[str, Any]) -> List[str]:
     """Gera recomendações acionáveis baseadas na análise completa."""
@@ -84,71 +101,369 @@ def gerar_recomendacoes(analysis: Dict[str, Any]) -> List[str]:
 
 def identificar_insight_faixa_etaria(df: pd.DataFrame) -> str:
     """Identifica insights sobre a distribuição etária."""
-    distribuicao = df['faixa_etaria'].value_counts()
+    return insight_por_distribuicao_idade(df['faixa_etaria'].value_counts())
+
+def insight_por_distribuicao_idade(distribuicao) -> str:
+    """Mesmo insight de identificar_insight_faixa_etaria, a partir das contagens por faixa."""
     if distribuicao.get('37 a 46 anos', 0) > distribuicao.get('16 a 26 anos', 0):
         return "A maior parte das participantes são mulheres maduras (37-46 anos), indicando que o programa atrai um público que busca reinserção ou aprimoramento profissional."
     return "O perfil etário das participantes é diversificado, abrangendo diferentes fases da vida."
 
+# --- Agregados parciais ("sketches") combináveis ---
+# Cada seção da análise detalhada é calculada a partir de contagens e somas
+# que podem ser acumuladas bloco a bloco (update) e combinadas entre blocos,
+# arquivos ou campi (merge). result() gera o JSON final da seção.
+
+def _chave_json(valor):
+    """Converte escalares numpy em tipos Python (para serializar o estado)."""
+    return valor.item() if hasattr(valor, 'item') else valor
+
+def _contar_valores(counter: Counter, series: pd.Series):
+    # sort=False preserva a ordem de primeira ocorrência, a mesma usada
+    # pelo value_counts da análise completa para desempatar contagens
+    for valor, count in series.value_counts(sort=False).items():
+        if count > 0:  # colunas categóricas listam também as categorias sem ocorrência
+            counter[_chave_json(valor)] += int(count)
+
+def _distribuicao(counter: Counter) -> Dict[str, int]:
+    """Contagens em ordem decrescente, com chaves e valores compatíveis com JSON."""
+    return {str(k): int(v) for k, v in counter.most_common()}
+
+def _counter_state(counter: Counter) -> List[list]:
+    # Lista de pares (e não dict) para preservar chaves não-texto e a ordem
+    return [[k, v] for k, v in counter.items()]
+
+def _counter_from_state(state: List[list]) -> Counter:
+    return Counter({k: v for k, v in state})
+
+
+class PerfilDemograficoSketch:
+    """1. Perfil demográfico: distribuições de idade, escolaridade e renda."""
+
+    COLUNAS = ['faixa_etaria', 'escolaridade_simplificada', 'renda_categoria']
+
+    def __init__(self):
+        self.total = 0
+        self.idade = Counter()
+        self.escolaridade = Counter()
+        self.renda = Counter()
+
+    def update(self, df: pd.DataFrame):
+        self.total += len(df)
+        _contar_valores(self.idade, df['faixa_etaria'])
+        _contar_valores(self.escolaridade, df['escolaridade_simplificada'])
+        _contar_valores(self.renda, df['renda_categoria'])
+
+    def merge(self, other: 'PerfilDemograficoSketch'):
+        self.total += other.total
+        self.idade.update(other.idade)
+        self.escolaridade.update(other.escolaridade)
+        self.renda.update(other.renda)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'distribuicao_idade': _distribuicao(self.idade),
+            'distribuicao_escolaridade': _distribuicao(self.escolaridade),
+            'distribuicao_renda': _distribuicao(self.renda),
+            'total_mulheres': int(self.total),
+            'insight_idade': insight_por_distribuicao_idade(self.idade)
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'total': self.total, 'idade': _counter_state(self.idade),
+                'escolaridade': _counter_state(self.escolaridade), 'renda': _counter_state(self.renda)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'PerfilDemograficoSketch':
+        sketch = cls()
+        sketch.total = state['total']
+        sketch.idade = _counter_from_state(state['idade'])
+        sketch.escolaridade = _counter_from_state(state['escolaridade'])
+        sketch.renda = _counter_from_state(state['renda'])
+        return sketch
+
+
+class SatisfacaoSketch:
+    """2. Satisfação: somas e contagens das notas e distribuição das avaliações."""
+
+    AVALIACOES = {
+        'coordenador': 'avaliacao_coordenador',
+        'assistente_pedagogica': 'avaliacao_assistente',
+        'aulas': 'avaliacao_aulas'
+    }
+    COLUNAS = [c for coluna in AVALIACOES.values() for c in (coluna, f'{coluna}_score')]
+
+    def __init__(self):
+        self.somas = {nome: 0.0 for nome in self.AVALIACOES}
+        self.contagens = {nome: 0 for nome in self.AVALIACOES}
+        self.distribuicoes = {nome: Counter() for nome in self.AVALIACOES}
+
+    def update(self, df: pd.DataFrame):
+        for nome, coluna in self.AVALIACOES.items():
+            scores = df[f'{coluna}_score']
+            self.somas[nome] += float(scores.sum())
+            self.contagens[nome] += int(scores.count())
+            _contar_valores(self.distribuicoes[nome], df[coluna])
+
+    def merge(self, other: 'SatisfacaoSketch'):
+        for nome in self.AVALIACOES:
+            self.somas[nome] += other.somas[nome]
+            self.contagens[nome] += other.contagens[nome]
+            self.distribuicoes[nome].update(other.distribuicoes[nome])
+
+    def _media(self, nome: str) -> float:
+        count = self.contagens[nome]
+        return self.somas[nome] / count if count else float('nan')
+
+    def result(self) -> Dict[str, Any]:
+        medias = {nome: self._media(nome) for nome in self.AVALIACOES}
+        return {
+            'medias_avaliacoes': {
+                **{nome: float(round(media, 2)) for nome, media in medias.items()},
+                # Média das médias de cada avaliação (ignorando as vazias)
+                'geral': float(round(pd.Series(list(medias.values()), dtype=float).mean(), 2))
+            },
+            'distribuicao_avaliacoes': {
+                nome: _distribuicao(counter) for nome, counter in self.distribuicoes.items()
+            }
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'somas': self.somas, 'contagens': self.contagens,
+                'distribuicoes': {nome: _counter_state(c) for nome, c in self.distribuicoes.items()}}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'SatisfacaoSketch':
+        sketch = cls()
+        sketch.somas = dict(state['somas'])
+        sketch.contagens = dict(state['contagens'])
+        sketch.distribuicoes = {nome: _counter_from_state(c) for nome, c in state['distribuicoes'].items()}
+        return sketch
+
+
+class DesafiosSketch:
+    """3. Desafios: menções de cada categoria de palavras-chave."""
+
+    COLUNAS = ['desafios']
+
+    def __init__(self):
+        categorias = regras_padronizacao.atuais().matcher_desafios.categorias
+        self.mencoes = Counter({categoria: 0 for categoria in categorias})
+
+    def update(self, df: pd.DataFrame):
+        hits = analisar_desafios_por_resposta(df['desafios'])
+        self.mencoes.update({categoria: int(n) for categoria, n in hits.sum().items()})
+
+    def merge(self, other: 'DesafiosSketch'):
+        self.mencoes.update(other.mencoes)
+
+    def result(self) -> Dict[str, Any]:
+        desafios_analisados = ordenar_desafios(dict(self.mencoes))
+        return {
+            'principais_desafios': desafios_analisados,
+            'insights_acionaveis': extrair_insights_desafios(desafios_analisados)
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'mencoes': _counter_state(self.mencoes)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'DesafiosSketch':
+        sketch = cls()
+        sketch.mencoes = _counter_from_state(state['mencoes'])
+        return sketch
+
+
+class DemandaFuturaSketch:
+    """4. Demanda futura: contagem de todos os cursos desejados (top 10 no resultado)."""
+
+    COLUNAS = ['proximo_curso']
+
+    def __init__(self):
+        self.cursos = Counter()
+
+    def update(self, df: pd.DataFrame):
+        self.cursos.update(categorizar_cursos(df['proximo_curso']))
+
+    def merge(self, other: 'DemandaFuturaSketch'):
+        self.cursos.update(other.cursos)
+
+    def result(self) -> Dict[str, Any]:
+        return {'cursos_mais_solicitados': dict(self.cursos.most_common(10))}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'cursos': _counter_state(self.cursos)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'DemandaFuturaSketch':
+        sketch = cls()
+        sketch.cursos = _counter_from_state(state['cursos'])
+        return sketch
+
+
+class QualidadeDadosSketch:
+    """5. Qualidade dos dados: contagem de respostas não informadas."""
+
+    COLUNAS = ['faixa_etaria', 'renda_categoria', 'profissao']
+
+    def __init__(self):
+        self.faltantes = Counter({'faixa_etaria': 0, 'renda': 0, 'profissao': 0})
+
+    def update(self, df: pd.DataFrame):
+        self.faltantes['faixa_etaria'] += int((df['faixa_etaria'] == 'Nao informado').sum())
+        self.faltantes['renda'] += int((df['renda_categoria'] == 'Nao informado').sum())
+        self.faltantes['profissao'] += int((df['profissao'] == '').sum())
+
+    def merge(self, other: 'QualidadeDadosSketch'):
+        self.faltantes.update(other.faltantes)
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'taxa_resposta': 100.0,
+            'dados_faltantes': {
+                'faixa_etaria': self.faltantes['faixa_etaria'],
+                'renda': self.faltantes['renda'],
+                'profissao': self.faltantes['profissao']
+            }
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'faltantes': dict(self.faltantes)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'QualidadeDadosSketch':
+        sketch = cls()
+        sketch.faltantes = Counter(state['faltantes'])
+        return sketch
+
+
+class DetailedAnalysisSketch:
+    """
+    Agregado parcial da análise detalhada completa: uma sketch por seção.
+
+    - update(df): incorpora novas respostas (um bloco, ou só as linhas novas de um dataset)
+    - merge(other): combina com a sketch de outro bloco, arquivo ou campus
+    - result(): JSON no formato de generate_detailed_analysis
+    - to_state()/from_state(): estado serializável em JSON, para ser armazenado com o dataset
+    """
+
+    # Incrementar quando o conteúdo do estado (ou a forma de contar) mudar:
+    # estados salvos com outra versão são descartados e recalculados
+    VERSAO = 2
+
+    SECOES = {
+        'perfil_demografico': PerfilDemograficoSketch,
+        'satisfacao': SatisfacaoSketch,
+        'desafios': DesafiosSketch,
+        'demanda_futura': DemandaFuturaSketch,
+        'qualidade_dados': QualidadeDadosSketch
+    }
+
+    def __init__(self):
+        self.secoes = {nome: classe() for nome, classe in self.SECOES.items()}
+
+    @classmethod
+    def colunas(cls) -> List[str]:
+        """Colunas do DataFrame limpo lidas por update() (as demais nem precisam ser carregadas)."""
+        return list(dict.fromkeys(c for classe in cls.SECOES.values() for c in classe.COLUNAS))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'DetailedAnalysisSketch':
+        sketch = cls()
+        sketch.update(df)
+        return sketch
+
+    def update(self, df: pd.DataFrame) -> 'DetailedAnalysisSketch':
+        for nome, secao in self.secoes.items():
+            with etapa(f'analise.{nome}', len(df)):
+                secao.update(df)
+        return self
+
+    def merge(self, other: 'DetailedAnalysisSketch') -> 'DetailedAnalysisSketch':
+        for nome, secao in self.secoes.items():
+            secao.merge(other.secoes[nome])
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        analysis = {}
+        for nome, secao in self.secoes.items():
+            with etapa(f'analise.{nome}.resultado'):
+                analysis[nome] = secao.result()
+        
+        # 6. RECOMENDAÇÕES PARA POLÍTICAS PÚBLICAS
+        with etapa('analise.recomendacoes'):
+            analysis['recomendacoes'] = gerar_recomendacoes(analysis)
+        return analysis
+
+    def to_state(self) -> Dict[str, Any]:
+        state = {nome: secao.to_state() for nome, secao in self.secoes.items()}
+        state['versao'] = self.VERSAO
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'DetailedAnalysisSketch':
+        if state.get('versao') != cls.VERSAO:
+            raise ValueError(f"Versão do estado da análise incompatível: {state.get('versao')}")
+        sketch = cls()
+        sketch.secoes = {nome: classe.from_state(state[nome]) for nome, classe in cls.SECOES.items()}
+        return sketch
+
 # --- Função Principal de Geração da Análise ---
 
-def generate_detailed_analysis(df: pd.DataFrame) -> Dict[str, Any]:
+def generate_detailed_analysis(df: pd.DataFrame, filtro: Optional[FiltroDataset] = None) -> Dict[str, Any]:
     """
     Gera análise detalhada dos dados padronizados para políticas públicas,
     com todos os tipos de dados compatíveis com JSON.
+    Seções: 1. perfil demográfico, 2. satisfação, 3. desafios, 4. demanda futura,
+    5. qualidade dos dados e 6. recomendações (ver DetailedAnalysisSketch).
+    filtro: analisa apenas as respostas selecionadas (curso, instituição, faixa etária, período)
     """
-    analysis = {}
-    
-    # Função auxiliar para converter dicionários de value_counts para JSON-safe
-    def to_safe_dict(series: pd.Series) -> Dict[str, int]:
-        return {str(k): int(v) for k, v in series.to_dict().items()}
-
-    # 1. ANÁLISE DEMOGRÁFICA (Perfil das mulheres)
-    analysis['perfil_demografico'] = {
-        'distribuicao_idade': to_safe_dict(df['faixa_etaria'].value_counts()),
-        'distribuicao_escolaridade': to_safe_dict(df['escolaridade_simplificada'].value_counts()),
-        'distribuicao_renda': to_safe_dict(df['renda_categoria'].value_counts()),
-        'total_mulheres': int(len(df)),
-        'insight_idade': identificar_insight_faixa_etaria(df)
-    }
-    
-    # 2. ANÁLISE DE SATISFAÇÃO (Qualidade do programa)
-    analysis['satisfacao'] = {
-        'medias_avaliacoes': {
-            'coordenador': float(round(df['avaliacao_coordenador_score'].mean(), 2)),
-            'assistente_pedagogica': float(round(df['avaliacao_assistente_score'].mean(), 2)),
-            'aulas': float(round(df['avaliacao_aulas_score'].mean(), 2)),
-            'geral': float(round(df[['avaliacao_coordenador_score', 'avaliacao_assistente_score', 'avaliacao_aulas_score']].mean().mean(), 2))
-        },
-        'distribuicao_avaliacoes': {
-            'coordenador': to_safe_dict(df['avaliacao_coordenador'].value_counts()),
-            'assistente_pedagogica': to_safe_dict(df['avaliacao_assistente'].value_counts()),
-            'aulas': to_safe_dict(df['avaliacao_aulas'].value_counts())
-        }
-    }
-    
-    # 3. ANÁLISE DE DESAFIOS (Para melhorar o programa)
-    desafios_analisados = analisar_desafios(df['desafios'])
-    analysis['desafios'] = {
-        'principais_desafios': desafios_analisados,
-        'insights_acionaveis': extrair_insights_desafios(desafios_analisados)
-    }
-    
-    # 4. DEMANDA FUTURA (Cursos desejados)
-    analysis['demanda_futura'] = {
-        'cursos_mais_solicitados': analisar_proximos_cursos(df['proximo_curso'])
-    }
-    
-    # 5. METRICS DE QUALIDADE DOS DADOS
-    analysis['qualidade_dados'] = {
-        'taxa_resposta': 100.0,
-        'dados_faltantes': {
-            'faixa_etaria': int((df['faixa_etaria'] == 'Nao informado').sum()),
-            'renda': int((df['renda_categoria'] == 'Nao informado').sum()),
-            'profissao': int((df['profissao'] == '').sum())
-        }
-    }
+    if filtro is not None:
+        with etapa('analise.filtro', len(df)) as e:
+            df = filtro.aplicar(df)
+            e.linhas_saida = len(df)
+    return DetailedAnalysisSketch.from_frame(df).result()
+
+def generate_filtered_analysis(dataset_id: str, filtro: FiltroDataset) -> Optional[Dict[str, Any]]:
+    """
+    Análise detalhada de um recorte de um dataset armazenado (None se ele não existe).
+    Do Parquet são lidas apenas as partições, os row groups e as colunas
+    necessários; o filtro vazio usa a sketch salva com o dataset.
+    Retorna: {'analysis': análise, 'linhas': respostas analisadas}
+    """
+    if filtro.vazio:
+        sketch = get_dataset_analysis_sketch(dataset_id)
+        if sketch is None:
+            return None
+        analysis = sketch.result()
+        return {'analysis': analysis, 'linhas': analysis['perfil_demografico']['total_mulheres']}
+
+    with etapa('leitura_filtrada') as e:
+        df = dataset_store.load_filtered(dataset_id, filtro, DetailedAnalysisSketch.colunas())
+        if df is None:
+            return None
+        e.linhas_saida = len(df)
+    return {'analysis': DetailedAnalysisSketch.from_frame(df).result(), 'linhas': len(df)}
+
+def get_dataset_analysis_sketch(dataset_id: str) -> Optional[DetailedAnalysisSketch]:
+    """
+    Sketch da análise detalhada de um dataset armazenado (None se ele não existe).
+    Usa o estado salvo junto com o dataset, sem ler as linhas; se ainda não
+    existe, calcula a partir do DataFrame limpo e salva para as próximas consultas.
+    """
+    # Versão lida antes das linhas: se um append acontecer no meio, o estado
+    # salvo fica com a versão antiga e é recalculado na próxima consulta
+    versao = dataset_store.content_version(dataset_id)
+    if versao is None:
+        return None
+    state = dataset_store.load_analysis_state(dataset_id)
+    if state is not None and state.get('versao') == DetailedAnalysisSketch.VERSAO:
+        return DetailedAnalysisSketch.from_state(state)
     
-    # 6. RECOMENDAÇÕES PARA POLÍTICAS PÚBLICAS
-    analysis['recomendacoes'] = gerar_recomendacoes(analysis)
+    dataset = dataset_store.load(dataset_id)
+    if dataset is None:
+        return None
     
-    return analysis
+    sketch = DetailedAnalysisSketch.from_frame(dataset.df_clean)
+    dataset_store.save_analysis_state(dataset_id, sketch.to_state(), versao)
+    return sketch
@@ -0,0 +1,150 @@
+# backend/app/services/append_service.py
+import logging
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+import pandas as pd
+
+from app.services.analysis_service import DetailedAnalysisSketch
+from app.services.cube_service import CuboAgregado
+from app.services.data_service import clean_and_standardize_data
+from app.services.dataset_store import dataset_store
+from app.services.filter_service import FiltroDataset, converter_timestamp
+from app.services.ingestion_service import ler_csv, receber_upload
+from app.utils.profiling import etapa
+
+logger = logging.getLogger(__name__)
+
+# Coluna do timestamp no export do Google Forms (antes de ser renomeada para 'timestamp')
+COLUNA_CARIMBO = 'Carimbo de data/hora'
+
+class DatasetNaoEncontrado(Exception):
+    """O dataset_id não corresponde a um dataset armazenado."""
+
+
+def anexar_respostas(dataset_id: str, file_content: Union[str, bytes, BinaryIO],
+                     pasta_temp: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Acrescenta a um dataset armazenado as respostas de um export mais recente
+    do formulário. Apenas as linhas a partir do timestamp da última resposta
+    do dataset são limpas e gravadas (o export completo pode ser enviado de
+    novo); as do próprio último timestamp só entram se ainda não estão
+    gravadas (comparando a linha inteira). Os agregados salvos da análise
+    detalhada e do cubo são atualizados com as linhas novas, sem reprocessar o histórico.
+
+    Retorna: contagens de linhas recebidas/novas/ignoradas e o novo estado do dataset
+    Levanta: DatasetNaoEncontrado; ValueError se o CSV ou o dataset não permitem o acréscimo
+    """
+    if not dataset_store.is_valid_id(dataset_id) or dataset_store.get_meta(dataset_id) is None:
+        raise DatasetNaoEncontrado(dataset_id)
+
+    if isinstance(file_content, str):
+        file_content = file_content.encode('utf-8')
+    if isinstance(file_content, bytes):
+        df = _ler(file_content)
+    else:
+        with receber_upload(file_content, pasta_temp) as upload:
+            df = _ler(upload.dados)
+
+    df.columns = df.columns.str.strip()
+    if COLUNA_CARIMBO not in df.columns:
+        raise ValueError(f"CSV sem a coluna '{COLUNA_CARIMBO}'")
+
+    # Um acréscimo por vez em cada dataset, em qualquer worker: duas atualizações
+    # simultâneas não podem gravar as mesmas respostas duas vezes nem perder as de uma delas
+    with dataset_store.bloquear_escrita(dataset_id):
+        ultimo = dataset_store.ultimo_timestamp(dataset_id)
+        if ultimo is None:
+            raise ValueError('O dataset não tem respostas com timestamp válido')
+
+        with etapa('anexar.selecionar_novas', len(df)) as e:
+            timestamps = converter_timestamp(df[COLUNA_CARIMBO])
+            df_novas = df[timestamps >= ultimo]
+            df_clean = None
+            if len(df_novas):
+                df_clean, _ = clean_and_standardize_data(df_novas)
+                repetidas = _ja_gravadas(dataset_id, df_clean, timestamps.loc[df_clean.index] == ultimo, ultimo)
+                df_novas = df_novas.drop(index=repetidas)
+                df_clean = df_clean.drop(index=repetidas)
+            e.linhas_saida = len(df_novas)
+        sem_timestamp = int(timestamps.isna().sum())
+
+        if len(df_novas):
+            # Estados da versão atual, lidos antes de o append mudar a versão do conteúdo
+            estados = (dataset_store.load_analysis_state(dataset_id), dataset_store.load_cube_state(dataset_id))
+            with etapa('anexar.gravar', len(df_clean)):
+                meta = dataset_store.append(dataset_id, df_clean, len(df_novas))
+            _atualizar_agregados(dataset_id, df_clean, *estados)
+        else:
+            meta = dataset_store.get_meta(dataset_id)
+
+    logger.info(f"Dataset {dataset_id[:12]}: {len(df)} resposta(s) recebida(s), {len(df_novas)} nova(s)")
+    layout = meta.get('layout', {})
+    return {
+        'dataset_id': dataset_id,
+        'linhas_recebidas': len(df),
+        'linhas_novas': len(df_novas),
+        'linhas_ignoradas': len(df) - len(df_novas),
+        'linhas_sem_timestamp': sem_timestamp,
+        'ultimo_timestamp': layout.get('ultimo_timestamp'),
+        'rows_clean': meta['rows_clean'],
+        'updated_at': meta.get('updated_at', meta['created_at'])
+    }
+
+
+def _ler(dados) -> pd.DataFrame:
+    with etapa('leitura_csv', None) as e:
+        df = ler_csv(dados)
+        e.linhas_saida = len(df)
+    return df
+
+
+def _ja_gravadas(dataset_id: str, df_clean: pd.DataFrame, no_limite: pd.Series,
+                 ultimo: pd.Timestamp) -> pd.Index:
+    """
+    Linhas de df_clean com o mesmo timestamp da última resposta gravada que já
+    estão no dataset (mesmos valores em todas as colunas). Cada linha gravada
+    corresponde a no máximo uma linha do export: respostas idênticas enviadas
+    no mesmo segundo continuam contando como respostas distintas.
+    Retorna: índice (de df_clean) das linhas a descartar
+    """
+    candidatas = df_clean[no_limite.to_numpy()]
+    if candidatas.empty:
+        return candidatas.index
+    limite = ultimo.to_pydatetime()
+    gravadas = dataset_store.load_filtered(dataset_id, FiltroDataset(inicio=limite, fim=limite))
+    colunas = [c for c in candidatas.columns if c in gravadas.columns]
+
+    restantes = Counter(_linhas(gravadas[colunas]))
+    repetidas = []
+    for indice, linha in zip(candidatas.index, _linhas(candidatas[colunas])):
+        if restantes[linha] > 0:
+            restantes[linha] -= 1
+            repetidas.append(indice)
+    return pd.Index(repetidas)
+
+
+def _linhas(df: pd.DataFrame):
+    # Texto de cada valor: categorias/objetos e os mesmos valores lidos do Parquet se comparam igual
+    return df.astype(object).astype(str).itertuples(index=False, name=None)
+
+
+def _atualizar_agregados(dataset_id: str, df_clean: pd.DataFrame, analise: Optional[Dict[str, Any]],
+                         cubo: Optional[Dict[str, Any]]):
+    """
+    Incorpora as respostas novas aos agregados salvos com o dataset (estados
+    lidos antes do append) e os grava com a nova versão do conteúdo.
+    Agregados ainda não calculados (ou de outra versão) continuam sem estado
+    salvo e são calculados a partir do dataset completo na próxima consulta.
+    """
+    versao = dataset_store.content_version(dataset_id)
+    if analise is not None and analise.get('versao') == DetailedAnalysisSketch.VERSAO:
+        sketch = DetailedAnalysisSketch.from_state(analise).update(df_clean)
+        dataset_store.save_analysis_state(dataset_id, sketch.to_state(), versao)
+
+    if cubo is not None:
+        try:
+            cubo_agregado = CuboAgregado.from_state(cubo)
+        except ValueError:
+            return
+        dataset_store.save_cube_state(dataset_id, cubo_agregado.update(df_clean).to_state(), versao)
@@ -0,0 +1,154 @@
+# backend/app/services/batch_service.py
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.services.analysis_service import DetailedAnalysisSketch
+from app.services.data_service import clean_and_standardize_data
+from app.services.ingestion_service import AMOSTRA_CODIFICACAO, detectar_codificacao
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas por bloco em cada worker (mantém a memória de cada processo limitada)
+DEFAULT_BATCH_CHUNK_ROWS = 50_000
+
+
+def listar_csvs(caminhos: List[str]) -> List[str]:
+    """
+    Expande a lista de caminhos: diretórios viram os arquivos .csv que contêm
+    (em ordem alfabética); arquivos são mantidos como estão.
+    """
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.extend(sorted(
+                os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                if nome.lower().endswith('.csv')
+            ))
+        else:
+            arquivos.append(caminho)
+    return arquivos
+
+
+def _inicializar_worker(limite_memoria_mb: Optional[int]):
+    """Executado uma vez em cada processo do pool: aplica o limite de memória."""
+    if not limite_memoria_mb:
+        return
+    try:
+        import resource
+        limite = limite_memoria_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Não foi possível limitar a memória do worker: {str(e)}")
+
+
+def _analisar_arquivo(caminho: str, nome: str, chunksize: int) -> Dict[str, Any]:
+    """
+    Limpa e analisa um arquivo (executado dentro de um worker).
+    Retorna o resultado do arquivo e o estado da sketch, usado no relatório geral.
+    """
+    try:
+        # Mesma detecção de codificação dos uploads (exportações em cp1252/latin-1)
+        with open(caminho, 'rb') as f:
+            encoding = detectar_codificacao(f.read(AMOSTRA_CODIFICACAO))
+        sketch = DetailedAnalysisSketch()
+        linhas = 0
+        for chunk in pd.read_csv(caminho, chunksize=chunksize, dtype=str, encoding=encoding):
+            chunk_clean, _ = clean_and_standardize_data(chunk)
+            linhas += len(chunk)
+            sketch.update(chunk_clean)
+
+        return {
+            'arquivo': nome,
+            'success': True,
+            'linhas': linhas,
+            'analysis': sketch.result(),
+            'state': sketch.to_state()
+        }
+    except MemoryError:
+        return {'arquivo': nome, 'success': False, 'error': 'Limite de memória do worker excedido'}
+    except Exception as e:
+        return {'arquivo': nome, 'success': False, 'error': f'Erro na análise: {str(e)}'}
+
+
+# Pool de processos do processo atual, reutilizado entre as análises: cada
+# processo 'spawn' importa pandas e os serviços de novo ao ser criado
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_config: Optional[Tuple[int, Optional[int]]] = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool(workers: int, limite_memoria_mb: Optional[int]) -> ProcessPoolExecutor:
+    """Pool com `workers` processos e o limite de memória dado (recriado se eles mudarem)."""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is None or _pool_config != (workers, limite_memoria_mb):
+            if _pool is not None:
+                # Análises já enviadas ao pool anterior terminam normalmente
+                _pool.shutdown(wait=False)
+            # 'spawn' evita copiar para os workers o estado (threads, locks) do servidor
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_inicializar_worker, initargs=(limite_memoria_mb,))
+            _pool_config = (workers, limite_memoria_mb)
+        return _pool
+
+
+def _descartar_pool(pool: ProcessPoolExecutor):
+    """Descarta um pool quebrado (ex.: worker encerrado pelo sistema); o próximo lote cria outro."""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_config = None, None
+    pool.shutdown(wait=False)
+
+
+def analisar_arquivos(caminhos: List[str], nomes: Optional[List[str]] = None,
+                      max_workers: Optional[int] = None, limite_memoria_mb: Optional[int] = None,
+                      chunksize: int = DEFAULT_BATCH_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Analisa vários arquivos CSV (ex.: um por campus/instituição) em paralelo,
+    em um pool de processos, e combina os resultados em um relatório geral.
+
+    max_workers: número máximo de processos (padrão: número de CPUs)
+    limite_memoria_mb: limite de memória virtual de cada worker (None = sem limite)
+
+    Retorna: {'arquivos': [resultado por arquivo], 'geral': análise combinada, ...}
+    """
+    nomes = nomes or [os.path.basename(caminho) for caminho in caminhos]
+    if not caminhos:
+        raise ValueError('Nenhum arquivo CSV para analisar')
+
+    # O tamanho do pool não depende do lote, para que o mesmo pool sirva a todos
+    tamanho_pool = max(1, max_workers or os.cpu_count() or 1)
+    workers = min(tamanho_pool, len(caminhos))
+    logger.info(f"Analisando {len(caminhos)} arquivo(s) com {workers} worker(s)")
+
+    pool = _obter_pool(tamanho_pool, limite_memoria_mb)
+    try:
+        resultados = list(pool.map(_analisar_arquivo, caminhos, nomes, [chunksize] * len(caminhos)))
+    except BrokenProcessPool:
+        _descartar_pool(pool)
+        raise
+
+    # Relatório geral: combinação das sketches de todos os arquivos analisados
+    geral = DetailedAnalysisSketch()
+    for resultado in resultados:
+        state = resultado.pop('state', None)
+        if state is not None:
+            geral.merge(DetailedAnalysisSketch.from_state(state))
+
+    sucesso = [r for r in resultados if r['success']]
+    return {
+        'total_arquivos': len(resultados),
+        'arquivos_com_erro': len(resultados) - len(sucesso),
+        'total_linhas': sum(r['linhas'] for r in sucesso),
+        'workers': workers,
+        'arquivos': resultados,
+        'geral': geral.result() if sucesso else None
+    }
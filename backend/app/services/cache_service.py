@@ -0,0 +1,254 @@
+# backend/app/services/cache_service.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(file_content: Union[str, bytes]) -> str:
+    """
+    Calcula o hash (SHA-256) do conteúdo bruto do arquivo enviado.
+    O mesmo arquivo sempre gera a mesma chave, independente do endpoint.
+    """
+    if isinstance(file_content, str):
+        file_content = file_content.encode('utf-8')
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def chave_dataset(hash_conteudo: str, versao_regras: str) -> str:
+    """
+    Chave do dataset limpo (e dataset_id no DatasetStore): o hash do conteúdo
+    combinado com a versão das regras de padronização usadas na limpeza.
+    O mesmo arquivo limpo com outras regras é outro dataset.
+    """
+    return hashlib.sha256(f'{hash_conteudo}:{versao_regras}'.encode('ascii')).hexdigest()
+
+
+def parquet_disponivel() -> bool:
+    """Verifica se existe um engine Parquet (pyarrow ou fastparquet) instalado."""
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def pyarrow_disponivel() -> bool:
+    """Verifica se o pyarrow está instalado (o Parquet particionado do DatasetStore depende dele)."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class CachedDataset:
+    """
+    Dataset já limpo e padronizado, junto com os logs de limpeza
+    e o formato (linhas, colunas) do CSV original.
+    versao: None quando o conteúdo é exatamente o do CSV de hash `key`; para um
+    dataset armazenado que recebeu respostas (dataset_store.append), a versão
+    do conteúdo lida do repositório (ver DatasetStore.content_version)
+    """
+
+    def __init__(self, key: str, df_clean: pd.DataFrame, logs: List[str], shape: Tuple[int, int],
+                 versao: Optional[str] = None):
+        self.key = key
+        self.df_clean = df_clean
+        self.logs = logs
+        self.shape = shape
+        self.versao = versao
+        self.nbytes = int(df_clean.memory_usage(deep=True).sum())
+
+
+class DatasetCache:
+    """
+    Cache LRU de DataFrames limpos, indexado pelo hash do conteúdo do CSV.
+
+    - Remove da memória o dataset usado há mais tempo quando o número de
+      entradas ou o total de bytes ultrapassa o limite configurado.
+    - Opcionalmente grava em Parquet os datasets removidos, para que um novo
+      upload do mesmo arquivo seja lido do disco em vez de reprocessado.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 512 * 1024 * 1024,
+                 spill_folder: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, CachedDataset]' = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(max_entries, max_bytes, spill_folder)
+
+    def configure(self, max_entries: int, max_bytes: int, spill_folder: Optional[str] = None):
+        """Atualiza os limites do cache (chamado em create_app)."""
+        if spill_folder and not parquet_disponivel():
+            logger.warning("Nenhum engine Parquet instalado: cache em disco desativado")
+            spill_folder = None
+        if spill_folder:
+            os.makedirs(spill_folder, exist_ok=True)
+
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self.spill_folder = spill_folder
+            self._evict()
+
+    # --- Acesso ---
+
+    def get(self, key: str, versao: Optional[str] = None) -> Optional[CachedDataset]:
+        """
+        Busca um dataset pelo hash. Retorna None em caso de miss.
+        versao: versão do conteúdo esperada (ver CachedDataset); uma entrada de
+        outra versão (ex.: anterior a um acréscimo feito por outro worker) conta como miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.versao == versao:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load_spilled(key)
+        if entry is not None and entry.versao != versao:
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(entry)
+            return entry
+
+    def put(self, entry: CachedDataset):
+        """Adiciona (ou substitui) um dataset no cache."""
+        with self._lock:
+            self._insert(entry)
+
+    def get_or_load(self, key: str, loader: Callable[[], CachedDataset],
+                    versao: Optional[str] = None) -> Tuple[CachedDataset, bool]:
+        """
+        Retorna o dataset em cache (na versão `versao`) ou executa `loader` para criá-lo.
+        Retorna: (dataset, cache_hit)
+        """
+        entry = self.get(key, versao)
+        if entry is not None:
+            return entry, True
+
+        entry = loader()
+        self.put(entry)
+        return entry, False
+
+    def discard(self, key: str):
+        """Remove um dataset do cache (em memória e em disco), ex.: após ele ser alterado."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+        if self.spill_folder:
+            for path in self._spill_paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def clear(self):
+        """Esvazia o cache em memória (os arquivos em disco são mantidos)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'spill_enabled': self.spill_folder is not None
+            }
+
+    # --- Internos (chamados com o lock adquirido) ---
+
+    def _insert(self, entry: CachedDataset):
+        old = self._entries.pop(entry.key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[entry.key] = entry
+        self._bytes += entry.nbytes
+        self._evict()
+
+    def _evict(self):
+        # Mantém sempre a entrada mais recente, mesmo que ela sozinha exceda max_bytes
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.nbytes
+            self.evictions += 1
+            self._spill(old)
+
+    # --- Persistência em Parquet ---
+
+    def _spill_paths(self, key: str) -> Tuple[str, str]:
+        return (os.path.join(self.spill_folder, f'{key}.parquet'),
+                os.path.join(self.spill_folder, f'{key}.json'))
+
+    def _spill(self, entry: CachedDataset):
+        if not self.spill_folder:
+            return
+        data_path, meta_path = self._spill_paths(entry.key)
+        if os.path.exists(meta_path) and self._versao_gravada(meta_path) == entry.versao:
+            return
+        try:
+            entry.df_clean.to_parquet(data_path, index=False)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'logs': entry.logs, 'shape': list(entry.shape), 'versao': entry.versao}, f,
+                          ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar o dataset {entry.key[:12]} em Parquet: {str(e)}")
+            for path in (data_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _versao_gravada(meta_path: str) -> Optional[str]:
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f).get('versao')
+        except (OSError, ValueError):
+            return None
+
+    def _load_spilled(self, key: str) -> Optional[CachedDataset]:
+        if not self.spill_folder:
+            return None
+        data_path, meta_path = self._spill_paths(key)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            df_clean = pd.read_parquet(data_path)
+        except Exception as e:
+            logger.warning(f"Falha ao ler o dataset {key[:12]} do disco: {str(e)}")
+            return None
+        return CachedDataset(key, df_clean, meta['logs'], tuple(meta['shape']), meta.get('versao'))
+
+
+# Instância única usada pelas rotas (configurada em create_app)
+dataset_cache = DatasetCache()
@@ -0,0 +1,231 @@
+# backend/app/services/cube_service.py
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.services.analysis_service import COLUNAS_DESAFIOS, PREFIXO_DESAFIO, SatisfacaoSketch, marcar_desafios
+from app.services.dataset_store import dataset_store
+from app.services.filter_service import FiltroDataset
+from app.utils.profiling import etapa
+
+logger = logging.getLogger(__name__)
+
+# Dimensões do cubo (colunas categóricas do DataFrame limpo)
+DIMENSOES_CUBO = ['faixa_etaria', 'escolaridade_simplificada', 'renda_categoria', 'curso']
+
+# Cubos mantidos em memória (os demais são lidos do estado salvo com o dataset)
+MAX_CUBOS_EM_MEMORIA = 32
+
+
+class DimensaoAusente(ValueError):
+    """Agrupamento/filtro por uma dimensão que o dataset não tem (coluna ausente no CSV)."""
+
+
+def _valor_dimensao(valor) -> str:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ''
+    return str(valor)
+
+
+class CuboAgregado:
+    """
+    Cubo de agregados pré-calculados sobre as dimensões de DIMENSOES_CUBO:
+    para cada combinação de valores presente no dataset, o número de respostas,
+    a soma e a contagem de cada nota de avaliação e o número de respostas que
+    citam cada categoria de desafio (colunas desafio_*).
+
+    Qualquer agrupamento/filtro sobre essas dimensões é respondido somando as
+    células do cubo (centenas a poucos milhares), sem reler as linhas.
+    Colunas ausentes no dataset entram vazias; consultar por uma dimensão
+    ausente levanta DimensaoAusente.
+    Como as sketches da análise detalhada, o cubo pode ser atualizado bloco a
+    bloco (update), combinado (merge) e salvo em JSON (to_state/from_state).
+    """
+
+    # Incrementar quando o conteúdo do estado mudar (estados antigos são recalculados)
+    VERSAO = 3
+
+    AVALIACOES = SatisfacaoSketch.AVALIACOES
+    SCORES = [f'{coluna}_score' for coluna in AVALIACOES.values()]
+    COLUNAS = DIMENSOES_CUBO + SCORES + COLUNAS_DESAFIOS
+
+    def __init__(self):
+        # (faixa_etaria, escolaridade, renda, curso) -> [respostas, somas..., contagens..., desafios...]
+        self.celulas: Dict[Tuple[str, ...], List[float]] = {}
+        # Dimensões sem coluna no dataset (CSV sem a pergunta): ficam vazias nas células
+        self.ausentes: List[str] = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CuboAgregado':
+        cubo = cls()
+        cubo.update(df)
+        return cubo
+
+    def update(self, df: pd.DataFrame) -> 'CuboAgregado':
+        with etapa('cubo.update', len(df)) as e:
+            self._marcar_ausentes(d for d in DIMENSOES_CUBO if d not in df.columns)
+            # Colunas ausentes (dimensões ou notas) entram como vazias
+            base = df.reindex(columns=DIMENSOES_CUBO + self.SCORES)
+            if all(coluna in df.columns for coluna in COLUNAS_DESAFIOS):
+                desafios = df[COLUNAS_DESAFIOS]
+            elif 'desafios' in df.columns:  # dataset limpo antes da marcação dos desafios
+                desafios = marcar_desafios(df['desafios'])
+            else:
+                desafios = pd.DataFrame(0, index=df.index, columns=COLUNAS_DESAFIOS)
+            base = pd.concat([base, desafios], axis=1)
+
+            grupos = base.groupby(DIMENSOES_CUBO, observed=True, dropna=False, sort=False)
+            tamanhos = grupos.size()
+            # size/sum/count do mesmo groupby seguem a mesma ordem de grupos
+            somas = grupos[self.SCORES].sum()
+            contagens = grupos[self.SCORES].count()
+            citacoes = grupos[COLUNAS_DESAFIOS].sum()
+
+            for chave, total, soma, contagem, citacao in zip(
+                    tamanhos.index, tamanhos.to_numpy(), somas.to_numpy(dtype=float),
+                    contagens.to_numpy(), citacoes.to_numpy()):
+                if total == 0:
+                    continue
+                chave = tuple(_valor_dimensao(valor) for valor in chave)
+                valores = [int(total), *(float(s) for s in soma), *(int(c) for c in contagem),
+                           *(int(c) for c in citacao)]
+                self._acumular(chave, valores)
+            e.linhas_saida = len(self.celulas)
+        return self
+
+    def merge(self, other: 'CuboAgregado') -> 'CuboAgregado':
+        self._marcar_ausentes(other.ausentes)
+        for chave, valores in other.celulas.items():
+            self._acumular(chave, list(valores))
+        return self
+
+    def _marcar_ausentes(self, dimensoes):
+        ausentes = set(self.ausentes).union(dimensoes)
+        self.ausentes = [d for d in DIMENSOES_CUBO if d in ausentes]
+
+    def _acumular(self, chave: Tuple[str, ...], valores: List[float]):
+        atual = self.celulas.get(chave)
+        if atual is None:
+            self.celulas[chave] = valores
+        else:
+            for i, valor in enumerate(valores):
+                atual[i] += valor
+
+    def consultar(self, agrupar: Optional[List[str]] = None,
+                  filtros: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """
+        Agrega o cubo pelas dimensões em agrupar, considerando apenas as células
+        cujos valores estão em filtros ({dimensão: [valores aceitos]}).
+        Retorna o total de respostas e um grupo por combinação (do maior para o menor),
+        com o número de respostas, a média de cada avaliação e as respostas
+        que citam cada desafio.
+        """
+        agrupar = list(agrupar or [])
+        filtros = {dimensao: valores for dimensao, valores in (filtros or {}).items() if valores}
+        invalidas = [d for d in list(agrupar) + list(filtros) if d not in DIMENSOES_CUBO]
+        if invalidas:
+            raise ValueError(f"Dimensão não suportada: {', '.join(invalidas)} "
+                             f"(use {', '.join(DIMENSOES_CUBO)})")
+        ausentes = [d for d in dict.fromkeys(list(agrupar) + list(filtros)) if d in self.ausentes]
+        if ausentes:
+            raise DimensaoAusente(f"O dataset não tem a(s) coluna(s): {', '.join(ausentes)}")
+
+        posicoes = [DIMENSOES_CUBO.index(d) for d in agrupar]
+        condicoes = [(DIMENSOES_CUBO.index(d), set(valores)) for d, valores in filtros.items()]
+        grupos: Dict[Tuple[str, ...], List[float]] = {}
+        for chave, valores in self.celulas.items():
+            if any(chave[i] not in aceitos for i, aceitos in condicoes):
+                continue
+            grupo = tuple(chave[i] for i in posicoes)
+            atual = grupos.get(grupo)
+            if atual is None:
+                grupos[grupo] = list(valores)
+            else:
+                for i, valor in enumerate(valores):
+                    atual[i] += valor
+
+        resultado = [self._grupo(agrupar, grupo, valores) for grupo, valores in grupos.items()]
+        resultado.sort(key=lambda item: item['total'], reverse=True)
+        return {
+            'total': int(sum(item['total'] for item in resultado)),
+            'grupos': resultado
+        }
+
+    def _grupo(self, agrupar: List[str], grupo: Tuple[str, ...], valores: List[float]) -> Dict[str, Any]:
+        n = len(self.AVALIACOES)
+        medias = {}
+        for i, nome in enumerate(self.AVALIACOES):
+            soma, contagem = valores[1 + i], valores[1 + n + i]
+            medias[nome] = round(soma / contagem, 2) if contagem else None
+        desafios = {coluna[len(PREFIXO_DESAFIO):]: int(valor)
+                    for coluna, valor in zip(COLUNAS_DESAFIOS, valores[1 + 2 * n:])}
+        return {**dict(zip(agrupar, grupo)), 'total': int(valores[0]), 'medias_avaliacoes': medias,
+                'desafios': desafios}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'versao': self.VERSAO,
+            'dimensoes': DIMENSOES_CUBO,
+            'desafios': COLUNAS_DESAFIOS,
+            'ausentes': self.ausentes,
+            'celulas': [[list(chave), valores] for chave, valores in self.celulas.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'CuboAgregado':
+        if (state.get('versao') != cls.VERSAO or state.get('dimensoes') != DIMENSOES_CUBO
+                or state.get('desafios') != COLUNAS_DESAFIOS):
+            raise ValueError(f"Versão do estado do cubo incompatível: {state.get('versao')}")
+        cubo = cls()
+        cubo.celulas = {tuple(chave): list(valores) for chave, valores in state['celulas']}
+        cubo.ausentes = list(state['ausentes'])
+        return cubo
+
+
+# Cubos já carregados, pela versão do conteúdo do dataset (dataset_store.content_version)
+_cubos: 'OrderedDict[str, CuboAgregado]' = OrderedDict()
+_cubos_lock = threading.Lock()
+
+
+def get_dataset_cube(dataset_id: str) -> Optional[CuboAgregado]:
+    """
+    Cubo de um dataset armazenado (None se ele não existe). Calculado uma vez,
+    lendo do disco só as colunas do cubo, e salvo junto com o dataset; as
+    consultas seguintes usam a cópia em memória.
+    """
+    versao = dataset_store.content_version(dataset_id)
+    if versao is None:
+        return None
+
+    with _cubos_lock:
+        cubo = _cubos.get(versao)
+        if cubo is not None:
+            _cubos.move_to_end(versao)
+            return cubo
+
+    state = dataset_store.load_cube_state(dataset_id)
+    try:
+        cubo = CuboAgregado.from_state(state) if state is not None else None
+    except ValueError:
+        cubo = None  # estado de outra versão: recalcula
+    if cubo is None:
+        colunas = CuboAgregado.COLUNAS
+        layout = (dataset_store.get_meta(dataset_id) or {}).get('layout')
+        if layout is None or not set(COLUNAS_DESAFIOS) <= set(layout['colunas']):
+            colunas = colunas + ['desafios']  # as colunas desafio_* são geradas na hora
+        df = dataset_store.load_filtered(dataset_id, FiltroDataset(), colunas)
+        if df is None:
+            return None
+        cubo = CuboAgregado.from_frame(df)
+        dataset_store.save_cube_state(dataset_id, cubo.to_state(), versao)
+        logger.info(f"Cubo do dataset {dataset_id[:12]} calculado ({len(cubo.celulas)} células)")
+
+    with _cubos_lock:
+        _cubos[versao] = cubo
+        while len(_cubos) > MAX_CUBOS_EM_MEMORIA:
+            _cubos.popitem(last=False)
+    return cubo
@@ -1,192 +1,462 @@
 # backend/app/services/data_service.py
 import pandas as pd
-import io
+import numpy as np
 import logging
-from typing import Dict, Any, Tuple
+from typing import BinaryIO, Dict, Any, Optional, Tuple, Union
 import re
+from app.services.analysis_service import marcar_desafios
+from app.services.cache_service import CachedDataset, chave_dataset, content_hash, dataset_cache
+from app.services.dataset_store import dataset_store
+from app.services.ingestion_service import ler_csv, receber_upload
+from app.utils.profiling import etapa
+from app.utils.standardization_rules import MemoPadronizacao, RegrasPadronizacao, regras_padronizacao
 
 # Configura logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def process_csv_data(file_content: str) -> Dict[str, Any]:
+# Modos de padronização disponíveis em standardize_specific_columns:
+# 'vectorized' (padrão) aplica as regras com operações vetorizadas sobre os valores únicos;
+# 'apply' mantém a implementação original, linha a linha (útil para comparação/benchmark)
+STANDARDIZATION_MODES = ('vectorized', 'apply')
+
+# Esquema compacto do DataFrame limpo (ver compactar_tipos):
+# colunas categóricas com ordem fixa das categorias (valores inesperados vão ao final)...
+ORDEM_CATEGORIAS = {
+    'faixa_etaria': ['16 a 26 anos', '27 a 36 anos', '37 a 46 anos', '47 a 56 anos', 'Mais de 56 anos',
+                     'Outra', 'Nao informado'],
+    'renda_categoria': ['Menos de 1 SM', 'Ate 1 SM', '1-2 SM', 'Mais de 3 SM', 'Nao informado'],
+    'escolaridade_simplificada': ['Ensino Fundamental', 'Ensino Medio', 'Ensino Superior', 'Outra'],
+    'avaliacao_coordenador': ['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo'],
+    'avaliacao_assistente': ['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo'],
+    'avaliacao_aulas': ['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo']
+}
+# ... colunas categóricas com as categorias em ordem alfabética...
+COLUNAS_CATEGORICAS_LIVRES = ['curso', 'instituicao']
+# ... e notas de 0 a 5 em int8
+COLUNAS_SCORE = ['avaliacao_coordenador_score', 'avaliacao_assistente_score', 'avaliacao_aulas_score']
+
+def process_csv_data(file_content: Union[str, bytes, BinaryIO], filename: str = '',
+                     pasta_temp: Optional[str] = None) -> Dict[str, Any]:
     """
-    Processa o conteúdo CSV e retorna estatísticas básicas
+    Processa o conteúdo CSV e retorna estatísticas básicas.
+    O dataset limpo fica armazenado no servidor e pode ser consultado
+    depois apenas pelo dataset_id retornado.
     """
     try:
-        # Lê o CSV diretamente do conteúdo string
-        df = pd.read_csv(io.StringIO(file_content))
-        
-        logger.info(f"CSV lido com sucesso. Shape: {df.shape}")
-        
-        # Limpeza e padronização básica
-        df_clean, logs = clean_and_standardize_data(df)
-        
-        # Gera estatísticas básicas
-        stats = generate_basic_stats(df_clean)
+        dataset, cache_hit = load_clean_dataset(file_content, pasta_temp)
+        dataset_store.save(dataset, filename)
         
-        # Preview dos dados (apenas primeiras 5 linhas)
-        preview = df_clean.head().fillna('').to_dict(orient='records')
-        
-        return {
-            'shape': {'rows': df.shape[0], 'columns': df.shape[1]},
-            'columns': list(df_clean.columns),
-            'column_types': get_column_types(df_clean),
-            'basic_stats': stats,
-            'cleaning_logs': logs,
-            'preview': preview
-        }
+        result = build_dataset_summary(dataset)
+        result['cache'] = {'key': dataset.key, 'hit': cache_hit}
+        return result
         
     except Exception as e:
         logger.error(f"Erro ao processar CSV: {str(e)}")
         raise Exception(f'Erro ao processar CSV: {str(e)}')
 
-def clean_and_standardize_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
+def load_clean_dataset(file_content: Union[str, bytes, BinaryIO],
+                       pasta_temp: Optional[str] = None) -> Tuple[CachedDataset, bool]:
+    """
+    Retorna o dataset limpo correspondente ao conteúdo CSV.
+    Consulta primeiro o cache (pelo hash do conteúdo e a versão das regras de
+    padronização em uso, ver chave_dataset) e só faz a leitura e a limpeza
+    quando o arquivo ainda não foi processado com essas regras.
+    file_content: texto, bytes ou o stream do upload; o stream é lido direto
+    do buffer/arquivo do upload (ver ingestion_service.receber_upload), e
+    pasta_temp recebe a cópia temporária quando ela é necessária
+    Retorna: (dataset, cache_hit)
+    """
+    if isinstance(file_content, str):
+        file_content = file_content.encode('utf-8')
+    if isinstance(file_content, bytes):
+        return _load_clean_buffer(file_content, content_hash(file_content))
+    
+    with receber_upload(file_content, pasta_temp) as upload:
+        return _load_clean_buffer(upload.dados, upload.key)
+
+def _load_clean_buffer(dados, hash_conteudo: str) -> Tuple[CachedDataset, bool]:
+    # Regras recarregadas geram outra chave: o mesmo arquivo é limpo de novo
+    # (e armazenado com outro dataset_id) em vez de reaproveitar a limpeza antiga
+    regras = regras_padronizacao.atuais()
+    key = chave_dataset(hash_conteudo, regras.versao)
+    
+    def parse_and_clean() -> CachedDataset:
+        with etapa('leitura_csv', None) as e:
+            df = ler_csv(dados)
+            e.linhas_saida = len(df)
+        
+        logger.info(f"CSV lido com sucesso. Shape: {df.shape}")
+        
+        # Limpeza e padronização básica
+        df_clean, logs = clean_and_standardize_data(df, regras=regras)
+        return CachedDataset(key, df_clean, logs, df.shape)
+    
+    dataset, cache_hit = dataset_cache.get_or_load(key, parse_and_clean)
+    if cache_hit:
+        logger.info(f"Dataset {key[:12]} encontrado no cache")
+    return dataset, cache_hit
+
+def build_dataset_summary(dataset: CachedDataset) -> Dict[str, Any]:
+    """
+    Monta o resumo de um dataset limpo: formato, tipos, estatísticas e preview
+    """
+    df_clean = dataset.df_clean
+    
+    # Gera estatísticas básicas
+    stats = generate_basic_stats(df_clean)
+    
+    return {
+        'dataset_id': dataset.key,
+        'shape': {'rows': dataset.shape[0], 'columns': dataset.shape[1]},
+        'columns': list(df_clean.columns),
+        'column_types': get_column_types(df_clean),
+        'basic_stats': stats,
+        'cleaning_logs': list(dataset.logs),
+        'memory_usage': df_clean.attrs.get('memory_usage'),
+        'preview': build_preview(df_clean)
+    }
+
+def build_preview(df: pd.DataFrame, rows: int = 5) -> list:
+    """
+    Preview dos dados (apenas as primeiras linhas)
+    """
+    head = df.head(rows)
+    # Categóricas voltam a ser texto (o '' do fillna não é uma categoria válida)
+    categoricas = {col: object for col, dtype in head.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)}
+    return head.astype(categoricas).fillna('').to_dict(orient='records')
+
+def clean_and_standardize_data(df: pd.DataFrame, modo: str = 'vectorized',
+                               compactar: bool = True,
+                               regras: Optional[RegrasPadronizacao] = None) -> Tuple[pd.DataFrame, list]:
     """
     Primeira etapa de limpeza e padronização dos dados
+    compactar: converte o resultado para o esquema compacto (categorias e int8)
+    regras: regras de padronização a usar (padrão: as atuais, ver standardize_specific_columns)
     Retorna: DataFrame limpo e lista de logs das alterações
     """
     logs = []
-    df_clean = df.copy()
+    # Cópia rasa: o dropna abaixo já gera um DataFrame novo, então os dados
+    # do df original nunca são alterados e não precisam ser duplicados aqui
+    df_clean = df.copy(deep=False)
     
     # 1. Remove espaços extras dos nomes das colunas
-    original_columns = list(df_clean.columns)
-    df_clean.columns = df_clean.columns.str.strip()
+    with etapa('limpeza.nomes_colunas', len(df_clean)) as e:
+        original_columns = list(df_clean.columns)
+        df_clean.columns = df_clean.columns.str.strip()
+        e.linhas_saida = len(df_clean)
     
     if original_columns != list(df_clean.columns):
         logs.append("Espaços removidos dos nomes das colunas")
     
     # 2. Remove linhas completamente vazias
     initial_rows = len(df_clean)
-    df_clean = df_clean.dropna(how='all')
+    with etapa('limpeza.linhas_vazias', initial_rows) as e:
+        df_clean = df_clean.dropna(how='all')
+        e.linhas_saida = len(df_clean)
     if len(df_clean) < initial_rows:
         removed = initial_rows - len(df_clean)
         logs.append(f"Removidas {removed} linha(s) completamente vazia(s)")
     
     # 3. Preenche valores NaN com string vazia para colunas de texto
-    text_columns = df_clean.select_dtypes(include=['object']).columns
-    df_clean[text_columns] = df_clean[text_columns].fillna('')
+    with etapa('limpeza.valores_vazios', len(df_clean)) as e:
+        text_columns = df_clean.select_dtypes(include=['object']).columns
+        df_clean[text_columns] = df_clean[text_columns].fillna('')
+        e.linhas_saida = len(df_clean)
     logs.append("Valores vazios preenchidos com string vazia")
     
     # 4. Aplica padronizações específicas do projeto Mulheres Mil
-    df_clean = standardize_specific_columns(df_clean, logs)
+    df_clean = standardize_specific_columns(df_clean, logs, modo, copiar=False, regras=regras)
+    
+    # 5. Esquema compacto: categorias com ordem fixa e notas em int8
+    if compactar:
+        with etapa('limpeza.compactar_tipos', len(df_clean)) as e:
+            df_clean, memoria = compactar_tipos(df_clean)
+            e.linhas_saida = len(df_clean)
+        df_clean.attrs['memory_usage'] = memoria
+        logs.append(f"Tipos compactados: {memoria['bytes_antes']} -> {memoria['bytes_depois']} bytes em memória")
     
-    # 5. Log de colunas identificadas
+    # 6. Log de colunas identificadas
     logs.append(f"Colunas finais: {', '.join(df_clean.columns)}")
     
     return df_clean, logs
 
-def standardize_specific_columns(df: pd.DataFrame, logs: list) -> pd.DataFrame:
+def standardize_specific_columns(df: pd.DataFrame, logs: list, modo: str = 'vectorized',
+                                 copiar: bool = True,
+                                 regras: Optional[RegrasPadronizacao] = None) -> pd.DataFrame:
     """
     Padronizações ESPECÍFICAS para os dados do Mulheres Mil
+    As regras (nomes das colunas, faixas, renda, escolaridade, notas) vêm de
+    app/utils/standardization_rules.json, já compiladas (ver regras_padronizacao)
+    modo: 'vectorized' ou 'apply' (ver STANDARDIZATION_MODES); os dois geram o mesmo resultado
+    copiar: False altera o próprio df (usado quando ele já é uma cópia privada)
+    regras: regras já obtidas pelo chamador (padrão: regras_padronizacao.atuais())
     """
-    df_clean = df.copy()
+    if modo not in STANDARDIZATION_MODES:
+        raise ValueError(f"Modo de padronização inválido: {modo}")
+    vetorizado = modo == 'vectorized'
+    # A mesma versão das regras vale para o DataFrame inteiro, mesmo se o arquivo mudar no meio
+    if regras is None:
+        regras = regras_padronizacao.atuais()
     
-    # 1. Mapeamento de colunas (nomes em português claro)
-    column_mapping = {
-        'Carimbo de data/hora': 'timestamp',
-        'Nome do Curso:': 'curso',
-        'Instituição Ofertante:': 'instituicao', 
-        'Faixa etária predominante': 'faixa_etaria',
-        'Profissão:': 'profissao',
-        'Situação Socioeconômica: Renda per capta:': 'renda_original',
-        'Escolaridade:': 'escolaridade',
-        'Motivação para ingresso no curso:': 'motivacao',
-        'Desafios enfrentados:': 'desafios',
-        'Avaliação do Coordenador do Programa em Jardim:': 'avaliacao_coordenador',
-        'Avaliação da assistente pedagógica do programa em Jardim:': 'avaliacao_assistente',
-        'Avaliação das aulas do programa em Jardim:': 'avaliacao_aulas',
-        'O que o Curso de Assistente Administrativo contribuiu para a minha vida e formação?': 'contribuicao',
-        'Que outro Curso eu gostaria de fazer pelo Programa Mulheres Mil?': 'proximo_curso'
-    }
+    df_clean = df.copy() if copiar else df
     
+    # 1. Mapeamento de colunas (nomes em português claro)
     # Aplica o mapeamento apenas para colunas que existem no DataFrame
     existing_columns = {}
-    for old_name, new_name in column_mapping.items():
+    for old_name, new_name in regras.colunas.items():
         if old_name in df_clean.columns:
             existing_columns[old_name] = new_name
     
-    df_clean.rename(columns=existing_columns, inplace=True)
+    with etapa('padronizacao.renomear_colunas', len(df_clean)) as e:
+        df_clean.rename(columns=existing_columns, inplace=True)
+        e.linhas_saida = len(df_clean)
     logs.append("Colunas renomeadas para português simplificado")
+    # Registra a versão das regras: datasets já gravados mantêm a padronização com que foram limpos
+    logs.append(f"Regras de padronização: versão {regras.versao}")
     
     # 2. Limpeza do curso (remove emoji) - se a coluna existe
     if 'curso' in df_clean.columns:
-        df_clean['curso'] = df_clean['curso'].str.replace('💻', '').str.strip()
+        with etapa('padronizacao.curso', len(df_clean)) as e:
+            if vetorizado:
+                df_clean['curso'] = _aplicar_nos_unicos(
+                    df_clean['curso'], lambda u: _limpar_curso(u, regras), regras.memo('curso'))
+            else:
+                df_clean['curso'] = _limpar_curso(df_clean['curso'], regras)
+            e.linhas_saida = len(df_clean)
         logs.append("Emoji removido do nome do curso")
     
     # 3. Correção da FAIXA ETÁRIA (crítica!) - se a coluna existe
     if 'faixa_etaria' in df_clean.columns:
-        faixas_validas = ['16 a 26 anos', '27 a 36 anos', '37 a 46 anos', '47 a 56 anos', 'Mais de 56 anos']
-        
         def corrigir_faixa_etaria(valor):
             if pd.isna(valor) or valor == '':
-                return 'Nao informado'
+                return regras.faixa_vazio
             valor = str(valor).strip()
-            # Corrige o erro específico que encontramos
-            if 'Ensino fundamental completo' in valor:
-                return 'Nao informado'
-            if valor not in faixas_validas:
-                return 'Outra'
+            # Corrige o erro específico que encontramos ('Ensino fundamental completo' na faixa etária)
+            if any(termo in valor for termo in regras.faixa_termos_nao_informado):
+                return regras.faixa_vazio
+            if valor not in regras.faixas_validas:
+                return regras.faixa_outra
             return valor
         
-        df_clean['faixa_etaria'] = df_clean['faixa_etaria'].apply(corrigir_faixa_etaria)
+        with etapa('padronizacao.faixa_etaria', len(df_clean)) as e:
+            if vetorizado:
+                df_clean['faixa_etaria'] = _aplicar_nos_unicos(
+                    df_clean['faixa_etaria'], lambda u: _corrigir_faixa_etaria_vetorizado(u, regras),
+                    regras.memo('faixa_etaria'))
+            else:
+                df_clean['faixa_etaria'] = df_clean['faixa_etaria'].apply(corrigir_faixa_etaria)
+            e.linhas_saida = len(df_clean)
         logs.append("Faixa etária padronizada e corrigida")
     
     # 4. Categorização da RENDA (outro ponto crítico) - se a coluna existe
     if 'renda_original' in df_clean.columns:
         def categorizar_renda(valor):
             if pd.isna(valor) or valor == '':
-                return 'Nao informado'
+                return regras.renda_vazio
                 
             valor = str(valor).lower().strip()
             
-            if 'mais de 3' in valor:
-                return 'Mais de 3 SM'
-            elif '2' in valor:
-                return '1-2 SM'
-            elif '200' in valor:  # Captura "200,00"
-                return 'Ate 1 SM'
-            elif '1' in valor or 'um' in valor:
-                return 'Ate 1 SM'
-            elif 'menos' in valor:
-                return 'Menos de 1 SM'
-            else:
-                return 'Nao informado'
+            # Vale a primeira regra com algum trecho presente (ex.: '200' captura "200,00")
+            for termos, _, categoria in regras.renda_regras:
+                if any(termo in valor for termo in termos):
+                    return categoria
+            return regras.renda_padrao
         
-        df_clean['renda_categoria'] = df_clean['renda_original'].apply(categorizar_renda)
+        with etapa('padronizacao.renda', len(df_clean)) as e:
+            if vetorizado:
+                df_clean['renda_categoria'] = _aplicar_nos_unicos(
+                    df_clean['renda_original'], lambda u: _categorizar_renda_vetorizado(u, regras), regras.memo('renda'))
+            else:
+                df_clean['renda_categoria'] = df_clean['renda_original'].apply(categorizar_renda)
+            e.linhas_saida = len(df_clean)
         logs.append("Renda categorizada em faixas consistentes")
     
     # 5. Padronização de ESCOLARIDADE - se a coluna existe
     if 'escolaridade' in df_clean.columns:
-        escolaridade_map = {
-            'Ensino Fundamental: Anos Finais (6º ao 9º ano)': 'Ensino Fundamental',
-            'Ensino Médio Completo': 'Ensino Medio',
-            'Ensino Médio Incompleto': 'Ensino Medio',
-            'Ensino Superior Completo': 'Ensino Superior',
-            'Ensino Superior Incompleto': 'Ensino Superior'
-        }
-        
         def mapear_escolaridade(valor):
             valor = str(valor).strip()
-            return escolaridade_map.get(valor, 'Outra')
+            return regras.escolaridade_mapa.get(valor, regras.escolaridade_padrao)
         
-        df_clean['escolaridade_simplificada'] = df_clean['escolaridade'].apply(mapear_escolaridade)
+        with etapa('padronizacao.escolaridade', len(df_clean)) as e:
+            if vetorizado:
+                df_clean['escolaridade_simplificada'] = _aplicar_nos_unicos(
+                    df_clean['escolaridade'],
+                    lambda u: u.astype(str).str.strip().map(regras.escolaridade_mapa).fillna(regras.escolaridade_padrao),
+                    regras.memo('escolaridade'))
+            else:
+                df_clean['escolaridade_simplificada'] = df_clean['escolaridade'].apply(mapear_escolaridade)
+            e.linhas_saida = len(df_clean)
         logs.append("Escolaridade simplificada")
     
     # 6. Avaliações numéricas - para cada coluna de avaliação que existir
-    avaliacao_map = {'Excelente': 5, 'Bom': 4, 'Regular': 3, 'Ruim': 2, 'Péssimo': 1}
-    
-    for col in ['avaliacao_coordenador', 'avaliacao_assistente', 'avaliacao_aulas']:
-        if col in df_clean.columns:
-            df_clean[f'{col}_score'] = df_clean[col].map(avaliacao_map).fillna(0)
+    with etapa('padronizacao.avaliacoes', len(df_clean)) as e:
+        for col in ['avaliacao_coordenador', 'avaliacao_assistente', 'avaliacao_aulas']:
+            if col in df_clean.columns:
+                df_clean[f'{col}_score'] = df_clean[col].map(regras.notas_avaliacao).fillna(0)
+        e.linhas_saida = len(df_clean)
     
     logs.append("Avaliações convertidas para escala numérica")
     
+    # 7. Marcação dos DESAFIOS: uma coluna 0/1 por categoria citada - se a coluna existe
+    if 'desafios' in df_clean.columns:
+        with etapa('padronizacao.desafios', len(df_clean)) as e:
+            marcacoes = marcar_desafios(df_clean['desafios'], regras)
+            for coluna in marcacoes.columns:
+                df_clean[coluna] = marcacoes[coluna]
+            e.linhas_saida = len(df_clean)
+        logs.append("Desafios marcados por categoria (colunas desafio_*)")
+    
     return df_clean
 
+def compactar_tipos(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Converte as colunas padronizadas para tipos compactos:
+    Categorical (ver ORDEM_CATEGORIAS e COLUNAS_CATEGORICAS_LIVRES) e int8 para as notas.
+    Retorna: DataFrame convertido e relatório de memória (bytes antes/depois)
+    """
+    bytes_antes = int(df.memory_usage(deep=True).sum())
+    conversoes = {}
+    
+    for col, ordem in ORDEM_CATEGORIAS.items():
+        if col in df.columns:
+            extras = set(df[col].dropna().unique()) - set(ordem)
+            conversoes[col] = pd.CategoricalDtype(ordem + sorted(extras, key=str))
+    
+    for col in COLUNAS_CATEGORICAS_LIVRES:
+        if col in df.columns:
+            conversoes[col] = pd.CategoricalDtype(sorted(df[col].dropna().unique(), key=str))
+    
+    for col in COLUNAS_SCORE:
+        if col in df.columns:
+            conversoes[col] = 'int8'
+    
+    df_compacto = df.astype(conversoes)
+    bytes_depois = int(df_compacto.memory_usage(deep=True).sum())
+    
+    return df_compacto, {
+        'bytes_antes': bytes_antes,
+        'bytes_depois': bytes_depois,
+        'reducao_percentual': round(100 * (1 - bytes_depois / bytes_antes), 1) if bytes_antes else 0.0
+    }
+
+# --- Versões vetorizadas das regras de padronização ---
+# Cada função recebe a Series com os valores ÚNICOS da coluna e devolve
+# o valor padronizado de cada um, seguindo exatamente as regras linha a linha
+# de standardize_specific_columns.
+
+def _aplicar_nos_unicos(series: pd.Series, regra, memo: Optional[MemoPadronizacao] = None) -> pd.Series:
+    """
+    Aplica `regra` apenas aos valores distintos da coluna e expande o resultado
+    de volta para todas as linhas (respostas de formulário têm poucos valores distintos).
+    memo: valores já padronizados (em uploads anteriores) não passam pela regra de novo
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    if memo is None:
+        padronizados = np.asarray(regra(pd.Series(uniques, dtype=object)), dtype=object)
+    else:
+        padronizados, faltando = memo.consultar(uniques)
+        if faltando:
+            novos = uniques.take(faltando)
+            resultado = np.asarray(regra(pd.Series(novos, dtype=object)), dtype=object)
+            padronizados[faltando] = resultado
+            memo.guardar(novos, resultado)
+    return pd.Series(padronizados.take(codes), index=series.index, dtype=object)
+
+def _limpar_curso(valores: pd.Series, regras: RegrasPadronizacao) -> pd.Series:
+    if regras.curso_remover is None:
+        return valores.str.strip()
+    return valores.str.replace(regras.curso_remover, '', regex=True).str.strip()
+
+def _corrigir_faixa_etaria_vetorizado(valores: pd.Series, regras: RegrasPadronizacao) -> pd.Series:
+    texto = valores.astype(str).str.strip()
+    condicoes = [valores.isna() | (valores == '')]
+    escolhas = [regras.faixa_vazio]
+    if regras.faixa_nao_informado is not None:
+        condicoes.append(texto.str.contains(regras.faixa_nao_informado))
+        escolhas.append(regras.faixa_vazio)
+    condicoes.append(~texto.isin(regras.faixas_validas))
+    escolhas.append(regras.faixa_outra)
+    return np.select(condicoes, escolhas, default=texto.to_numpy(dtype=object))
+
+def _categorizar_renda_vetorizado(valores: pd.Series, regras: RegrasPadronizacao) -> pd.Series:
+    texto = valores.astype(str).str.lower().str.strip()
+    # A ordem das condições reproduz a ordem das regras em categorizar_renda
+    condicoes = [valores.isna() | (valores == '')]
+    escolhas = [regras.renda_vazio]
+    for _, padrao, categoria in regras.renda_regras:
+        condicoes.append(texto.str.contains(padrao))
+        escolhas.append(categoria)
+    return np.select(condicoes, escolhas, default=regras.renda_padrao)
+
 def generate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
     """
     Gera estatísticas básicas do DataFrame
+    Cada coluna é percorrida uma única vez: um value_counts por coluna de texto
+    (de onde saem nulos, unique_values e top_values) e um df.agg para todo o
+    bloco de colunas numéricas. O resultado é o mesmo de generate_basic_stats_por_coluna.
+    """
+    stats = {}
+    
+    with etapa('estatisticas_basicas', len(df)) as e:
+        total = len(df)
+        colunas_texto = {col for col in df.columns if _coluna_de_texto(df[col])}
+        colunas_numericas = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col].dtype)]
+        numericas_set = set(colunas_numericas)
+        outras = [col for col in df.columns if col not in colunas_texto]
+        
+        # Demais colunas: contagem de não nulos em bloco
+        non_null = df[outras].count() if outras else pd.Series(dtype='int64')
+        
+        # Colunas numéricas: min/máx/média/mediana e únicos de uma vez
+        if colunas_numericas:
+            numericas = df[colunas_numericas].agg(['min', 'max', 'mean', 'median'])
+            unicos = df[colunas_numericas].nunique()
+        
+        for column in df.columns:
+            series = df[column]
+            col_stats = {'data_type': str(series.dtype)}
+            
+            if column in colunas_texto:
+                # value_counts com os nulos: uma passada para todas as estatísticas
+                counts = series.value_counts(dropna=False)
+                nulos = counts.index.isna()
+                null_count = int(counts[nulos].sum())
+                counts = counts[~nulos & (counts.to_numpy() > 0)]
+                col_stats.update({
+                    'non_null_count': total - null_count,
+                    'null_count': null_count,
+                    'unique_values': len(counts),
+                    'top_values': {str(k): int(v) for k, v in counts.head(5).items()}
+                })
+            else:
+                col_stats.update({
+                    'non_null_count': int(non_null[column]),
+                    'null_count': total - int(non_null[column]),
+                    'unique_values': int(unicos[column]) if column in numericas_set else int(series.nunique())
+                })
+                if column in numericas_set:
+                    col_stats.update({
+                        estatistica: float(numericas.at[estatistica, column])
+                        for estatistica in ('min', 'max', 'mean', 'median')
+                    })
+            
+            stats[column] = col_stats
+        e.linhas_saida = len(df)
+    
+    return stats
+
+def _coluna_de_texto(series: pd.Series) -> bool:
+    """Mesmo critério de generate_basic_stats_por_coluna, sem percorrer os valores."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.api.types.is_string_dtype(dtype.categories)
+    return pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(dtype)
+
+def generate_basic_stats_por_coluna(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Implementação original de generate_basic_stats, coluna a coluna (cada
+    coluna é percorrida várias vezes). Mantida para comparação/benchmark.
     """
     stats = {}
     
@@ -210,7 +480,8 @@ def generate_basic_stats(df: pd.DataFrame) -> Dict[str, Any]:
         
         # Para colunas de texto/categóricas
         if pd.api.types.is_string_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
-            top_values = df[column].value_counts().head(5).to_dict()
+            counts = df[column].value_counts()
+            top_values = counts[counts > 0].head(5).to_dict()
             col_stats['top_values'] = {str(k): int(v) for k, v in top_values.items()}
         
         stats[column] = col_stats
@@ -0,0 +1,642 @@
+# backend/app/services/dataset_store.py
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.cache_service import CachedDataset, dataset_cache, pyarrow_disponivel
+from app.services.filter_service import FiltroDataset, converter_timestamp
+from app.utils.processos import trava_arquivo
+
+logger = logging.getLogger(__name__)
+
+# O dataset_id combina o hash SHA-256 do CSV enviado e a versão das regras de
+# padronização usadas na limpeza (ver cache_service.chave_dataset)
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Colunas usadas para particionar o Parquet (uma pasta por instituição e curso)
+COLUNAS_PARTICAO = ['instituicao', 'curso']
+# Acima deste número de partições em um bloco o dataset é gravado sem particionar
+# (evita milhares de arquivos pequenos quando curso/instituição são texto livre)
+LIMITE_PARTICOES = 256
+# Colunas auxiliares gravadas só no Parquet: ordem original das linhas e timestamp
+# convertido (permite filtrar intervalos de datas lendo só os row groups necessários)
+COLUNA_ORDEM = '__linha'
+COLUNA_TIMESTAMP = '__timestamp'
+
+
+class DatasetStore:
+    """
+    Armazena no servidor os datasets já limpos, em formato colunar (Parquet),
+    para que o dashboard possa pedir estatísticas, preview e análise apenas
+    pelo dataset_id, sem reenviar nem reprocessar o CSV.
+
+    Estrutura em disco:
+        <root>/<dataset_id>/data/instituicao=<...>/curso=<...>/*.parquet
+                                           DataFrame limpo, particionado
+        <root>/<dataset_id>/meta.json      logs de limpeza, formato original, data de envio,
+                                           colunas, categorias e partições usadas
+    Datasets gravados antes do particionamento (data.parquet) continuam legíveis.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._lock = threading.Lock()
+        self.root = None
+        self.use_parquet = True
+        if root:
+            self.configure(root)
+
+    def configure(self, root: str):
+        """Define a pasta do repositório (chamado em create_app)."""
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        # GravacaoParquet usa pyarrow.dataset: o fastparquet não basta
+        self.use_parquet = pyarrow_disponivel()
+        if not self.use_parquet:
+            logger.warning("pyarrow não instalado: datasets serão gravados em pickle")
+
+    @staticmethod
+    def is_valid_id(dataset_id: str) -> bool:
+        return bool(DATASET_ID_PATTERN.match(dataset_id or ''))
+
+    def _dir(self, dataset_id: str) -> str:
+        if self.root is None:
+            raise RuntimeError('DatasetStore não configurado')
+        if not self.is_valid_id(dataset_id):
+            raise ValueError(f'dataset_id inválido: {dataset_id}')
+        return os.path.join(self.root, dataset_id)
+
+    def _data_path(self, dataset_id: str) -> str:
+        filename = 'data' if self.use_parquet else 'data.pkl'
+        return os.path.join(self._dir(dataset_id), filename)
+
+    def exists(self, dataset_id: str) -> bool:
+        return self.is_valid_id(dataset_id) and os.path.exists(os.path.join(self._dir(dataset_id), 'meta.json'))
+
+    # --- Escrita ---
+
+    def save(self, dataset: CachedDataset, filename: str = '') -> str:
+        """
+        Persiste um dataset limpo. Idempotente: o mesmo conteúdo, limpo com as
+        mesmas regras, gera o mesmo dataset_id e não é gravado novamente.
+        Retorna: dataset_id
+        """
+        dataset_id = dataset.key
+        if self.exists(dataset_id):
+            return dataset_id
+
+        if self.use_parquet:
+            staging = self.new_staging_dir()
+            try:
+                gravacao = GravacaoParquet(staging)
+                gravacao.escrever(dataset.df_clean)
+            except Exception:
+                self.discard_staged(staging)
+                raise
+            return self.commit_staged(staging, dataset_id, filename, dataset.shape,
+                                      len(dataset.df_clean), dataset.logs, gravacao.layout())
+
+        with self._lock:
+            if self.exists(dataset_id):
+                return dataset_id
+
+            folder = self._dir(dataset_id)
+            os.makedirs(folder, exist_ok=True)
+            dataset.df_clean.to_pickle(self._data_path(dataset_id))
+
+            # meta.json é gravado por último: sua existência marca o dataset como completo
+            self._write_meta(folder, dataset_id, filename, dataset.shape, len(dataset.df_clean), dataset.logs)
+
+        logger.info(f"Dataset {dataset_id[:12]} armazenado ({len(dataset.df_clean)} linhas)")
+        return dataset_id
+
+    def new_staging_dir(self) -> str:
+        """
+        Cria uma pasta temporária para gravar um dataset aos poucos
+        (ingestão em blocos), antes de o dataset_id ser conhecido.
+        O Parquet deve ser gravado com GravacaoParquet(<pasta>).
+        """
+        if self.root is None:
+            raise RuntimeError('DatasetStore não configurado')
+        staging = os.path.join(self.root, f'.staging-{uuid.uuid4().hex}')
+        os.makedirs(staging)
+        return staging
+
+    def commit_staged(self, staging: str, dataset_id: str, filename: str,
+                      shape, rows_clean: int, logs: list, layout: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Publica um dataset gravado em new_staging_dir() sob o seu dataset_id.
+        layout: GravacaoParquet.layout() (colunas, categorias e partições)
+        """
+        with self._lock:
+            if self.exists(dataset_id):
+                shutil.rmtree(staging, ignore_errors=True)
+                return dataset_id
+
+            folder = self._dir(dataset_id)
+            shutil.rmtree(folder, ignore_errors=True)  # restos de uma gravação incompleta
+            self._write_meta(staging, dataset_id, filename, shape, rows_clean, logs, layout)
+            os.rename(staging, folder)
+
+        logger.info(f"Dataset {dataset_id[:12]} armazenado ({rows_clean} linhas)")
+        return dataset_id
+
+    @staticmethod
+    def discard_staged(staging: str):
+        shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _write_meta(folder: str, dataset_id: str, filename: str, shape, rows_clean: int, logs: list,
+                    layout: Optional[Dict[str, Any]] = None):
+        meta = {
+            'dataset_id': dataset_id,
+            'filename': filename,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'shape': list(shape),
+            'rows_clean': int(rows_clean),
+            'logs': logs
+        }
+        if layout is not None:
+            meta['layout'] = layout
+        DatasetStore._save_meta(folder, meta)
+
+    @staticmethod
+    def _save_meta(folder: str, meta: Dict[str, Any]):
+        path = os.path.join(folder, 'meta.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def bloquear_escrita(self, dataset_id: str):
+        """
+        Trava de escrita do dataset, válida entre os processos (workers) do
+        servidor: um acréscimo inteiro (leitura, deduplicação, gravação e meta)
+        é feito com ela adquirida.
+        """
+        return trava_arquivo(os.path.join(self._dir(dataset_id), 'escrita.lock'))
+
+    def append(self, dataset_id: str, df_novo: pd.DataFrame, linhas_recebidas: int) -> Dict[str, Any]:
+        """
+        Acrescenta respostas já limpas a um dataset em Parquet particionado.
+        Só as linhas novas são gravadas (em arquivos novos, nas partições delas);
+        o meta.json é atualizado por último e o novo updated_at muda a versão do
+        conteúdo (ETags, cubos em memória). Retorna o meta atualizado.
+        Deve ser chamado com bloquear_escrita(dataset_id) adquirida.
+        """
+        with self._lock:
+            meta = self.get_meta(dataset_id)
+            if meta is None:
+                raise KeyError(dataset_id)
+            if 'layout' not in meta:
+                raise ValueError('Dataset gravado em formato antigo: envie o arquivo completo novamente')
+
+            folder = self._dir(dataset_id)
+            dados = self._data_path(dataset_id)
+            # Fora de data/ (e com prefixo '_'): arquivos incompletos nunca são lidos
+            staging = os.path.join(folder, f'_anexo-{uuid.uuid4().hex}')
+            try:
+                gravacao = GravacaoParquet.continuar(staging, meta['layout'], dados)
+                gravacao.escrever(df_novo)
+                _mover_arquivos(gravacao.pasta, dados)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+            meta['layout'] = gravacao.layout()
+            meta['shape'][0] += int(linhas_recebidas)
+            meta['rows_clean'] += len(df_novo)
+            meta['updated_at'] = datetime.now().isoformat(timespec='microseconds')
+            self._save_meta(folder, meta)
+
+        # A cópia em memória não tem as linhas novas
+        dataset_cache.discard(dataset_id)
+        logger.info(f"Dataset {dataset_id[:12]}: {len(df_novo)} resposta(s) acrescentada(s)")
+        return meta
+
+    # --- Leitura ---
+
+    def get_meta(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """Metadados do dataset, ou None se ele não existe."""
+        if not self.exists(dataset_id):
+            return None
+        with open(os.path.join(self._dir(dataset_id), 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def ultimo_timestamp(self, dataset_id: str) -> Optional[pd.Timestamp]:
+        """Timestamp da resposta mais recente do dataset (None se não há timestamps válidos)."""
+        meta = self.get_meta(dataset_id)
+        if meta is None:
+            return None
+        layout = meta.get('layout')
+        if layout is not None and 'ultimo_timestamp' in layout:
+            return pd.Timestamp(layout['ultimo_timestamp']) if layout['ultimo_timestamp'] else None
+        if layout is not None:
+            return _ultimo_timestamp_gravado(self._data_path(dataset_id))
+        dataset = self.load(dataset_id)
+        if 'timestamp' not in dataset.df_clean.columns:
+            return None
+        maximo = converter_timestamp(dataset.df_clean['timestamp']).max()
+        return None if pd.isna(maximo) else maximo
+
+    def content_version(self, dataset_id: str) -> Optional[str]:
+        """
+        Identifica a versão do conteúdo armazenado (usada nas ETags das rotas),
+        ou None se o dataset não existe.
+        """
+        meta = self.get_meta(dataset_id)
+        if meta is None:
+            return None
+        return self._versao(dataset_id, meta)
+
+    def versao_original(self, dataset_id: str) -> Optional[str]:
+        """
+        content_version enquanto o conteúdo armazenado é exatamente o do CSV de hash
+        dataset_id; None se o dataset não existe ou já recebeu respostas (append).
+        """
+        meta = self.get_meta(dataset_id)
+        if meta is None or 'updated_at' in meta:
+            return None
+        return self._versao(dataset_id, meta)
+
+    @staticmethod
+    def _versao(dataset_id: str, meta: Dict[str, Any]) -> str:
+        return f"{dataset_id}:{meta.get('updated_at', meta['created_at'])}"
+
+    def _versao_em_cache(self, dataset_id: str, meta: Dict[str, Any]) -> Optional[str]:
+        """
+        Versão esperada da cópia do dataset no cache em memória (ver CachedDataset.versao):
+        None enquanto o conteúdo é o do CSV original, a versão do conteúdo depois de um append.
+        """
+        return self._versao(dataset_id, meta) if 'updated_at' in meta else None
+
+    # Os estados salvos guardam a versão do conteúdo de onde foram calculados
+    # (versao_conteudo = content_version); um estado de outra versão é ignorado,
+    # ex.: calculado por outro worker a partir das linhas anteriores a um append
+
+    def save_analysis_state(self, dataset_id: str, state: Dict[str, Any], versao_conteudo: str):
+        """
+        Grava o estado dos agregados da análise detalhada (DetailedAnalysisSketch),
+        para que a análise não precise ser recalculada a partir das linhas.
+        """
+        self._save_state(dataset_id, 'analysis_state.json', state, versao_conteudo)
+
+    def load_analysis_state(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """Estado salvo por save_analysis_state para o conteúdo atual, ou None."""
+        return self._load_state(dataset_id, 'analysis_state.json')
+
+    def save_cube_state(self, dataset_id: str, state: Dict[str, Any], versao_conteudo: str):
+        """Grava o cubo de agregados do crosstab (CuboAgregado) junto com o dataset."""
+        self._save_state(dataset_id, 'cube_state.json', state, versao_conteudo)
+
+    def load_cube_state(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """Estado salvo por save_cube_state para o conteúdo atual, ou None."""
+        return self._load_state(dataset_id, 'cube_state.json')
+
+    def _save_state(self, dataset_id: str, filename: str, state: Dict[str, Any], versao_conteudo: str):
+        path = os.path.join(self._dir(dataset_id), filename)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({**state, 'versao_conteudo': versao_conteudo}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _load_state(self, dataset_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        versao = self.content_version(dataset_id)
+        if versao is None:
+            return None
+        path = os.path.join(self._dir(dataset_id), filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        return state if state.pop('versao_conteudo', None) == versao else None
+
+    def load(self, dataset_id: str) -> Optional[CachedDataset]:
+        """
+        Carrega um dataset armazenado. Usa o cache em memória quando possível;
+        caso contrário lê o Parquet (sem nenhum parsing de CSV ou limpeza).
+        Uma cópia em memória de outra versão do conteúdo (ex.: anterior a um
+        append feito por outro worker) é descartada e o dataset é relido.
+        """
+        meta = self.get_meta(dataset_id)
+        if meta is None:
+            return None
+        versao = self._versao_em_cache(dataset_id, meta)
+        dataset = dataset_cache.get(dataset_id, versao)
+        if dataset is not None:
+            return dataset
+
+        df_clean = self._ler_dados(dataset_id, meta)
+
+        dataset = CachedDataset(dataset_id, df_clean, meta['logs'], tuple(meta['shape']), versao)
+        dataset_cache.put(dataset)
+        return dataset
+
+    def load_filtered(self, dataset_id: str, filtro: FiltroDataset,
+                      colunas: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Linhas do dataset que satisfazem o filtro, apenas com as colunas pedidas.
+        Com o dataset em Parquet particionado, o filtro é aplicado na leitura:
+        só as partições (instituição/curso), os row groups (intervalo de datas)
+        e as colunas necessárias são lidos. Se o dataset está no cache em
+        memória, o filtro é aplicado ao DataFrame.
+        """
+        meta = self.get_meta(dataset_id)
+        if meta is None:
+            return None
+        dataset = dataset_cache.get(dataset_id, self._versao_em_cache(dataset_id, meta))
+        if dataset is None and 'layout' not in meta:
+            dataset = self.load(dataset_id)  # formato antigo: lê tudo
+        if dataset is not None:
+            df = filtro.aplicar(dataset.df_clean)
+            return df[[c for c in colunas if c in df.columns]] if colunas is not None else df
+        return self._ler_dados(dataset_id, meta, filtro, colunas)
+
+    def _ler_dados(self, dataset_id: str, meta: Dict[str, Any], filtro: Optional[FiltroDataset] = None,
+                   colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        data_path = self._data_path(dataset_id)
+        layout = meta.get('layout')
+        if not self.use_parquet:
+            return pd.read_pickle(data_path)
+        if layout is None:
+            return pd.read_parquet(os.path.join(self._dir(dataset_id), 'data.parquet'))
+        return ler_parquet_particionado(data_path, layout, filtro, colunas)
+
+
+class GravacaoParquet:
+    """
+    Grava um DataFrame limpo, de uma vez ou bloco a bloco, como Parquet
+    particionado por instituição/curso (hive: instituicao=<...>/curso=<...>),
+    ou sem partições quando elas passam de LIMITE_PARTICOES.
+    Cada linha leva também a sua posição original e o timestamp convertido.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = os.path.join(pasta, 'data')
+        # Prefixo dos nomes dos arquivos gravados
+        self.prefixo = 'parte'
+        self.blocos = 0
+        self.linhas = 0
+        self.colunas: Optional[List[str]] = None
+        self.categorias: Dict[str, list] = {}
+        self.particoes: Optional[List[str]] = None
+        # Partições já gravadas e colunas de partição mantidas como texto após desfazê-las
+        self._valores_particoes: set = set()
+        self._colunas_texto: List[str] = []
+        self.ultimo_timestamp: Optional[pd.Timestamp] = None
+        self._schema = None
+        # Schema dos arquivos já gravados, quando a gravação continua um dataset existente
+        self._schema_arquivos = None
+
+    @classmethod
+    def continuar(cls, pasta: str, layout: Dict[str, Any], dados: str) -> 'GravacaoParquet':
+        """
+        Gravação de mais blocos de um dataset já gravado em `dados` (a pasta
+        data/ dele): mesmas colunas, partições e tipos dos arquivos existentes,
+        com a numeração das linhas e dos arquivos continuando a partir deles.
+        """
+        import pyarrow.dataset as ds
+
+        gravacao = cls(pasta)
+        # Nomes únicos: os arquivos de um acréscimo nunca substituem os de outro
+        gravacao.prefixo = f'anexo-{uuid.uuid4().hex}'
+        gravacao.colunas = list(layout['colunas'])
+        gravacao.particoes = list(layout['particoes'])
+        gravacao.categorias = {coluna: list(valores) for coluna, valores in layout['categorias'].items()}
+
+        existente = ds.dataset(dados, format='parquet')
+        gravacao._schema_arquivos = existente.schema
+        # Datasets gravados antes de o layout registrar a contagem: calcula pelos arquivos
+        gravacao.blocos = layout['blocos'] if 'blocos' in layout else len(existente.files)
+        gravacao.linhas = layout['linhas'] if 'linhas' in layout else existente.count_rows()
+        if 'ultimo_timestamp' in layout:
+            ultimo = layout['ultimo_timestamp']
+            gravacao.ultimo_timestamp = pd.Timestamp(ultimo) if ultimo else None
+        else:
+            gravacao.ultimo_timestamp = _ultimo_timestamp_gravado(dados)
+        return gravacao
+
+    def escrever(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if self.colunas is None:
+            self.colunas = list(df.columns)
+            self.particoes = [c for c in COLUNAS_PARTICAO if c in df.columns] if len(df) else []
+        if self.particoes and self._schema_arquivos is None:
+            # Particiona enquanto o número de partições for pequeno; se um bloco
+            # passa do limite, os blocos já gravados são regravados sem partições
+            valores = df[self.particoes].drop_duplicates().astype(str)
+            self._valores_particoes.update(valores.itertuples(index=False, name=None))
+            if len(self._valores_particoes) > LIMITE_PARTICOES:
+                self._desfazer_particoes()
+
+        for coluna in df.columns:
+            if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                conhecidas = self.categorias.setdefault(coluna, [])
+                novas = set(df[coluna].cat.categories) - set(conhecidas)
+                conhecidas.extend(c for c in df[coluna].cat.categories if c in novas)
+
+        # Os blocos seguintes seguem o schema do primeiro (como no ParquetWriter);
+        # um bloco com tipos que não cabem nele promove o schema (ver _conformar)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            self._schema = table.schema
+        elif self._schema_arquivos is None:
+            table = self._conformar(table)
+        for coluna in self.particoes + self._colunas_texto:
+            indice = table.schema.get_field_index(coluna)
+            table = table.set_column(indice, coluna, table[coluna].cast(pa.string()).fill_null(''))
+        table = table.append_column(COLUNA_ORDEM, pa.array(np.arange(self.linhas, self.linhas + len(df), dtype=np.int64)))
+        timestamps = converter_timestamp(df['timestamp']) if 'timestamp' in df.columns else \
+            pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        table = table.append_column(COLUNA_TIMESTAMP, pa.array(timestamps.to_numpy(dtype='datetime64[ns]'),
+                                                                type=pa.timestamp('ns')))
+        maximo = timestamps.max()
+        if pd.notna(maximo) and (self.ultimo_timestamp is None or maximo > self.ultimo_timestamp):
+            self.ultimo_timestamp = maximo
+        if self._schema_arquivos is not None:
+            # Tipos dos arquivos existentes (ex.: coluna vazia neste bloco, lida como nula)
+            campos = [self._schema_arquivos.field(nome) if self._schema_arquivos.get_field_index(nome) >= 0
+                      else table.schema.field(nome) for nome in table.column_names]
+            table = table.cast(pa.schema(campos))
+
+        ds.write_dataset(
+            table, self.pasta, format='parquet',
+            partitioning=self._particionamento(),
+            basename_template=f'{self.prefixo}-{self.blocos}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            max_partitions=max(1024, LIMITE_PARTICOES)
+        )
+        self.blocos += 1
+        self.linhas += len(df)
+
+    def _particionamento(self):
+        return _particionamento(self.particoes)
+
+    def _conformar(self, table):
+        """
+        Converte o bloco para o schema dos blocos anteriores. Colunas que não
+        podem ser convertidas sem perda (ex.: decimais em uma coluna até então
+        inteira, ou texto em uma numérica) passam a um tipo comum aos dois
+        (ver _tipo_comum) e os blocos já gravados são regravados com ele.
+        """
+        import pyarrow as pa
+
+        promovidos = {}
+        for campo in self._schema:
+            tipo = table.schema.field(campo.name).type
+            if tipo == campo.type:
+                continue
+            try:
+                table[campo.name].cast(campo.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                promovidos[campo.name] = _tipo_comum(campo.type, tipo)
+        if promovidos:
+            self._promover_schema(promovidos)
+        return table.cast(self._schema)
+
+    def _promover_schema(self, promovidos: Dict[str, Any]):
+        """Troca os tipos das colunas `promovidos` no schema e nos blocos já gravados."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        logger.info(f"Tipos das colunas promovidos no Parquet: "
+                    f"{', '.join(f'{nome} -> {tipo}' for nome, tipo in promovidos.items())}")
+        for nome, tipo in promovidos.items():
+            self._schema = self._schema.set(self._schema.get_field_index(nome), pa.field(nome, tipo))
+        # Colunas de partição (e as desfeitas) já são gravadas como texto
+        promovidos = {nome: tipo for nome, tipo in promovidos.items()
+                      if nome not in self.particoes + self._colunas_texto}
+        if not promovidos or not os.path.isdir(self.pasta):
+            return
+        gravados = ds.dataset(self.pasta, format='parquet', partitioning=self._particionamento())
+        schema = pa.schema([pa.field(campo.name, promovidos.get(campo.name, campo.type)) for campo in gravados.schema],
+                           metadata=gravados.schema.metadata)
+        # Lote a lote: os blocos gravados não são carregados inteiros na memória
+        lotes = (lote.cast(schema) for lote in gravados.to_batches())
+        destino = f'{self.pasta}.{uuid.uuid4().hex}'
+        ds.write_dataset(lotes, destino, schema=schema, format='parquet',
+                         partitioning=self._particionamento(),
+                         basename_template=f'{self.prefixo}-promovida-{uuid.uuid4().hex}-{{i}}.parquet',
+                         max_partitions=max(1024, LIMITE_PARTICOES))
+        shutil.rmtree(self.pasta)
+        os.replace(destino, self.pasta)
+
+    def _desfazer_particoes(self):
+        """Regrava os blocos já gravados em uma pasta só, sem partições."""
+        import pyarrow.dataset as ds
+
+        logger.info(f"Mais de {LIMITE_PARTICOES} partições: dataset gravado sem particionamento")
+        self._colunas_texto, self.particoes = self.particoes, []
+        self._valores_particoes = set()
+        if not os.path.isdir(self.pasta):
+            return
+        gravados = ds.dataset(self.pasta, format='parquet', partitioning=_particionamento(self._colunas_texto))
+        # Mesma ordem de colunas dos blocos seguintes (as de partição voltam ao seu lugar)
+        colunas = [c for c in self._schema.names if c in gravados.schema.names] + [COLUNA_ORDEM, COLUNA_TIMESTAMP]
+        destino = f'{self.pasta}.{uuid.uuid4().hex}'
+        ds.write_dataset(gravados.scanner(columns=colunas), destino, format='parquet',
+                         basename_template='parte-regravada-{i}.parquet')
+        shutil.rmtree(self.pasta)
+        os.replace(destino, self.pasta)
+
+    def layout(self) -> Dict[str, Any]:
+        return {
+            'formato': 'parquet_particionado',
+            'particoes': self.particoes or [],
+            'colunas': self.colunas or [],
+            'categorias': self.categorias,
+            'blocos': self.blocos,
+            'linhas': self.linhas,
+            'ultimo_timestamp': self.ultimo_timestamp.isoformat() if self.ultimo_timestamp is not None else None
+        }
+
+
+def _tipo_comum(a, b):
+    """
+    Tipo Arrow que comporta os valores dos tipos `a` e `b`: números viram
+    float64 (como o pandas lendo o arquivo inteiro), categorias passam a índices
+    int32 e as demais combinações viram texto.
+    """
+    import pyarrow as pa
+
+    def numerico(tipo) -> bool:
+        return pa.types.is_integer(tipo) or pa.types.is_floating(tipo)
+
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_null(b):
+        return a
+    if numerico(a) and numerico(b):
+        return pa.float64()
+    if pa.types.is_dictionary(a) and pa.types.is_dictionary(b) and a.value_type == b.value_type:
+        return pa.dictionary(pa.int32(), a.value_type)
+    return pa.string()
+
+
+def _ultimo_timestamp_gravado(dados: str) -> Optional[pd.Timestamp]:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(dados):
+        return None
+    maximo = pc.max(ds.dataset(dados, format='parquet').to_table(columns=[COLUNA_TIMESTAMP])[COLUNA_TIMESTAMP])
+    return pd.Timestamp(maximo.as_py()) if maximo.is_valid else None
+
+
+def _mover_arquivos(origem: str, destino: str):
+    """Move os arquivos de origem para destino, mantendo as subpastas (partições)."""
+    for pasta, _, arquivos in os.walk(origem):
+        relativa = os.path.relpath(pasta, origem)
+        alvo = os.path.normpath(os.path.join(destino, relativa))
+        os.makedirs(alvo, exist_ok=True)
+        for arquivo in arquivos:
+            os.replace(os.path.join(pasta, arquivo), os.path.join(alvo, arquivo))
+
+
+def _particionamento(particoes: List[str]):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if not particoes:
+        return None
+    return ds.partitioning(pa.schema([(coluna, pa.string()) for coluna in particoes]), flavor='hive')
+
+
+def ler_parquet_particionado(pasta: str, layout: Dict[str, Any], filtro: Optional[FiltroDataset] = None,
+                             colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê um dataset gravado por GravacaoParquet, opcionalmente filtrado e só com
+    algumas colunas, e restaura a ordem das linhas, as categorias e a ordem das colunas.
+    """
+    import pyarrow.dataset as ds
+
+    colunas_dataset = [c for c in (colunas if colunas is not None else layout['colunas']) if c in layout['colunas']]
+    if not os.path.isdir(pasta):  # CSV sem linhas
+        return pd.DataFrame(columns=colunas_dataset)
+
+    dataset = ds.dataset(pasta, format='parquet', partitioning=_particionamento(layout['particoes']))
+    expressao = filtro.expressao(COLUNA_TIMESTAMP) if filtro is not None else None
+    table = dataset.to_table(columns=colunas_dataset + [COLUNA_ORDEM], filter=expressao)
+    table = table.sort_by(COLUNA_ORDEM).drop_columns([COLUNA_ORDEM])
+
+    df = table.to_pandas()
+    for coluna in layout['particoes']:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].fillna('')
+    for coluna, categorias in layout['categorias'].items():
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype(pd.CategoricalDtype(categorias))
+    return df[colunas_dataset]
+
+
+# Instância única usada pelas rotas (configurada em create_app)
+dataset_store = DatasetStore()
@@ -0,0 +1,136 @@
+# backend/app/services/filter_service.py
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# Formato do "Carimbo de data/hora" exportado pelo Google Forms
+FORMATO_TIMESTAMP = '%d/%m/%Y %H:%M:%S'
+
+# Colunas que podem ser filtradas por lista de valores
+COLUNAS_FILTRAVEIS = ('curso', 'instituicao', 'faixa_etaria')
+
+
+def converter_timestamp(series: pd.Series) -> pd.Series:
+    """
+    Converte a coluna timestamp (texto) para datetime. Valores fora do formato
+    do Google Forms são interpretados com dia primeiro; inválidos viram NaT.
+    """
+    texto = series.astype(str)
+    convertido = pd.to_datetime(texto, format=FORMATO_TIMESTAMP, errors='coerce')
+    pendentes = convertido.isna() & (texto.str.strip() != '')
+    if pendentes.any():
+        convertido[pendentes] = pd.to_datetime(texto[pendentes], dayfirst=True, errors='coerce', format='mixed')
+    return convertido
+
+
+def _converter_limite(valor: Optional[str], nome: str, fim_do_dia: bool = False) -> Optional[datetime]:
+    """fim_do_dia: uma data sem horário (AAAA-MM-DD) vale até o último instante do dia"""
+    if valor in (None, ''):
+        return None
+    try:
+        data = datetime.fromisoformat(str(valor))
+    except ValueError:
+        raise ValueError(f"Data inválida em '{nome}': {valor} (use AAAA-MM-DD ou AAAA-MM-DDTHH:MM)")
+    if fim_do_dia and _somente_data(str(valor)):
+        data = datetime.combine(data.date(), time.max)
+    return data
+
+
+def _somente_data(valor: str) -> bool:
+    try:
+        date.fromisoformat(valor)
+        return True
+    except ValueError:
+        return False
+
+
+class FiltroDataset:
+    """
+    Recorte de um dataset para a análise detalhada:
+    listas de valores aceitos para curso, instituicao e faixa_etaria, e um
+    intervalo [inicio, fim] do timestamp da resposta (um fim sem horário
+    inclui o dia inteiro).
+
+    O mesmo filtro pode ser aplicado a um DataFrame em memória (aplicar) ou
+    convertido em expressão do pyarrow (expressao), para que apenas as
+    partições e os row groups que satisfazem o filtro sejam lidos do disco.
+    """
+
+    def __init__(self, valores: Optional[Dict[str, List[str]]] = None,
+                 inicio: Optional[datetime] = None, fim: Optional[datetime] = None):
+        valores = valores or {}
+        invalidas = set(valores) - set(COLUNAS_FILTRAVEIS)
+        if invalidas:
+            raise ValueError(f"Filtro não suportado: {', '.join(sorted(invalidas))}")
+        self.valores = {coluna: list(lista) for coluna, lista in valores.items() if lista}
+        self.inicio = inicio
+        self.fim = fim
+        if inicio and fim and inicio > fim:
+            raise ValueError("O início do intervalo é posterior ao fim")
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> 'FiltroDataset':
+        """Filtro a partir de um dict (ex.: corpo JSON); valores podem ser texto ou lista."""
+        dados = dict(dados or {})
+        inicio = _converter_limite(dados.pop('inicio', None), 'inicio')
+        fim = _converter_limite(dados.pop('fim', None), 'fim', fim_do_dia=True)
+        valores = {coluna: [valor] if isinstance(valor, str) else list(valor) for coluna, valor in dados.items()}
+        return cls(valores, inicio, fim)
+
+    @classmethod
+    def from_args(cls, args) -> 'FiltroDataset':
+        """Filtro a partir da query string (?curso=A&curso=B&inicio=2024-03-01)."""
+        dados = {coluna: args.getlist(coluna) for coluna in COLUNAS_FILTRAVEIS if coluna in args}
+        dados['inicio'] = args.get('inicio')
+        dados['fim'] = args.get('fim')
+        return cls.from_dict(dados)
+
+    @property
+    def vazio(self) -> bool:
+        return not self.valores and self.inicio is None and self.fim is None
+
+    @property
+    def usa_timestamp(self) -> bool:
+        return self.inicio is not None or self.fim is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        resultado: Dict[str, Any] = dict(self.valores)
+        if self.inicio is not None:
+            resultado['inicio'] = self.inicio.isoformat()
+        if self.fim is not None:
+            resultado['fim'] = self.fim.isoformat()
+        return resultado
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Linhas de df que satisfazem o filtro (mantém as categorias das colunas)."""
+        if self.vazio:
+            return df
+        mascara = pd.Series(True, index=df.index)
+        for coluna, lista in self.valores.items():
+            mascara &= df[coluna].isin(lista) if coluna in df.columns else False
+        if self.usa_timestamp:
+            if 'timestamp' not in df.columns:
+                return df.iloc[:0]
+            timestamps = converter_timestamp(df['timestamp'])
+            if self.inicio is not None:
+                mascara &= timestamps >= self.inicio
+            if self.fim is not None:
+                mascara &= timestamps <= self.fim
+        return df[mascara]
+
+    def expressao(self, coluna_timestamp: str = 'timestamp'):
+        """Expressão do pyarrow.dataset equivalente (None para o filtro vazio)."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        expressao = None
+        condicoes = [ds.field(coluna).isin(pa.array(lista, type=pa.string()))
+                     for coluna, lista in self.valores.items()]
+        if self.inicio is not None:
+            condicoes.append(ds.field(coluna_timestamp) >= pa.scalar(self.inicio, type=pa.timestamp('ns')))
+        if self.fim is not None:
+            condicoes.append(ds.field(coluna_timestamp) <= pa.scalar(self.fim, type=pa.timestamp('ns')))
+        for condicao in condicoes:
+            expressao = condicao if expressao is None else expressao & condicao
+        return expressao
@@ -0,0 +1,205 @@
+# backend/app/services/ingestion_service.py
+import codecs
+import hashlib
+import io
+import logging
+import mmap
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bytes do início do arquivo usados para detectar a codificação
+AMOSTRA_CODIFICACAO = 64 * 1024
+# Bytes copiados por vez quando o upload precisa ser gravado em disco
+_BLOCO_COPIA = 1024 * 1024
+
+try:
+    import pyarrow
+    PYARROW_CSV = True
+except ImportError:
+    pyarrow = None
+    PYARROW_CSV = False
+
+
+def detectar_codificacao(amostra: bytes) -> str:
+    """
+    Detecta a codificação pelo início do arquivo, sem decodificar o conteúdo todo:
+    UTF-8 (com ou sem BOM) quando a amostra é UTF-8 válido; senão cp1252/latin-1,
+    comuns em planilhas exportadas no Windows.
+    """
+    if amostra.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    try:
+        # final=False: um caractere cortado no fim da amostra não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        amostra.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+class _LeitorBuffer(io.RawIOBase):
+    """Stream somente leitura sobre um buffer (memoryview/mmap), sem copiá-lo."""
+
+    def __init__(self, dados):
+        self._dados = memoryview(dados).cast('B')
+        self._posicao = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), len(self._dados) - self._posicao)
+        buffer[:n] = self._dados[self._posicao:self._posicao + n]
+        self._posicao += n
+        return n
+
+
+def _ler(dados, encoding: str, encoding_errors: str = 'strict') -> pd.DataFrame:
+    if PYARROW_CSV and encoding_errors == 'strict':
+        # O pyarrow lê direto do buffer (sem cópia) e é multithread
+        try:
+            df = pd.read_csv(pyarrow.BufferReader(pyarrow.py_buffer(dados)), engine='pyarrow', encoding=encoding)
+        except (pyarrow.ArrowInvalid, pd.errors.ParserError) as e:
+            # Ex.: linhas com menos campos, que o engine C completa com vazios
+            logger.info(f"CSV não lido pelo pyarrow ({str(e)[:80]}), usando o engine padrão")
+        else:
+            if _tem_coluna_binaria(df):
+                raise UnicodeDecodeError(encoding, b'', 0, 0, 'coluna com bytes inválidos')
+            return df
+    return pd.read_csv(io.BufferedReader(_LeitorBuffer(dados)), encoding=encoding, encoding_errors=encoding_errors)
+
+
+def _tem_coluna_binaria(df: pd.DataFrame) -> bool:
+    # Com bytes inválidos na codificação, o pyarrow não falha: a coluna vira binária (bytes)
+    for column in df.select_dtypes(include='object').columns:
+        indice = df[column].first_valid_index()
+        if indice is not None and isinstance(df[column].at[indice], bytes):
+            return True
+    return False
+
+
+def ler_csv(dados: Union[bytes, memoryview, mmap.mmap]) -> pd.DataFrame:
+    """
+    Lê um CSV a partir dos bytes (ou de um buffer/arquivo mapeado em memória),
+    detectando a codificação pela amostra inicial. Se um trecho inválido em UTF-8
+    aparecer depois da amostra, o arquivo é relido trocando só os bytes inválidos
+    por "�" (o restante do texto continua correto).
+    """
+    encoding = detectar_codificacao(bytes(dados[:AMOSTRA_CODIFICACAO]))
+    try:
+        df = _ler(dados, encoding)
+    except UnicodeDecodeError:
+        if encoding != 'utf-8':
+            raise
+        logger.warning("CSV com bytes inválidos em UTF-8 após o início do arquivo: caracteres substituídos")
+        df = _ler(dados, encoding, encoding_errors='replace')
+
+    if encoding != 'utf-8':
+        logger.info(f"CSV lido com a codificação {encoding}")
+    return df
+
+
+class UploadRecebido:
+    """Conteúdo de um upload, acessível como buffer, e o seu hash (chave do cache)."""
+
+    def __init__(self, dados, key: str):
+        self.dados = dados
+        self.key = key
+        self.tamanho = len(dados)
+
+
+def _arquivo_interno(stream: BinaryIO):
+    # O FileStorage do Werkzeug guarda o upload em um SpooledTemporaryFile:
+    # em memória (BytesIO) até 500 KB, depois em um arquivo temporário
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        return stream._file
+    return stream
+
+
+def _tem_arquivo(stream) -> bool:
+    try:
+        stream.fileno()
+        return True
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+
+@contextmanager
+def receber_upload(stream: BinaryIO, pasta_temp: Optional[str] = None) -> Iterator[UploadRecebido]:
+    """
+    Dá acesso ao conteúdo do upload sem copiá-lo para um bytes/str:
+
+    - upload em memória: o próprio buffer do BytesIO
+    - upload já em arquivo: o arquivo mapeado em memória (mmap)
+    - outros streams (ex.: corpo da requisição): gravados em um arquivo
+      temporário em pasta_temp (calculando o hash na cópia) e mapeados em memória
+    """
+    interno = _arquivo_interno(stream)
+    temporario = None
+    visao = None
+    mapa = None
+    try:
+        if isinstance(interno, io.BytesIO):
+            dados = visao = interno.getbuffer()
+            key = hashlib.sha256(dados).hexdigest()
+        else:
+            if _tem_arquivo(interno):
+                interno.flush()
+                descritor = interno.fileno()
+                key = None
+            else:
+                temporario, key = _gravar_temporario(interno, pasta_temp)
+                descritor = os.open(temporario, os.O_RDONLY)
+
+            try:
+                if os.fstat(descritor).st_size == 0:
+                    dados = b''
+                else:
+                    mapa = mmap.mmap(descritor, 0, access=mmap.ACCESS_READ)
+                    dados = mapa
+            finally:
+                if temporario is not None:
+                    os.close(descritor)  # o mmap continua válido
+            if key is None:
+                key = hashlib.sha256(dados).hexdigest()
+
+        yield UploadRecebido(dados, key)
+    finally:
+        # Se ainda houver referências ao buffer (ex.: no traceback de um erro
+        # de leitura), ele é liberado depois pelo coletor de lixo
+        try:
+            if visao is not None:
+                visao.release()
+            if mapa is not None:
+                mapa.close()
+        except BufferError:
+            pass
+        if temporario is not None:
+            os.remove(temporario)
+
+
+def _gravar_temporario(stream: BinaryIO, pasta_temp: Optional[str]):
+    """Grava o stream em um arquivo temporário. Retorna (caminho, sha256)."""
+    pasta = pasta_temp or tempfile.gettempdir()
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f'upload-{uuid.uuid4().hex}.csv')
+    sha = hashlib.sha256()
+    with open(caminho, 'wb') as f:
+        while True:
+            bloco = stream.read(_BLOCO_COPIA)
+            if not bloco:
+                break
+            sha.update(bloco)
+            f.write(bloco)
+    return caminho, sha.hexdigest()
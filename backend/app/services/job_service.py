@@ -0,0 +1,325 @@
+# backend/app/services/job_service.py
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from app.services.streaming_service import DEFAULT_CHUNK_ROWS, process_csv_stream
+from app.utils.processos import processo_ativo
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+# Bytes copiados por vez ao gravar o upload em disco
+_BLOCO_COPIA = 1024 * 1024
+
+
+class JobsOcupados(Exception):
+    """A fila de jobs está cheia: o cliente deve tentar de novo mais tarde."""
+
+
+class AnalysisJob:
+    """Análise detalhada executada em segundo plano, consultada pelo job_id."""
+
+    def __init__(self, content_key: str, filename: str, caminho: str):
+        self.id = uuid.uuid4().hex
+        self.content_key = content_key
+        self.filename = filename
+        self.caminho = caminho
+        # Processo (worker) que executa o job
+        self.pid = os.getpid()
+        self.status = PENDENTE
+        self.etapa = 'na_fila'
+        self.linhas_processadas = 0
+        self.criado_em = time.time()
+        self.iniciado_em: Optional[float] = None
+        self.concluido_em: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def atualizar(self, etapa: str, linhas: int):
+        """Callback de progresso de process_csv_stream."""
+        self.etapa = etapa
+        self.linhas_processadas = linhas
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in (CONCLUIDO, ERRO)
+
+    def to_dict(self) -> Dict[str, Any]:
+        fim = self.concluido_em or time.time()
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'etapa': self.etapa,
+            'linhas_processadas': self.linhas_processadas,
+            'filename': self.filename,
+            'segundos': round(fim - self.iniciado_em, 3) if self.iniciado_em else None,
+            'result': self.result,
+            'error': self.error
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in _CAMPOS_ESTADO}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'AnalysisJob':
+        job = cls.__new__(cls)
+        for campo in _CAMPOS_ESTADO:
+            setattr(job, campo, state.get(campo))
+        return job
+
+
+# Campos gravados em <pasta>/job-<id>.json (ver JobManager)
+_CAMPOS_ESTADO = ('id', 'content_key', 'filename', 'caminho', 'pid', 'status', 'etapa', 'linhas_processadas',
+                  'criado_em', 'iniciado_em', 'concluido_em', 'result', 'error')
+
+# Intervalo mínimo (segundos) entre duas gravações do progresso de um job
+_INTERVALO_PROGRESSO = 1.0
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class JobManager:
+    """
+    Executa análises detalhadas em um pool limitado de threads.
+
+    - O upload é gravado em disco (calculando o hash do conteúdo) e o job
+      entra na fila; a requisição retorna imediatamente com o job_id.
+    - O estado de cada job é gravado na pasta dos jobs (job-<id>.json), então
+      com vários workers (gunicorn) qualquer um deles responde à consulta,
+      não só o que executa o job.
+    - Um segundo envio do mesmo conteúdo enquanto o primeiro ainda está na
+      fila ou em execução recebe o mesmo job (não processa duas vezes), mesmo
+      que chegue a outro worker: o job em andamento de cada conteúdo é marcado
+      na pasta (ativo-<hash>.json).
+    - No máximo max_pendentes jobs esperam/executam ao mesmo tempo (somando
+      todos os workers); além disso submit() levanta JobsOcupados.
+    - Os jobs finalizados ficam disponíveis para consulta (os max_historico
+      mais recentes de cada worker).
+    """
+
+    def __init__(self, max_workers: int = 2, max_pendentes: int = 16, max_historico: int = 100):
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, AnalysisJob]' = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pasta: Optional[str] = None
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.max_historico = max_historico
+        self.chunksize = DEFAULT_CHUNK_ROWS
+
+    def configure(self, pasta: str, max_workers: int = 2, max_pendentes: int = 16,
+                  max_historico: int = 100, chunksize: int = DEFAULT_CHUNK_ROWS):
+        """Define a pasta dos uploads em espera e os limites do pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.pasta = pasta
+            self.max_workers = max(1, max_workers)
+            self.max_pendentes = max(1, max_pendentes)
+            self.max_historico = max_historico
+            self.chunksize = chunksize
+        os.makedirs(pasta, exist_ok=True)
+        self._encerrar_interrompidos()
+
+    def submit(self, stream: BinaryIO, filename: str) -> Tuple[AnalysisJob, bool]:
+        """
+        Grava o upload e agenda a análise.
+        Retorna: (job, deduplicado) - deduplicado=True se o mesmo conteúdo já estava em andamento
+        """
+        if self.pasta is None:
+            raise RuntimeError('JobManager não configurado')
+
+        caminho = os.path.join(self.pasta, f'{uuid.uuid4().hex}.csv')
+        content_key = self._gravar(stream, caminho)
+
+        with self._lock:
+            existente = self._job_em_andamento(content_key)
+            if existente is not None:
+                os.remove(caminho)
+                return existente, True
+
+            ativos = len(glob.glob(os.path.join(self.pasta, 'ativo-*.json')))
+            if ativos >= self.max_pendentes:
+                os.remove(caminho)
+                raise JobsOcupados(f'Fila de análises cheia ({ativos} em andamento)')
+
+            job = AnalysisJob(content_key, filename, caminho)
+            if not self._marcar_ativo(job):
+                # Outro worker agendou o mesmo conteúdo ao mesmo tempo
+                existente = self._job_em_andamento(content_key)
+                if existente is not None:
+                    os.remove(caminho)
+                    return existente, True
+            self._jobs[job.id] = job
+            self._salvar(job)
+            self._limpar_historico()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='analysis-job')
+            self._executor.submit(self._executar, job)
+
+        logger.info(f"Job {job.id} agendado ({filename})")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """Job deste worker (em memória) ou de outro (estado gravado na pasta)."""
+        with self._lock:
+            return self._buscar(job_id)
+
+    # --- Internos ---
+
+    @staticmethod
+    def _gravar(stream: BinaryIO, caminho: str) -> str:
+        """Copia o upload para o disco e retorna o hash (mesmo de content_hash)."""
+        sha = hashlib.sha256()
+        with open(caminho, 'wb') as f:
+            while True:
+                bloco = stream.read(_BLOCO_COPIA)
+                if not bloco:
+                    break
+                sha.update(bloco)
+                f.write(bloco)
+        return sha.hexdigest()
+
+    def _buscar(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self._jobs.get(job_id)
+        if job is not None or self.pasta is None or not JOB_ID_PATTERN.match(job_id or ''):
+            return job
+        state = _ler_json(self._caminho_estado(job_id))
+        return AnalysisJob.from_state(state) if state is not None else None
+
+    def _caminho_estado(self, job_id: str) -> str:
+        return os.path.join(self.pasta, f'job-{job_id}.json')
+
+    def _caminho_marcador(self, content_key: str) -> str:
+        return os.path.join(self.pasta, f'ativo-{content_key}.json')
+
+    def _salvar(self, job: AnalysisJob):
+        path = self._caminho_estado(job.id)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job.to_state(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _marcar_ativo(self, job: AnalysisJob) -> bool:
+        """Marca o job como o job em andamento do seu conteúdo (False se já há outro)."""
+        try:
+            fd = os.open(self._caminho_marcador(job.content_key), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'job_id': job.id}, f)
+        return True
+
+    def _job_em_andamento(self, content_key: str) -> Optional[AnalysisJob]:
+        """
+        Job ainda na fila ou em execução (em qualquer worker) para o conteúdo.
+        Marcadores de jobs já finalizados ou de workers encerrados são removidos.
+        """
+        marcador = self._caminho_marcador(content_key)
+        dados = _ler_json(marcador)
+        if dados is None:
+            return None
+        job = self._buscar(dados.get('job_id', ''))
+        if job is not None and not job.finalizado and processo_ativo(job.pid):
+            return job
+        _remover(marcador)
+        return None
+
+    def _progresso(self, job: AnalysisJob, etapa: str, linhas: int):
+        mudou_etapa = etapa != job.etapa
+        job.atualizar(etapa, linhas)
+        agora = time.monotonic()
+        if mudou_etapa or agora - getattr(job, '_gravado_em', 0.0) >= _INTERVALO_PROGRESSO:
+            job._gravado_em = agora
+            self._salvar(job)
+
+    def _executar(self, job: AnalysisJob):
+        job.status = EXECUTANDO
+        job.etapa = 'leitura'
+        job.iniciado_em = time.time()
+        self._salvar(job)
+        try:
+            with open(job.caminho, 'rb') as f:
+                result = process_csv_stream(f, job.filename, chunksize=self.chunksize, incluir_analise=True,
+                                            progresso=lambda etapa, linhas: self._progresso(job, etapa, linhas))
+            job.result = {'dataset_id': result['data']['dataset_id'], 'analysis': result['analysis']}
+            job.etapa = 'concluido'
+            job.status = CONCLUIDO
+        except Exception as e:
+            logger.exception(f"Erro no job {job.id}")
+            job.error = f'Erro na análise: {str(e)}'
+            job.status = ERRO
+        finally:
+            job.concluido_em = time.time()
+            try:
+                os.remove(job.caminho)
+            except OSError:
+                pass
+            self._salvar(job)
+            marcador = self._caminho_marcador(job.content_key)
+            if (_ler_json(marcador) or {}).get('job_id') == job.id:
+                _remover(marcador)
+
+    def _limpar_historico(self):
+        finalizados = [job_id for job_id, job in self._jobs.items() if job.finalizado]
+        for job_id in finalizados[:max(0, len(finalizados) - self.max_historico)]:
+            del self._jobs[job_id]
+            _remover(self._caminho_estado(job_id))
+
+    def _encerrar_interrompidos(self):
+        """
+        Jobs gravados como pendentes/em execução por um processo que não existe
+        mais (servidor reiniciado) são marcados como erro, e seus marcadores removidos.
+        """
+        for path in glob.glob(os.path.join(self.pasta, 'job-*.json')):
+            state = _ler_json(path)
+            if state is None or state.get('status') in (CONCLUIDO, ERRO):
+                continue
+            # O próprio processo ainda não executou nenhum job: o pid é de uma execução anterior
+            if state.get('pid') != os.getpid() and processo_ativo(state.get('pid')):
+                continue
+            job = AnalysisJob.from_state(state)
+            job.status = ERRO
+            job.error = 'Análise interrompida (servidor reiniciado); envie o arquivo novamente'
+            job.concluido_em = time.time()
+            self._salvar(job)
+            _remover(self._caminho_marcador(job.content_key))
+            if job.caminho:
+                _remover(job.caminho)
+
+
+def _ler_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remover(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+
+# Instância compartilhada pela aplicação (configurada em create_app)
+job_manager = JobManager()
@@ -0,0 +1,376 @@
+# backend/app/services/streaming_service.py
+import hashlib
+import io
+import logging
+from collections import Counter
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_service import DetailedAnalysisSketch
+from app.services.cache_service import chave_dataset
+from app.services.data_service import build_preview, clean_and_standardize_data
+from app.services.dataset_store import GravacaoParquet, dataset_store
+from app.services.ingestion_service import AMOSTRA_CODIFICACAO, detectar_codificacao
+from app.utils.profiling import etapa
+from app.utils.standardization_rules import regras_padronizacao
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas por bloco na ingestão em streaming
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    Envolve o stream do upload e calcula o SHA-256 à medida que os bytes
+    são lidos pelo parser, sem precisar guardar o arquivo inteiro.
+    O hash final é o mesmo de cache_service.content_hash(conteúdo).
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._sha = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self._sha.update(data)
+        self.bytes_read += n
+        return n
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+# Valores distintos contados exatamente por coluna; acima disso a coluna passa
+# a ser resumida de forma aproximada (ver BasicStatsAccumulator)
+LIMITE_VALORES_EXATOS = 10_000
+# Tamanho dos resumos aproximados (menores hashes e amostra para a mediana)
+TAMANHO_RESUMO = 4096
+
+
+class BasicStatsAccumulator:
+    """
+    Acumula, bloco a bloco, as estatísticas de generate_basic_stats, sem
+    guardar as linhas em si.
+
+    Enquanto uma coluna tem até LIMITE_VALORES_EXATOS valores distintos, guarda
+    a contagem de cada um (unique_values, top_values e mediana exatos). Acima
+    disso a memória da coluna fica limitada e os resultados são aproximados
+    ('approximate': True):
+    - top_values: contagens apenas dos valores mais frequentes até o momento
+    - unique_values: estimado pelos TAMANHO_RESUMO menores hashes (KMV)
+    - median: de uma amostra uniforme de TAMANHO_RESUMO valores
+    min, max, mean e as contagens de nulos são sempre exatos.
+    """
+
+    def __init__(self):
+        self.columns: List[str] = []
+        self._dtypes: Dict[str, set] = {}
+        self._count = Counter()
+        self._nulls = Counter()
+        self._values: Dict[str, Counter] = {}
+        self._sums = Counter()
+        self._min: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+        # Colunas resumidas de forma aproximada: menores hashes e amostra (prioridade, valor)
+        self._hashes: Dict[str, np.ndarray] = {}
+        self._amostras: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._rng = np.random.default_rng()
+
+    def update(self, df: pd.DataFrame):
+        for column in df.columns:
+            if column not in self._values:
+                self.columns.append(column)
+                self._dtypes[column] = set()
+                self._values[column] = Counter()
+
+            series = df[column]
+            # Cada bloco tem suas próprias categorias: todas contam como 'category'
+            dtype = series.dtype
+            self._dtypes[column].add('category' if isinstance(dtype, pd.CategoricalDtype) else dtype)
+            self._count[column] += int(series.count())
+            self._nulls[column] += int(series.isnull().sum())
+            if pd.api.types.is_numeric_dtype(series) and series.count():
+                self._sums[column] += float(series.sum())
+                self._min[column] = min(self._min.get(column, np.inf), float(series.min()))
+                self._max[column] = max(self._max.get(column, -np.inf), float(series.max()))
+
+            values = self._values[column]
+            for valor, count in series.value_counts(sort=False).items():
+                if count > 0:
+                    values[valor] += int(count)
+
+            if column in self._hashes:
+                self._resumir(column, series)
+            elif len(values) > LIMITE_VALORES_EXATOS:
+                self._iniciar_resumo(column)
+            if column in self._hashes and len(values) > 2 * LIMITE_VALORES_EXATOS:
+                self._values[column] = Counter(dict(values.most_common(LIMITE_VALORES_EXATOS)))
+
+    def _iniciar_resumo(self, column: str):
+        """Passa a coluna para o resumo aproximado, a partir das contagens exatas até aqui."""
+        values = self._values[column]
+        self._hashes[column] = _menores_hashes(np.fromiter(values.keys(), dtype=object, count=len(values)))
+        if pd.api.types.is_numeric_dtype(self._dtype(column)):
+            valores = np.repeat(np.array(list(values.keys()), dtype='float64'), list(values.values()))
+            self._amostrar(column, valores)
+
+    def _resumir(self, column: str, series: pd.Series):
+        valores = series.dropna()
+        self._hashes[column] = _menores_hashes(valores.to_numpy(dtype=object), self._hashes[column])
+        if column in self._amostras:
+            self._amostrar(column, pd.to_numeric(valores, errors='coerce').dropna().to_numpy(dtype='float64'))
+
+    def _amostrar(self, column: str, valores: np.ndarray):
+        # Amostra uniforme: cada valor recebe uma prioridade aleatória e ficam as menores
+        prioridades = self._rng.random(len(valores))
+        anteriores = self._amostras.get(column)
+        if anteriores is not None:
+            prioridades = np.concatenate([anteriores[0], prioridades])
+            valores = np.concatenate([anteriores[1], valores])
+        if len(prioridades) > TAMANHO_RESUMO:
+            manter = np.argpartition(prioridades, TAMANHO_RESUMO)[:TAMANHO_RESUMO]
+            prioridades, valores = prioridades[manter], valores[manter]
+        self._amostras[column] = (prioridades, valores)
+
+    def _dtype(self, column: str):
+        # O mesmo tipo pode ser inferido diferente em cada bloco (ex.: int64 em
+        # um bloco sem valores vazios e float64 em outro): numéricos são promovidos
+        dtypes = self._dtypes[column]
+        if len(dtypes) == 1:
+            return pd.api.types.pandas_dtype(next(iter(dtypes)))
+        if all(pd.api.types.is_numeric_dtype(dtype) for dtype in dtypes):
+            return np.result_type(*dtypes)
+        return pd.api.types.pandas_dtype(object)
+
+    @staticmethod
+    def _median(values: Counter, count: int) -> float:
+        if not count:
+            return float('nan')
+        ordered = sorted(values.items())
+        middle = [(count - 1) // 2, count // 2]
+        found, seen = [], 0
+        for valor, n in ordered:
+            seen += n
+            while len(found) < 2 and seen > middle[len(found)]:
+                found.append(float(valor))
+        return (found[0] + found[1]) / 2
+
+    def _unicos(self, column: str) -> int:
+        hashes = self._hashes.get(column)
+        if hashes is None:
+            return len(self._values[column])
+        if len(hashes) < TAMANHO_RESUMO:
+            return len(hashes)
+        # Estimativa KMV: k hashes distintos em uma fração hashes[k-1]/2^64 do espaço
+        return int(round((TAMANHO_RESUMO - 1) * 2.0 ** 64 / float(hashes[-1])))
+
+    def column_types(self) -> Dict[str, str]:
+        return {column: str(self._dtype(column)) for column in self.columns}
+
+    def result(self) -> Dict[str, Any]:
+        stats = {}
+        for column in self.columns:
+            dtype = self._dtype(column)
+            values = self._values[column]
+            count = self._count[column]
+            col_stats = {
+                'data_type': str(dtype),
+                'non_null_count': count,
+                'null_count': self._nulls[column],
+                'unique_values': self._unicos(column)
+            }
+
+            if pd.api.types.is_numeric_dtype(dtype):
+                if column in self._amostras:
+                    amostra = self._amostras[column][1]
+                    median = float(np.median(amostra)) if len(amostra) else float('nan')
+                else:
+                    median = self._median(values, count)
+                col_stats.update({
+                    'min': self._min.get(column, float('nan')),
+                    'max': self._max.get(column, float('nan')),
+                    'mean': self._sums[column] / count if count else float('nan'),
+                    'median': median
+                })
+
+            if pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(dtype) or \
+                    isinstance(dtype, pd.CategoricalDtype):
+                col_stats['top_values'] = {str(k): int(v) for k, v in values.most_common(5)}
+
+            if column in self._hashes:
+                col_stats['approximate'] = True
+            stats[column] = col_stats
+        return stats
+
+
+def _menores_hashes(valores: np.ndarray, anteriores: Optional[np.ndarray] = None) -> np.ndarray:
+    """Os TAMANHO_RESUMO menores hashes distintos (ordenados) dos valores e dos anteriores."""
+    hashes = pd.util.hash_array(valores)
+    if anteriores is not None:
+        hashes = np.concatenate([anteriores, hashes])
+    return np.unique(hashes)[:TAMANHO_RESUMO]
+
+
+def _inferir_tipos(chunk: pd.DataFrame, tipos: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converte as colunas do bloco (lido como texto) para o tipo que o pandas
+    infere lendo o arquivo inteiro (process_csv_data): colunas só com números
+    viram int64, ou float64 se houver valores vazios ou decimais.
+    tipos: tipo decidido nos blocos anteriores ('int', 'float' ou 'texto');
+    uma coluna com texto continua texto e uma float64 não volta a int64
+    """
+    for coluna in chunk.columns:
+        anterior = tipos.get(coluna)
+        series = chunk[coluna]
+        if anterior == 'texto' or (anterior is None and not series.count()):
+            # Coluna vazia no bloco: o tipo é decidido pelos blocos seguintes
+            continue
+        try:
+            numeros = pd.to_numeric(series)
+        except (ValueError, TypeError):
+            tipos[coluna] = 'texto'
+            continue
+        if anterior == 'float' or not pd.api.types.is_integer_dtype(numeros):
+            numeros = numeros.astype('float64')
+            tipos[coluna] = 'float'
+        else:
+            tipos[coluna] = 'int'
+        chunk[coluna] = numeros
+    return chunk
+
+
+def _combinar_logs(logs: List[str], linhas_removidas: int) -> List[str]:
+    """
+    Usa os logs de limpeza do primeiro bloco, trocando a contagem de linhas
+    vazias removidas pelo total de todos os blocos.
+    """
+    logs = [log for log in logs if not log.startswith('Removidas ')]
+    if linhas_removidas:
+        posicao = 1 if logs and logs[0].startswith('Espaços removidos') else 0
+        logs.insert(posicao, f"Removidas {linhas_removidas} linha(s) completamente vazia(s)")
+    return logs
+
+
+def process_csv_stream(stream: BinaryIO, filename: str = '', chunksize: int = DEFAULT_CHUNK_ROWS,
+                       incluir_analise: bool = False, persistir: bool = True,
+                       modo: str = 'vectorized',
+                       progresso: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+    """
+    Ingestão em blocos de um CSV grande, lido direto do stream de bytes do upload.
+    Cada bloco é limpo e padronizado e alimenta as estatísticas (e, se pedido,
+    a análise detalhada) de forma incremental: o uso de memória depende do
+    tamanho do bloco, não do tamanho do arquivo.
+
+    As colunas são lidas como texto e convertidas bloco a bloco para os mesmos
+    tipos da leitura do arquivo inteiro (ver _inferir_tipos), pois o dataset
+    fica armazenado pelo mesmo dataset_id nos dois caminhos. As regras de
+    padronização são as do início da leitura para todos os blocos.
+
+    progresso: chamado como progresso(etapa, linhas_lidas) após cada bloco e
+    antes da gravação final (usado pelos jobs de análise em segundo plano)
+
+    Retorna: {'data': resumo no formato de process_csv_data, 'analysis': análise ou None}
+    """
+    reader = _HashingReader(stream)
+    regras = regras_padronizacao.atuais()
+    stats = BasicStatsAccumulator()
+    analise = DetailedAnalysisSketch() if incluir_analise else None
+
+    staging: Optional[str] = None
+    gravacao: Optional[GravacaoParquet] = None
+    if persistir and dataset_store.root and dataset_store.use_parquet:
+        staging = dataset_store.new_staging_dir()
+        gravacao = GravacaoParquet(staging)
+
+    tipos: Dict[str, str] = {}
+    primeiros_logs: List[str] = []
+    preview: list = []
+    linhas, colunas_originais, linhas_removidas, blocos = 0, 0, 0, 0
+
+    try:
+        # A codificação é detectada pelo início do arquivo, sem consumi-lo (peek)
+        buffered = io.BufferedReader(reader, buffer_size=AMOSTRA_CODIFICACAO)
+        encoding = detectar_codificacao(buffered.peek(AMOSTRA_CODIFICACAO)[:AMOSTRA_CODIFICACAO])
+        chunks = pd.read_csv(buffered, chunksize=chunksize, dtype=str, encoding=encoding)
+        for chunk in chunks:
+            blocos += 1
+            linhas += len(chunk)
+            colunas_originais = chunk.shape[1]
+
+            chunk_clean, logs = clean_and_standardize_data(_inferir_tipos(chunk, tipos), modo, regras=regras)
+            linhas_removidas += len(chunk) - len(chunk_clean)
+
+            if blocos == 1:
+                primeiros_logs = logs
+                preview = build_preview(chunk_clean)
+
+            with etapa('estatisticas_basicas', len(chunk_clean)) as e:
+                stats.update(chunk_clean)
+                e.linhas_saida = len(chunk_clean)
+            if analise is not None:
+                analise.update(chunk_clean)
+            if staging is not None and not _gravar_bloco(gravacao, chunk_clean):
+                dataset_store.discard_staged(staging)
+                staging = None
+            if progresso is not None:
+                progresso('processando', linhas)
+
+        logger.info(f"CSV lido em {blocos} bloco(s). Shape: ({linhas}, {colunas_originais})")
+    except Exception:
+        if staging is not None:
+            dataset_store.discard_staged(staging)
+        raise
+
+    if progresso is not None:
+        progresso('gravando', linhas)
+    logs = _combinar_logs(primeiros_logs, linhas_removidas)
+    dataset_id = None
+    if staging is not None:
+        if gravacao.blocos == 0:
+            dataset_store.discard_staged(staging)  # CSV sem linhas
+        else:
+            dataset_id = dataset_store.commit_staged(
+                staging, chave_dataset(reader.hexdigest(), regras.versao), filename, (linhas, colunas_originais),
+                linhas - linhas_removidas, logs, gravacao.layout())
+            # A análise vale para o conteúdo deste CSV: não é gravada sobre um
+            # dataset de mesmo id que já recebeu respostas (append)
+            versao = dataset_store.versao_original(dataset_id)
+            if analise is not None and versao is not None:
+                dataset_store.save_analysis_state(dataset_id, analise.to_state(), versao)
+
+    return {
+        'data': {
+            'dataset_id': dataset_id,
+            'shape': {'rows': linhas, 'columns': colunas_originais},
+            'columns': list(stats.columns),
+            'column_types': stats.column_types(),
+            'basic_stats': stats.result(),
+            'cleaning_logs': logs,
+            'memory_usage': None,  # o dataset completo nunca fica em memória
+            'preview': preview,
+            'streaming': {'chunks': blocos, 'chunksize': chunksize, 'bytes': reader.bytes_read}
+        },
+        'analysis': analise.result() if analise is not None else None
+    }
+
+
+def _gravar_bloco(gravacao: GravacaoParquet, chunk: pd.DataFrame) -> bool:
+    """
+    Acrescenta um bloco ao Parquet em gravação. Retorna False se o bloco
+    não puder ser gravado (o dataset então não é armazenado).
+    """
+    try:
+        gravacao.escrever(chunk)
+        return True
+    except Exception as e:
+        logger.warning(f"Bloco não pôde ser gravado em Parquet, dataset não será armazenado: {str(e)}")
+        return False
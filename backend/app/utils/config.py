@@ -0,0 +1,63 @@
+# backend/app/utils/config.py
+import os
+
+
+class Config:
+    """
+    Configurações padrão da aplicação.
+    Cada valor pode ser sobrescrito por variável de ambiente de mesmo nome.
+    """
+
+    # --- Cache de datasets limpos (indexado pelo hash do conteúdo) ---
+    # Os limites valem para cada processo: com vários workers (gunicorn) cada um tem seu cache
+    # Número máximo de datasets mantidos em memória
+    DATASET_CACHE_MAX_ENTRIES = int(os.environ.get('DATASET_CACHE_MAX_ENTRIES', 16))
+    # Limite de memória (bytes) ocupado pelos DataFrames em cache
+    DATASET_CACHE_MAX_BYTES = int(os.environ.get('DATASET_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    # Grava em Parquet (dentro de UPLOAD_FOLDER) os datasets removidos da memória
+    DATASET_CACHE_SPILL = os.environ.get('DATASET_CACHE_SPILL', '0') == '1'
+
+    # --- Ingestão em blocos (streaming) ---
+    # Uploads maiores que este limite (bytes) são processados em blocos;
+    # também pode ser forçado com ?stream=1
+    STREAMING_THRESHOLD_BYTES = int(os.environ.get('STREAMING_THRESHOLD_BYTES', 64 * 1024 * 1024))
+    # Linhas lidas por bloco
+    STREAMING_CHUNK_ROWS = int(os.environ.get('STREAMING_CHUNK_ROWS', 50_000))
+
+    # --- Análise em lote (vários arquivos em paralelo) ---
+    # Número máximo de processos (0 = número de CPUs)
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 0))
+    # Limite de memória de cada processo, em MB (0 = sem limite)
+    BATCH_WORKER_MEMORY_MB = int(os.environ.get('BATCH_WORKER_MEMORY_MB', 0))
+
+    # --- Respostas ---
+    # Respostas JSON/texto a partir deste tamanho (bytes) são comprimidas (brotli ou gzip)
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+
+    # --- Regras de padronização (standardization_rules.json) ---
+    # Arquivo com as regras de limpeza/padronização e as palavras-chave das análises
+    STANDARDIZATION_RULES_FILE = os.environ.get(
+        'STANDARDIZATION_RULES_FILE', os.path.join(os.path.dirname(__file__), 'standardization_rules.json'))
+    # Intervalo (segundos) entre as verificações de mudança no arquivo; 0 = sem recarga automática
+    STANDARDIZATION_RULES_RELOAD_SECONDS = float(os.environ.get('STANDARDIZATION_RULES_RELOAD_SECONDS', 2))
+
+    # --- Jobs de análise em segundo plano (/detailed?async=1) ---
+    # Threads que executam as análises
+    JOBS_MAX_WORKERS = int(os.environ.get('JOBS_MAX_WORKERS', 2))
+    # Jobs na fila ou em execução ao mesmo tempo (além disso o envio é recusado com 503)
+    JOBS_MAX_PENDING = int(os.environ.get('JOBS_MAX_PENDING', 16))
+    # Jobs finalizados mantidos para consulta
+    JOBS_HISTORY = int(os.environ.get('JOBS_HISTORY', 100))
+
+    # --- Servidor de produção (gunicorn.conf.py / wsgi.py) ---
+    # Endereço em que o servidor escuta
+    WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+    # Processos (workers); 0 = número de CPUs. O cache em memória é de cada worker;
+    # jobs, métricas e datasets armazenados são compartilhados via UPLOAD_FOLDER
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 0))
+    # Threads por worker (requisições simultâneas em cada processo)
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+    # Segundos sem resposta até o worker ser reiniciado (uploads grandes são lentos)
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 300))
+    # Executa o pipeline uma vez antes de atender (ver warmup_service.aquecer)
+    WEB_WARMUP = os.environ.get('WEB_WARMUP', '1') == '1'
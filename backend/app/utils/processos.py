@@ -0,0 +1,73 @@
+# backend/app/utils/processos.py
+"""Utilitários para o estado compartilhado entre os processos (workers) do servidor."""
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+def processo_ativo(pid: Optional[int]) -> bool:
+    """O processo `pid` ainda existe (no Windows não é verificado: considera que sim)."""
+    if not pid:
+        return False
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TravaOcupada(Exception):
+    """A trava não foi liberada por outro processo dentro do tempo de espera."""
+
+
+@contextmanager
+def trava_arquivo(caminho: str, espera: float = 60.0, validade: float = 600.0):
+    """
+    Trava exclusiva entre processos (e threads), pelo arquivo `caminho` criado
+    com O_CREAT|O_EXCL. Uma trava de processo que não existe mais, ou mais
+    antiga que `validade` segundos, é considerada abandonada e removida.
+    Levanta TravaOcupada se não conseguir a trava em `espera` segundos.
+    """
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            fd = os.open(caminho, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if _trava_abandonada(caminho, validade):
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+                continue
+            if time.monotonic() >= limite:
+                raise TravaOcupada(caminho)
+            time.sleep(0.05)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid()}, f)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def _trava_abandonada(caminho: str, validade: float) -> bool:
+    try:
+        idade = time.time() - os.path.getmtime(caminho)
+        with open(caminho, encoding='utf-8') as f:
+            pid = json.load(f).get('pid')
+    except OSError:
+        return False  # liberada entre o O_EXCL e a leitura: tenta de novo
+    except ValueError:
+        # Arquivo ainda sendo escrito pelo dono (ou corrompido): só a idade decide
+        return idade > validade
+    return idade > validade or not processo_ativo(pid)
@@ -0,0 +1,283 @@
+# backend/app/utils/profiling.py
+"""
+Instrumentação leve das etapas do pipeline.
+
+- etapa(nome, linhas): mede o tempo (e as linhas de entrada/saída) de um trecho
+  de código e acumula contadores globais, exportados em /api/metrics (somando
+  todos os processos quando MetricsRegistry.configure define uma pasta comum)
+- perfilar(): ativa, para a requisição atual, o registro detalhado de cada etapa
+  (inclusive a variação de memória), devolvido na resposta com ?profile=1
+"""
+import atexit
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.processos import processo_ativo
+
+try:
+    import psutil
+    _processo = psutil.Process()
+except ImportError:
+    psutil = None
+    _processo = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def memoria_rss() -> Optional[int]:
+    """Memória residente (RSS) do processo atual, em bytes (None se indisponível)."""
+    if _processo is not None:
+        return _processo.memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Etapa:
+    """Medição de uma etapa. Quem a executa pode informar linhas_saida."""
+
+    __slots__ = ('nome', 'linhas_entrada', 'linhas_saida', 'segundos', 'memoria_delta_bytes')
+
+    def __init__(self, nome: str, linhas_entrada: Optional[int]):
+        self.nome = nome
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida: Optional[int] = None
+        self.segundos = 0.0
+        self.memoria_delta_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'etapa': self.nome,
+            'segundos': round(self.segundos, 6),
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'memoria_delta_bytes': self.memoria_delta_bytes
+        }
+
+
+class Perfil:
+    """Etapas registradas durante uma requisição com ?profile=1."""
+
+    def __init__(self):
+        self.etapas: List[Etapa] = []
+        self.inicio = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_segundos': round(time.perf_counter() - self.inicio, 6),
+            'etapas': [etapa.to_dict() for etapa in self.etapas]
+        }
+
+
+# Intervalo mínimo (segundos) entre duas gravações dos contadores de um processo
+_INTERVALO_GRAVACAO = 1.0
+
+
+class MetricsRegistry:
+    """
+    Contadores acumulados por etapa desde o início do processo.
+
+    Com vários workers (gunicorn) cada processo tem seus próprios contadores:
+    configure(pasta) faz cada um gravar os seus em <pasta>/metrics-<pid>.json,
+    e agregado() soma os de todos os processos. A gravação é limitada a uma por
+    segundo; a última é forçada quando o processo termina.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'chamadas': 0, 'segundos': 0.0, 'linhas_entrada': 0, 'linhas_saida': 0})
+        self.pasta: Optional[str] = None
+        self._extras: Optional[Callable[[], Dict[str, float]]] = None
+        self._gravado_em = 0.0
+        self._gravar_ao_sair = False
+
+    def configure(self, pasta: Optional[str], extras: Optional[Callable[[], Dict[str, float]]] = None):
+        """
+        Define a pasta dos contadores compartilhados e, opcionalmente, uma função
+        com contadores extras do processo (ex.: do cache), gravados e somados junto.
+        Arquivos de processos que não existem mais são removidos.
+        """
+        self.pasta = pasta
+        self._extras = extras
+        if pasta is None:
+            return
+        os.makedirs(pasta, exist_ok=True)
+        for path, pid in self._arquivos():
+            if pid != os.getpid() and not processo_ativo(pid):
+                _remover(path)
+        if not self._gravar_ao_sair:
+            self._gravar_ao_sair = True
+            atexit.register(self.gravar, forcar=True)
+
+    def registrar(self, etapa: Etapa):
+        with self._lock:
+            contador = self._contadores[etapa.nome]
+            contador['chamadas'] += 1
+            contador['segundos'] += etapa.segundos
+            contador['linhas_entrada'] += etapa.linhas_entrada or 0
+            contador['linhas_saida'] += etapa.linhas_saida or 0
+        self.gravar()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {nome: dict(valores) for nome, valores in self._contadores.items()}
+
+    def reset(self):
+        with self._lock:
+            self._contadores.clear()
+        if self.pasta is not None:
+            _remover(self._caminho(os.getpid()))
+
+    def extras(self) -> Dict[str, float]:
+        return self._extras() if self._extras is not None else {}
+
+    def gravar(self, forcar: bool = False):
+        """Grava os contadores deste processo (no máximo uma vez por segundo, salvo `forcar`)."""
+        if self.pasta is None:
+            return
+        agora = time.monotonic()
+        if not forcar and agora - self._gravado_em < _INTERVALO_GRAVACAO:
+            return
+        self._gravado_em = agora
+        path = self._caminho(os.getpid())
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'etapas': self.snapshot(), 'extras': self.extras()}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            _remover(tmp_path)
+
+    def agregado(self) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+        """Soma dos contadores (por etapa) e dos extras de todos os processos."""
+        etapas = self.snapshot()
+        extras = dict(self.extras())
+        if self.pasta is None:
+            return etapas, extras
+        for path, pid in self._arquivos():
+            if pid == os.getpid():
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    dados = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nome, valores in dados.get('etapas', {}).items():
+                contador = etapas.setdefault(nome, dict.fromkeys(valores, 0))
+                for chave, valor in valores.items():
+                    contador[chave] = contador.get(chave, 0) + valor
+            for nome, valor in dados.get('extras', {}).items():
+                extras[nome] = extras.get(nome, 0) + valor
+        return etapas, extras
+
+    def _caminho(self, pid: int) -> str:
+        return os.path.join(self.pasta, f'metrics-{pid}.json')
+
+    def _arquivos(self) -> List[Tuple[str, int]]:
+        arquivos = []
+        for path in glob.glob(os.path.join(self.pasta, 'metrics-*.json')):
+            pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+            if pid.isdigit():
+                arquivos.append((path, int(pid)))
+        return arquivos
+
+
+def _remover(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+
+metrics = MetricsRegistry()
+_perfil_atual: contextvars.ContextVar[Optional[Perfil]] = contextvars.ContextVar('perfil_atual', default=None)
+
+
+@contextmanager
+def etapa(nome: str, linhas_entrada: Optional[int] = None):
+    """
+    Mede uma etapa do pipeline:
+
+        with etapa('limpeza.remover_linhas_vazias', len(df)) as e:
+            df = df.dropna(how='all')
+            e.linhas_saida = len(df)
+    """
+    registro = Etapa(nome, linhas_entrada)
+    perfil = _perfil_atual.get()
+    memoria_antes = memoria_rss() if perfil is not None else None
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro.segundos = time.perf_counter() - inicio
+        if memoria_antes is not None:
+            memoria_depois = memoria_rss()
+            registro.memoria_delta_bytes = memoria_depois - memoria_antes if memoria_depois is not None else None
+        if perfil is not None:
+            perfil.etapas.append(registro)
+        metrics.registrar(registro)
+
+
+@contextmanager
+def perfilar():
+    """Ativa o registro detalhado das etapas executadas dentro do bloco."""
+    perfil = Perfil()
+    token = _perfil_atual.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _perfil_atual.reset(token)
+
+
+def iniciar_perfil() -> contextvars.Token:
+    """Versão sem bloco 'with' de perfilar() (para hooks before/after request)."""
+    return _perfil_atual.set(Perfil())
+
+
+def perfil_atual() -> Optional[Perfil]:
+    return _perfil_atual.get()
+
+
+def encerrar_perfil(token: contextvars.Token):
+    _perfil_atual.reset(token)
+
+
+def _formatar_valor(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def exportar_prometheus(prefixo: str = 'mulheresmil', extras: Optional[Dict[str, float]] = None) -> str:
+    """
+    Contadores (somados entre os processos, ver MetricsRegistry) no formato de
+    texto do Prometheus. extras: valores apenas deste processo (ex.: memória)
+    """
+    descricoes = {
+        'chamadas': ('etapa_chamadas_total', 'Execuções de cada etapa do pipeline'),
+        'segundos': ('etapa_segundos_total', 'Tempo acumulado de cada etapa, em segundos'),
+        'linhas_entrada': ('etapa_linhas_entrada_total', 'Linhas recebidas por cada etapa'),
+        'linhas_saida': ('etapa_linhas_saida_total', 'Linhas produzidas por cada etapa')
+    }
+    snapshot, extras_processos = metrics.agregado()
+    linhas = []
+    for chave, (nome, descricao) in descricoes.items():
+        linhas.append(f'# HELP {prefixo}_{nome} {descricao}')
+        linhas.append(f'# TYPE {prefixo}_{nome} counter')
+        for etapa_nome, valores in sorted(snapshot.items()):
+            linhas.append(f'{prefixo}_{nome}{{etapa="{etapa_nome}"}} {_formatar_valor(valores[chave])}')
+
+    for nome, valor in {**extras_processos, **(extras or {})}.items():
+        linhas.append(f'# TYPE {prefixo}_{nome} {"counter" if nome.endswith("_total") else "gauge"}')
+        linhas.append(f'{prefixo}_{nome} {_formatar_valor(valor)}')
+
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,128 @@
+# backend/app/utils/responses.py
+"""
+Camada de resposta da API:
+
+- FastJSONProvider: serializa com orjson quando instalado (bem mais rápido
+  que o json da biblioteca padrão para os dicionários grandes da análise)
+- registrar_compressao(app): comprime com brotli ou gzip os corpos acima
+  de um limite, conforme o Accept-Encoding do cliente
+- etag_condicional: ETag/If-None-Match para respostas que dependem apenas
+  do conteúdo de um dataset (o dashboard revalida sem baixar de novo)
+"""
+import gzip
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import current_app, make_response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Incrementar quando o formato das respostas mudar: invalida as ETags já emitidas
+VERSAO_RESPOSTAS = 1
+
+# Tipos de conteúdo que valem a pena comprimir
+_TIPOS_COMPRIMIVEIS = ('application/json', 'text/plain', 'text/csv')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provider JSON do Flask que usa orjson quando disponível.
+    Com orjson, valores NaN/infinito são serializados como null (JSON válido);
+    sem orjson, ou com saída indentada (modo debug), vale o provider padrão.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+
+        opcoes = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            opcoes |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=opcoes).decode('utf-8')
+
+
+def _escolher_codificacao(accept_encoding) -> Optional[str]:
+    if brotli is not None and accept_encoding['br'] > 0:
+        return 'br'
+    if accept_encoding['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def registrar_compressao(app, tamanho_minimo: int = 1024, nivel_gzip: int = 6, qualidade_brotli: int = 5):
+    """
+    Comprime as respostas (JSON/texto) com pelo menos tamanho_minimo bytes.
+    Deve ser registrado antes dos demais after_request, para rodar por último.
+    """
+
+    @app.after_request
+    def comprimir(response):
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+                or response.mimetype not in _TIPOS_COMPRIMIVEIS):
+            return response
+
+        corpo = response.get_data()
+        if len(corpo) < tamanho_minimo:
+            return response
+
+        codificacao = _escolher_codificacao(request.accept_encodings)
+        if codificacao is None:
+            return response
+
+        if codificacao == 'br':
+            comprimido = brotli.compress(corpo, quality=qualidade_brotli)
+        else:
+            comprimido = gzip.compress(corpo, compresslevel=nivel_gzip)
+
+        response.set_data(comprimido)
+        response.headers['Content-Encoding'] = codificacao
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def etag_condicional(versao_do_conteudo: Callable[[str], Optional[str]]):
+    """
+    Decorador de rotas GET com <dataset_id>. A ETag é derivada da versão do
+    conteúdo do dataset (versao_do_conteudo(dataset_id)), da URL completa, de
+    VERSAO_RESPOSTAS e da compressão negociada pelo Accept-Encoding (o corpo em
+    gzip, brotli ou sem compressão não tem a mesma ETag forte); se o cliente
+    enviar a mesma ETag em If-None-Match a rota nem é executada e a resposta é 304.
+    """
+
+    def decorador(rota):
+        @wraps(rota)
+        def wrapper(dataset_id, *args, **kwargs):
+            versao = versao_do_conteudo(dataset_id)
+            if versao is None:
+                return rota(dataset_id, *args, **kwargs)  # a própria rota responde 404
+
+            codificacao = _escolher_codificacao(request.accept_encodings) or 'identity'
+            chave = f'{VERSAO_RESPOSTAS}:{versao}:{request.full_path}:{codificacao}'
+            etag = hashlib.sha256(chave.encode('utf-8')).hexdigest()[:32]
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(rota(dataset_id, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'  # sempre revalidar
+            # A ETag depende do Accept-Encoding, mesmo quando o corpo não chega a ser comprimido
+            response.vary.add('Accept-Encoding')
+            return response
+
+        return wrapper
+
+    return decorador
+
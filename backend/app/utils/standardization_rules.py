@@ -0,0 +1,322 @@
+# backend/app/utils/standardization_rules.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.config import Config
+from app.utils.text_matching import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato do arquivo de regras aceita por esta versão do código
+VERSAO_FORMATO = 1
+
+# Seções obrigatórias do arquivo de regras
+SECOES = ['colunas', 'curso', 'faixa_etaria', 'renda', 'escolaridade', 'avaliacoes', 'desafios',
+          'cursos_desejados']
+
+# Categorias de desafio viram colunas do dataset limpo (desafio_<categoria>)
+_NOME_CATEGORIA_DESAFIO = re.compile(r'[a-z0-9_]+')
+
+
+class MemoPadronizacao:
+    """
+    Memória valor original -> valor padronizado de uma regra.
+    As respostas do formulário têm pouquíssimos valores distintos, então quase
+    todos os valores de um upload já foram padronizados em uploads anteriores.
+    Só guarda textos; ao chegar a max_valores a memória é esvaziada.
+    """
+
+    def __init__(self, max_valores: int = 10_000):
+        self.max_valores = max_valores
+        self._valores: Dict[str, Any] = {}
+        self.acertos = 0
+        self.faltas = 0
+
+    def consultar(self, unicos) -> Tuple[np.ndarray, List[int]]:
+        """
+        Retorna: os valores padronizados já conhecidos (None nos demais) e as
+        posições dos valores que ainda precisam ser padronizados
+        """
+        padronizados = np.empty(len(unicos), dtype=object)
+        faltando = []
+        valores = self._valores
+        for i, valor in enumerate(unicos):
+            if isinstance(valor, str) and valor in valores:
+                padronizados[i] = valores[valor]
+            else:
+                faltando.append(i)
+        self.acertos += len(unicos) - len(faltando)
+        self.faltas += len(faltando)
+        return padronizados, faltando
+
+    def guardar(self, originais, padronizados):
+        if len(self._valores) + len(originais) > self.max_valores:
+            self._valores = {}
+        for original, padronizado in zip(originais, padronizados):
+            if isinstance(original, str):
+                self._valores[original] = padronizado
+
+    def stats(self) -> Dict[str, int]:
+        return {'valores': len(self._valores), 'acertos': self.acertos, 'faltas': self.faltas}
+
+
+class RegrasPadronizacao:
+    """
+    Regras de padronização já validadas e compiladas em tabelas de consulta,
+    expressões regulares e categorizadores de palavras-chave.
+    Cada instância tem as suas memórias (memo); recarregar as regras gera uma
+    instância nova, então valores padronizados pelas regras antigas não são reaproveitados.
+    """
+
+    def __init__(self, dados: Dict[str, Any], versao: str, max_memo: int = 10_000):
+        self.versao = versao
+
+        self.colunas: Dict[str, str] = dict(dados['colunas'])
+
+        remover = dados['curso']['remover']
+        self.curso_remover = re.compile('|'.join(re.escape(t) for t in remover)) if remover else None
+
+        faixa = dados['faixa_etaria']
+        self.faixas_validas: List[str] = list(faixa['validas'])
+        self.faixa_termos_nao_informado: List[str] = list(faixa['nao_informado_se_contem'])
+        self.faixa_nao_informado = _alternativa(self.faixa_termos_nao_informado)
+        self.faixa_vazio: str = faixa['vazio']
+        self.faixa_outra: str = faixa['outra']
+
+        renda = dados['renda']
+        # (termos em minúsculas, expressão compilada, categoria), na ordem do arquivo
+        self.renda_regras = []
+        for regra in renda['regras']:
+            termos = [t.lower() for t in regra['contem']]
+            self.renda_regras.append((termos, _alternativa(termos), regra['categoria']))
+        self.renda_vazio: str = renda['vazio']
+        self.renda_padrao: str = renda['padrao']
+
+        self.escolaridade_mapa: Dict[str, str] = dict(dados['escolaridade']['mapa'])
+        self.escolaridade_padrao: str = dados['escolaridade']['padrao']
+
+        self.notas_avaliacao: Dict[str, int] = dict(dados['avaliacoes']['notas'])
+
+        self.matcher_desafios = KeywordMatcher(dados['desafios']['categorias'],
+                                               palavra_inteira=dados['desafios']['palavra_inteira'])
+        self.matcher_cursos = KeywordMatcher(dados['cursos_desejados']['categorias'],
+                                             palavra_inteira=dados['cursos_desejados']['palavra_inteira'])
+
+        self._memos: Dict[str, MemoPadronizacao] = {}
+        self._max_memo = max_memo
+        self._memos_lock = threading.Lock()
+
+    def memo(self, nome: str) -> MemoPadronizacao:
+        """Memória da regra `nome` (criada no primeiro uso)."""
+        memo = self._memos.get(nome)
+        if memo is None:
+            with self._memos_lock:
+                memo = self._memos.setdefault(nome, MemoPadronizacao(self._max_memo))
+        return memo
+
+    def stats(self) -> Dict[str, Any]:
+        return {'versao': self.versao, 'memo': {nome: memo.stats() for nome, memo in self._memos.items()}}
+
+
+def _alternativa(termos: List[str]) -> Optional['re.Pattern']:
+    """Expressão que encontra qualquer um dos trechos (literais) de `termos`."""
+    return re.compile('|'.join(re.escape(t) for t in termos)) if termos else None
+
+
+def validar_regras(dados: Any) -> List[str]:
+    """
+    Confere a estrutura do arquivo de regras.
+    Retorna: lista de erros (vazia se as regras são válidas)
+    """
+    if not isinstance(dados, dict):
+        return ['O arquivo de regras deve conter um objeto JSON']
+
+    erros = []
+    if dados.get('versao_formato') != VERSAO_FORMATO:
+        erros.append(f"versao_formato deve ser {VERSAO_FORMATO}")
+    for secao in SECOES:
+        if not isinstance(dados.get(secao), dict):
+            erros.append(f"Seção '{secao}' ausente ou não é um objeto")
+    if erros:
+        return erros
+
+    def textos(valor, campo: str, vazio: bool = False):
+        if (not isinstance(valor, list) or not all(isinstance(t, str) and t for t in valor)
+                or (not vazio and not valor)):
+            erros.append(f"{campo} deve ser uma lista de textos não vazios")
+
+    def texto(valor, campo: str):
+        if not isinstance(valor, str) or not valor:
+            erros.append(f"{campo} deve ser um texto não vazio")
+
+    def mapa(valor, campo: str, tipo=str):
+        if not isinstance(valor, dict) or not valor or not all(
+                isinstance(k, str) and isinstance(v, tipo) and not isinstance(v, bool) for k, v in valor.items()):
+            erros.append(f"{campo} deve ser um objeto não vazio de textos para {tipo.__name__}")
+
+    mapa(dados['colunas'], 'colunas')
+    textos(dados['curso'].get('remover'), 'curso.remover', vazio=True)
+
+    faixa = dados['faixa_etaria']
+    textos(faixa.get('validas'), 'faixa_etaria.validas')
+    textos(faixa.get('nao_informado_se_contem'), 'faixa_etaria.nao_informado_se_contem', vazio=True)
+    texto(faixa.get('vazio'), 'faixa_etaria.vazio')
+    texto(faixa.get('outra'), 'faixa_etaria.outra')
+
+    renda = dados['renda']
+    regras = renda.get('regras')
+    if not isinstance(regras, list) or not regras:
+        erros.append('renda.regras deve ser uma lista não vazia')
+    else:
+        for i, regra in enumerate(regras):
+            if not isinstance(regra, dict):
+                erros.append(f"renda.regras[{i}] deve ser um objeto")
+                continue
+            textos(regra.get('contem'), f'renda.regras[{i}].contem')
+            texto(regra.get('categoria'), f'renda.regras[{i}].categoria')
+    texto(renda.get('vazio'), 'renda.vazio')
+    texto(renda.get('padrao'), 'renda.padrao')
+
+    mapa(dados['escolaridade'].get('mapa'), 'escolaridade.mapa')
+    texto(dados['escolaridade'].get('padrao'), 'escolaridade.padrao')
+
+    notas = dados['avaliacoes'].get('notas')
+    mapa(notas, 'avaliacoes.notas', int)
+    if isinstance(notas, dict) and any(isinstance(v, int) and not 0 < v <= 5 for v in notas.values()):
+        erros.append('avaliacoes.notas deve usar notas de 1 a 5')
+
+    for secao in ('desafios', 'cursos_desejados'):
+        if not isinstance(dados[secao].get('palavra_inteira'), bool):
+            erros.append(f"{secao}.palavra_inteira deve ser true ou false")
+        categorias = dados[secao].get('categorias')
+        if not isinstance(categorias, dict) or not categorias:
+            erros.append(f"{secao}.categorias deve ser um objeto não vazio")
+            continue
+        for categoria, palavras in categorias.items():
+            textos(palavras, f'{secao}.categorias.{categoria}')
+            if secao == 'desafios' and not _NOME_CATEGORIA_DESAFIO.fullmatch(categoria):
+                erros.append(f"Categoria de desafio inválida: '{categoria}' (use a-z, 0-9 e _)")
+    return erros
+
+
+def carregar_regras(caminho: str) -> RegrasPadronizacao:
+    """
+    Lê, valida e compila o arquivo de regras.
+    Levanta: ValueError se o arquivo não é um JSON válido ou as regras são inválidas
+    """
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    try:
+        dados = json.loads(conteudo)
+    except ValueError as e:
+        raise ValueError(f"Arquivo de regras {caminho} não é um JSON válido: {e}")
+
+    erros = validar_regras(dados)
+    if erros:
+        raise ValueError(f"Regras de padronização inválidas em {caminho}: {'; '.join(erros)}")
+    return RegrasPadronizacao(dados, hashlib.sha256(conteudo).hexdigest()[:12])
+
+
+class GerenciadorRegras:
+    """
+    Regras de padronização em uso pela aplicação.
+
+    As regras são carregadas uma vez (configure, na criação da aplicação) e
+    recarregadas quando o arquivo muda: no máximo a cada `intervalo` segundos
+    a data de modificação do arquivo é conferida. Cada worker confere por
+    conta própria, então editar o arquivo atualiza todos sem reiniciá-los.
+    Um arquivo inválido na recarga é ignorado (as regras anteriores continuam
+    valendo); na inicialização, ele impede a aplicação de subir.
+
+    As categorias de desafio definem colunas do dataset limpo e do cubo, por
+    isso não podem mudar na recarga (só as palavras-chave de cada uma).
+    """
+
+    def __init__(self):
+        self.caminho = Config.STANDARDIZATION_RULES_FILE
+        self.intervalo = Config.STANDARDIZATION_RULES_RELOAD_SECONDS
+        self._regras: Optional[RegrasPadronizacao] = None
+        self._assinatura = None
+        self._assinatura_rejeitada = None
+        self._verificado_em = 0.0
+        self._recargas = 0
+        self._lock = threading.Lock()
+
+    def configure(self, caminho: Optional[str] = None, intervalo: Optional[float] = None):
+        with self._lock:
+            if caminho is not None:
+                self.caminho = caminho
+            if intervalo is not None:
+                self.intervalo = intervalo
+            self._carregar()
+
+    def atuais(self) -> RegrasPadronizacao:
+        """Regras em uso (recarregadas antes, se o arquivo mudou)."""
+        regras = self._regras
+        if regras is None:
+            with self._lock:
+                if self._regras is None:
+                    self._carregar()
+                return self._regras
+        if self.intervalo > 0 and time.monotonic() - self._verificado_em >= self.intervalo:
+            self.recarregar_se_mudou()
+        return self._regras
+
+    def recarregar_se_mudou(self) -> bool:
+        """
+        Recarrega as regras se o arquivo mudou desde a última leitura.
+        Retorna: True se novas regras passaram a valer
+        """
+        with self._lock:
+            if self._regras is None:
+                self._carregar()
+                return True
+            self._verificado_em = time.monotonic()
+            assinatura = None
+            try:
+                assinatura = _assinatura(self.caminho)
+                if assinatura in (self._assinatura, self._assinatura_rejeitada):
+                    return False
+                self._carregar()
+            except (OSError, ValueError) as e:
+                # O mesmo arquivo inválido não é lido (nem registrado no log) de novo
+                self._assinatura_rejeitada = assinatura
+                logger.error(f"Regras de padronização não recarregadas (mantida a versão "
+                             f"{self._regras.versao}): {e}")
+                return False
+            self._recargas += 1
+            logger.info(f"Regras de padronização recarregadas: versão {self._regras.versao}")
+            return True
+
+    def _carregar(self):
+        assinatura = _assinatura(self.caminho)
+        regras = carregar_regras(self.caminho)
+        if self._regras is not None:
+            antigas = self._regras.matcher_desafios.categorias
+            if regras.matcher_desafios.categorias != antigas:
+                raise ValueError('As categorias de desafio não podem mudar sem reiniciar a aplicação '
+                                 f"(em uso: {', '.join(antigas)})")
+        self._regras = regras
+        self._assinatura = assinatura
+        self._verificado_em = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        regras = self.atuais()
+        return {'arquivo': self.caminho, 'recargas': self._recargas, **regras.stats()}
+
+
+def _assinatura(caminho: str) -> Tuple[int, int]:
+    info = os.stat(caminho)
+    return info.st_mtime_ns, info.st_size
+
+
+# Instância compartilhada pela aplicação (configurada em create_app)
+regras_padronizacao = GerenciadorRegras()
@@ -0,0 +1,124 @@
+# backend/app/utils/text_matching.py
+import re
+import unicodedata
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Marcas diacríticas que sobram após a normalização NFKD ("ã" -> "a" + "~")
+_MARCAS_DIACRITICAS = re.compile(r'[\u0300-\u036f]')
+# Sufixos de plural aceitos quando as palavras-chave exigem palavra inteira
+_SUFIXO_PLURAL = '(?:s|es)?'
+
+
+def remover_acentos(texto: str) -> str:
+    """Remove os acentos de um texto ("distância" -> "distancia")."""
+    return _MARCAS_DIACRITICAS.sub('', unicodedata.normalize('NFKD', texto))
+
+
+class KeywordMatcher:
+    """
+    Categorizador de texto por palavras-chave.
+
+    A taxonomia ({categoria: [palavras]}) é compilada uma única vez em uma
+    expressão regular com alternância, com um grupo nomeado por categoria,
+    e cada texto é percorrido em uma só passada. Os textos são processados
+    por valor distinto, já que respostas de formulário se repetem muito.
+
+    palavra_inteira: só conta ocorrências como palavra inteira (aceitando
+        plural), ou seja, 'casa' não conta em 'casamento'
+    ignorar_acentos: 'onibus' e 'ônibus' são equivalentes
+    """
+
+    def __init__(self, taxonomia: Dict[str, List[str]], palavra_inteira: bool = True,
+                 ignorar_acentos: bool = True):
+        if not taxonomia:
+            raise ValueError('A taxonomia de palavras-chave está vazia')
+
+        self.categorias = list(taxonomia)
+        self.palavra_inteira = palavra_inteira
+        self.ignorar_acentos = ignorar_acentos
+
+        grupos = []
+        self._padroes_categoria = []
+        self._grupo_para_indice = {}
+        for indice, (categoria, palavras) in enumerate(taxonomia.items()):
+            alternativas = self._alternativas(palavras)
+            if not alternativas:
+                raise ValueError(f"Categoria sem palavras-chave: {categoria}")
+            grupo = f'c{indice}'
+            self._grupo_para_indice[grupo] = indice
+            grupos.append(f'(?P<{grupo}>{alternativas})')
+            self._padroes_categoria.append(re.compile(self._delimitar(alternativas)))
+
+        self.pattern = re.compile(self._delimitar('|'.join(grupos)))
+
+    def _alternativas(self, palavras: List[str]) -> str:
+        normalizadas = {self.normalizar(palavra) for palavra in palavras if palavra.strip()}
+        # Mais longas primeiro: 'filhos' tem prioridade sobre 'filho' na mesma posição
+        return '|'.join(re.escape(p) for p in sorted(normalizadas, key=lambda p: (-len(p), p)))
+
+    def _delimitar(self, alternativas: str) -> str:
+        if self.palavra_inteira:
+            return rf'(?<!\w)(?:{alternativas}){_SUFIXO_PLURAL}(?!\w)'
+        return f'(?:{alternativas})'
+
+    def normalizar(self, texto: str) -> str:
+        texto = texto.strip().lower()
+        return remover_acentos(texto) if self.ignorar_acentos else texto
+
+    def _normalizar_series(self, series: pd.Series) -> pd.Series:
+        texto = series.astype(str).str.lower()
+        if self.ignorar_acentos:
+            texto = texto.str.normalize('NFKD').str.replace(_MARCAS_DIACRITICAS, '', regex=True)
+        return texto
+
+    # --- Consultas ---
+
+    def hits_por_resposta(self, series: pd.Series) -> pd.DataFrame:
+        """
+        Número de menções de cada categoria em cada resposta.
+        Retorna: DataFrame com o mesmo índice de `series` e uma coluna por categoria
+        """
+        codes, unicos = pd.factorize(series.fillna(''))
+        textos = self._normalizar_series(pd.Series(unicos, dtype=object))
+
+        matriz = np.zeros((len(textos), len(self.categorias)), dtype=np.int32)
+        for linha, texto in enumerate(textos):
+            for match in self.pattern.finditer(texto):
+                matriz[linha, self._grupo_para_indice[match.lastgroup]] += 1
+
+        return pd.DataFrame(matriz.take(codes, axis=0), index=series.index, columns=self.categorias)
+
+    def presenca_por_resposta(self, series: pd.Series) -> pd.DataFrame:
+        """
+        Matriz multi-rótulo: 1 se a resposta cita alguma palavra-chave da
+        categoria, 0 se não (uint8, uma coluna por categoria).
+        Cada categoria é um str.contains vetorizado sobre os textos distintos.
+        """
+        codes, unicos = pd.factorize(series.fillna(''))
+        textos = self._normalizar_series(pd.Series(unicos, dtype=object))
+
+        matriz = np.zeros((len(textos), len(self.categorias)), dtype=np.uint8)
+        for indice, padrao in enumerate(self._padroes_categoria):
+            matriz[:, indice] = textos.str.contains(padrao).to_numpy(dtype=bool)
+
+        return pd.DataFrame(matriz.take(codes, axis=0), index=series.index, columns=self.categorias)
+
+    def contar(self, series: pd.Series) -> Dict[str, int]:
+        """Total de menções de cada categoria (inclusive as com zero menções)."""
+        totais = self.hits_por_resposta(series).sum()
+        return {categoria: int(totais[categoria]) for categoria in self.categorias}
+
+    def primeira_categoria(self, series: pd.Series) -> pd.Series:
+        """
+        Para cada texto, a primeira categoria (na ordem da taxonomia) com alguma
+        palavra-chave presente, ou None. Equivale a uma cadeia de if/elif.
+        """
+        codes, unicos = pd.factorize(series.fillna(''))
+        textos = self._normalizar_series(pd.Series(unicos, dtype=object))
+
+        condicoes = [textos.str.contains(padrao).to_numpy(dtype=bool) for padrao in self._padroes_categoria]
+        escolhidas = np.select(condicoes, self.categorias, default=None).astype(object)
+        return pd.Series(escolhidas.take(codes), index=series.index, dtype=object)
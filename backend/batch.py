@@ -0,0 +1,41 @@
+"""
+Análise em lote pela linha de comando (sem subir o servidor).
+
+Exemplo:
+    python batch.py exports/ outro_campus.csv --workers 4 --max-memory-mb 2048 -o relatorio.json
+"""
+import argparse
+import json
+import sys
+
+from app.services.batch_service import DEFAULT_BATCH_CHUNK_ROWS, analisar_arquivos, listar_csvs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Análise detalhada de vários CSVs do Mulheres Mil em paralelo')
+    parser.add_argument('caminhos', nargs='+', help='Arquivos CSV ou diretórios com arquivos CSV')
+    parser.add_argument('--workers', type=int, default=None, help='Número máximo de processos (padrão: CPUs)')
+    parser.add_argument('--max-memory-mb', type=int, default=None, help='Limite de memória por processo, em MB')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_BATCH_CHUNK_ROWS, help='Linhas lidas por bloco')
+    parser.add_argument('-o', '--output', help='Arquivo JSON de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    arquivos = listar_csvs(args.caminhos)
+    if not arquivos:
+        parser.error('Nenhum arquivo CSV encontrado')
+
+    result = analisar_arquivos(arquivos, max_workers=args.workers,
+                               limite_memoria_mb=args.max_memory_mb, chunksize=args.chunk_rows)
+
+    saida = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    else:
+        print(saida)
+
+    return 1 if result['arquivos_com_erro'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
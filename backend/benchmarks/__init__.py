@@ -0,0 +1,10 @@
+"""
+Benchmarks do pipeline de dados do Mulheres Mil.
+
+- gerador: gera CSVs sintéticos (com semente) no formato do formulário
+- pipeline: mede tempo e pico de memória de cada etapa do processamento
+- carga: teste de carga da API (vazão, latência p50/p95/p99 e memória)
+
+Execute a partir da pasta backend/, por exemplo:
+    python -m benchmarks.pipeline --rows 1000 100000 1000000 -o resultados.json
+"""
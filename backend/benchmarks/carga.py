@@ -0,0 +1,406 @@
+"""
+Teste de carga da API: sobe a aplicação (create_app) localmente, em um
+processo separado, e dispara requisições concorrentes de /api/data/upload,
+/api/data/basic-stats e /api/analysis/detailed com respostas sintéticas.
+
+Para cada nível de concorrência mede a vazão (requisições/s), a latência
+(p50/p95/p99) de cada rota e a memória residente (RSS) dos processos do
+servidor. Roda offline, em uma única máquina, para comparar modos de servir
+(servidor do Flask x gunicorn com vários workers) e versões do código.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga --rows 5000 --concorrencia 1 4 8 --duracao 20 -o carga.json
+    python -m benchmarks.carga --servidor gunicorn --workers 2 --threads 4 --mix upload=1 detailed=2
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.gerador import gerar_csv
+from benchmarks.pipeline import _metadata
+
+# Rotas exercitadas e como o CSV é enviado em cada uma
+ROTAS = {
+    'upload': ('/api/data/upload', 'multipart'),
+    'basic-stats': ('/api/data/basic-stats', 'csv'),
+    'detailed': ('/api/analysis/detailed', 'multipart')
+}
+
+PASTA_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+# --- Servidor ---
+
+class Servidor:
+    """
+    Processo do servidor sob teste, com uploads e datasets em uma pasta temporária:
+
+    - 'flask': create_app().run(threaded=True), o servidor de desenvolvimento
+    - 'gunicorn': gunicorn -c gunicorn.conf.py (wsgi.py, com aquecimento)
+    """
+
+    def __init__(self, modo: str = 'flask', porta: int = 5099, workers: int = 2, threads: int = 4):
+        self.modo = modo
+        self.porta = porta
+        self.workers = workers
+        self.threads = threads
+        self.url = f'http://127.0.0.1:{porta}'
+        self.processo: Optional[subprocess.Popen] = None
+        self.pasta = tempfile.mkdtemp(prefix='carga-')
+        self._log = None
+
+    def __enter__(self) -> 'Servidor':
+        env = dict(os.environ, UPLOAD_FOLDER=os.path.join(self.pasta, 'uploads'))
+        if self.modo == 'gunicorn':
+            env.update(WEB_BIND=f'127.0.0.1:{self.porta}', WEB_WORKERS=str(self.workers),
+                       WEB_THREADS=str(self.threads))
+            comando = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']
+        elif self.modo == 'flask':
+            comando = [sys.executable, '-c',
+                       'from app import create_app; '
+                       f"create_app().run(host='127.0.0.1', port={self.porta}, threaded=True)"]
+        else:
+            raise ValueError(f"Modo de servidor inválido: {self.modo}")
+
+        self._log = open(os.path.join(self.pasta, 'servidor.log'), 'wb')
+        self.processo = subprocess.Popen(comando, cwd=PASTA_BACKEND, env=env,
+                                         stdout=self._log, stderr=subprocess.STDOUT)
+        self._aguardar()
+        return self
+
+    def _aguardar(self, limite: float = 60.0):
+        fim = time.monotonic() + limite
+        while time.monotonic() < fim:
+            if self.processo.poll() is not None:
+                raise RuntimeError(f'O servidor terminou ao iniciar. Log:\n{self.log()}')
+            try:
+                status, _ = _requisicao(self.url, 'GET', '/api/data/cache/stats', timeout=2)
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f'O servidor não respondeu em {limite:.0f}s. Log:\n{self.log()}')
+
+    def log(self) -> str:
+        with open(os.path.join(self.pasta, 'servidor.log'), 'rb') as f:
+            return f.read().decode('utf-8', errors='replace')[-4000:]
+
+    def pids(self) -> List[int]:
+        """PID do servidor e dos seus processos filhos (workers do gunicorn)."""
+        if self.processo is None:
+            return []
+        return [self.processo.pid] + _filhos(self.processo.pid)
+
+    def __exit__(self, *exc):
+        if self.processo is not None and self.processo.poll() is None:
+            self.processo.terminate()
+            try:
+                self.processo.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.processo.kill()
+        if self._log is not None:
+            self._log.close()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+def _filhos(pid: int) -> List[int]:
+    filhos = []
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as f:
+                # O nome do processo (2º campo) pode ter espaços: o PPID vem depois do ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            filhos.append(int(entrada))
+    return filhos
+
+
+def _rss(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MonitorMemoria:
+    """Amostra periodicamente o RSS de cada processo do servidor (pico e último valor)."""
+
+    def __init__(self, servidor: Optional[Servidor], intervalo: float = 0.25):
+        self.servidor = servidor
+        self.intervalo = intervalo
+        self.picos: Dict[int, int] = {}
+        self.finais: Dict[int, int] = {}
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+
+    def __enter__(self) -> 'MonitorMemoria':
+        if self.servidor is not None:
+            self._thread.start()
+        return self
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self._amostrar()
+            self._parar.wait(self.intervalo)
+
+    def _amostrar(self):
+        total = 0
+        for pid in self.servidor.pids():
+            rss = _rss(pid)
+            if rss is None:
+                continue
+            total += rss
+            self.finais[pid] = rss
+            self.picos[pid] = max(self.picos.get(pid, 0), rss)
+        self.picos[0] = max(self.picos.get(0, 0), total)  # 0 = soma de todos os processos
+
+    def __exit__(self, *exc):
+        if self.servidor is not None:
+            self._parar.set()
+            self._thread.join()
+            self._amostrar()
+
+    def resultado(self) -> Optional[Dict[str, Any]]:
+        if self.servidor is None:
+            return None
+        mb = lambda b: round(b / 1024 ** 2, 1)
+        principal = self.servidor.processo.pid
+        return {
+            'processos': [
+                {'pid': pid, 'papel': 'principal' if pid == principal else 'worker',
+                 'pico_rss_mb': mb(pico), 'final_rss_mb': mb(self.finais.get(pid, 0))}
+                for pid, pico in sorted(self.picos.items()) if pid != 0
+            ],
+            # Soma dos RSS: páginas compartilhadas (copy-on-write) contam em cada processo
+            'pico_rss_total_mb': mb(self.picos.get(0, 0))
+        }
+
+
+# --- Cliente ---
+
+def _requisicao(url: str, metodo: str, caminho: str, corpo: Optional[bytes] = None,
+                content_type: Optional[str] = None, timeout: float = 120.0) -> Tuple[int, int]:
+    """Executa uma requisição HTTP. Retorna (status, bytes da resposta)."""
+    partes = urlsplit(url)
+    conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=timeout)
+    try:
+        headers = {'Accept-Encoding': 'gzip'}
+        if content_type:
+            headers['Content-Type'] = content_type
+        conexao.request(metodo, caminho, body=corpo, headers=headers)
+        resposta = conexao.getresponse()
+        return resposta.status, len(resposta.read())
+    finally:
+        conexao.close()
+
+
+def _multipart(conteudo: bytes, nome: str = 'respostas.csv') -> Tuple[bytes, str]:
+    fronteira = uuid.uuid4().hex
+    inicio = (f'--{fronteira}\r\nContent-Disposition: form-data; name="file"; filename="{nome}"\r\n'
+              'Content-Type: text/csv\r\n\r\n').encode('utf-8')
+    return inicio + conteudo + f'\r\n--{fronteira}--\r\n'.encode('utf-8'), \
+        f'multipart/form-data; boundary={fronteira}'
+
+
+class Payloads:
+    """
+    CSVs enviados nas requisições. Com unicos=True cada requisição recebe um
+    conteúdo diferente (a última resposta do CSV base com outro timestamp), para
+    que o cache por hash do conteúdo não responda no lugar do processamento.
+    """
+
+    def __init__(self, csv_base: bytes, unicos: bool = True):
+        self.unicos = unicos
+        corpo = csv_base.rstrip(b'\n')
+        self._base, ultima = corpo.rsplit(b'\n', 1)
+        self._resto_ultima = ultima.split(b',', 1)[1]
+        self._contador = 0
+        self._lock = threading.Lock()
+        self.csv_base = csv_base
+
+    def proximo(self) -> bytes:
+        if not self.unicos:
+            return self.csv_base
+        with self._lock:
+            self._contador += 1
+            n = self._contador
+        dia, resto = divmod(n, 86400)
+        timestamp = time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(1_704_067_200 + dia * 86400 + resto))
+        return b'\n'.join([self._base, timestamp.encode() + b',' + self._resto_ultima]) + b'\n'
+
+
+def _enviar(url: str, rota: str, payloads: Payloads, timeout: float) -> Tuple[str, float, bool]:
+    caminho, formato = ROTAS[rota]
+    conteudo = payloads.proximo()
+    if formato == 'multipart':
+        corpo, content_type = _multipart(conteudo)
+    else:
+        corpo, content_type = conteudo, 'text/csv'
+
+    inicio = time.perf_counter()
+    try:
+        status, _ = _requisicao(url, 'POST', caminho, corpo, content_type, timeout)
+        sucesso = status == 200
+    except OSError:
+        sucesso = False
+    return rota, time.perf_counter() - inicio, sucesso
+
+
+def _percentis(latencias: List[float]) -> Dict[str, Optional[float]]:
+    if not latencias:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'media_ms': None, 'max_ms': None}
+    valores = np.asarray(latencias) * 1000
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 1), 'p95_ms': round(float(p95), 1), 'p99_ms': round(float(p99), 1),
+            'media_ms': round(float(valores.mean()), 1), 'max_ms': round(float(valores.max()), 1)}
+
+
+def executar_nivel(url: str, concorrencia: int, duracao: float, mix: Dict[str, float],
+                   payloads: Payloads, seed: int = 42, timeout: float = 120.0,
+                   servidor: Optional[Servidor] = None) -> Dict[str, Any]:
+    """
+    Mantém `concorrencia` clientes enviando requisições (uma após a outra, rota
+    sorteada pelos pesos de mix) durante `duracao` segundos.
+    """
+    rng = np.random.default_rng(seed)
+    rotas = list(mix)
+    pesos = np.asarray([mix[r] for r in rotas], dtype=float)
+    pesos /= pesos.sum()
+    sorteio_lock = threading.Lock()
+    medicoes: List[Tuple[str, float, bool]] = []
+    fim = time.monotonic() + duracao
+
+    def cliente():
+        while time.monotonic() < fim:
+            with sorteio_lock:
+                rota = rotas[rng.choice(len(rotas), p=pesos)]
+            medicoes.append(_enviar(url, rota, payloads, timeout))
+
+    inicio = time.perf_counter()
+    with MonitorMemoria(servidor) as memoria:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            for futuro in [executor.submit(cliente) for _ in range(concorrencia)]:
+                futuro.result()
+    segundos = time.perf_counter() - inicio
+
+    por_rota = {}
+    for rota in rotas:
+        dados = [(lat, ok) for r, lat, ok in medicoes if r == rota]
+        sucessos = [lat for lat, ok in dados if ok]
+        por_rota[rota] = {
+            'requisicoes': len(dados),
+            'erros': len(dados) - len(sucessos),
+            'vazao_rps': round(len(sucessos) / segundos, 2),
+            **_percentis(sucessos)
+        }
+    sucessos = [lat for _, lat, ok in medicoes if ok]
+    resultado = {
+        'concorrencia': concorrencia,
+        'segundos': round(segundos, 2),
+        'requisicoes': len(medicoes),
+        'erros': len(medicoes) - len(sucessos),
+        'vazao_rps': round(len(sucessos) / segundos, 2),
+        **_percentis(sucessos),
+        'rotas': por_rota,
+        'memoria': memoria.resultado()
+    }
+    print(f"[concorrência {concorrencia}] {resultado['vazao_rps']} req/s, p50 {resultado['p50_ms']} ms, "
+          f"p95 {resultado['p95_ms']} ms, p99 {resultado['p99_ms']} ms, {resultado['erros']} erro(s)",
+          file=sys.stderr)
+    return resultado
+
+
+def executar(niveis: List[int], duracao: float, mix: Dict[str, float], linhas: int = 5000,
+             seed: int = 42, modo: str = 'flask', workers: int = 2, threads: int = 4,
+             porta: int = 5099, url: Optional[str] = None, conteudo_unico: bool = True,
+             timeout: float = 120.0) -> Dict[str, Any]:
+    """Executa o cenário em cada nível de concorrência e retorna o resultado completo."""
+    invalidas = set(mix) - set(ROTAS)
+    if invalidas:
+        raise ValueError(f"Rota desconhecida: {', '.join(sorted(invalidas))} (use {', '.join(ROTAS)})")
+
+    payloads = Payloads(gerar_csv(linhas, seed), unicos=conteudo_unico)
+    config = {'linhas': linhas, 'bytes_csv': len(payloads.csv_base), 'duracao_s': duracao, 'mix': mix,
+              'servidor': 'externo' if url else modo, 'conteudo_unico': conteudo_unico}
+    if modo == 'gunicorn' and not url:
+        config.update(workers=workers, threads=threads)
+
+    if url:
+        resultados = [executar_nivel(url, n, duracao, mix, payloads, seed, timeout) for n in niveis]
+    else:
+        with Servidor(modo, porta, workers, threads) as servidor:
+            resultados = [executar_nivel(servidor.url, n, duracao, mix, payloads, seed, timeout, servidor)
+                          for n in niveis]
+
+    return {'metadata': _metadata(seed), 'config': config, 'resultados': resultados}
+
+
+def _ler_mix(itens: List[str]) -> Dict[str, float]:
+    mix = {}
+    for item in itens:
+        rota, _, peso = item.partition('=')
+        mix[rota] = float(peso) if peso else 1.0
+    return mix
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Teste de carga da API do Mulheres Mil')
+    parser.add_argument('--concorrencia', type=int, nargs='+', default=[1, 4, 8],
+                        help='Clientes simultâneos (um teste por valor)')
+    parser.add_argument('--duracao', type=float, default=20, help='Segundos de teste em cada nível')
+    parser.add_argument('--mix', nargs='+', default=['upload=1', 'basic-stats=1', 'detailed=1'],
+                        help='Rotas e pesos, ex.: upload=2 detailed=1')
+    parser.add_argument('--rows', type=int, default=5000, help='Respostas em cada CSV enviado')
+    parser.add_argument('--servidor', choices=['flask', 'gunicorn'], default='flask',
+                        help='Como servir a aplicação (gunicorn usa gunicorn.conf.py)')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn')
+    parser.add_argument('--threads', type=int, default=4, help='Threads por worker do gunicorn')
+    parser.add_argument('--porta', type=int, default=5099, help='Porta local do servidor sob teste')
+    parser.add_argument('--url', help='Testa um servidor já em execução (sem medir a memória)')
+    parser.add_argument('--repetir-conteudo', action='store_true',
+                        help='Envia sempre o mesmo CSV (mede as respostas servidas pelo cache)')
+    parser.add_argument('--timeout', type=float, default=120, help='Timeout de cada requisição (s)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador de dados')
+    parser.add_argument('-o', '--output', help='Arquivo JSON de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    try:
+        resultado = executar(args.concorrencia, args.duracao, _ler_mix(args.mix), args.rows, args.seed,
+                             args.servidor, args.workers, args.threads, args.porta, args.url,
+                             not args.repetir_conteudo, args.timeout)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+
+    saida = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    else:
+        print(saida)
+
+    # Requisições com erro indicam que a instância não sustentou a carga
+    return 1 if any(r['erros'] for r in resultado['resultados']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
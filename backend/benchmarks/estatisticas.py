@@ -0,0 +1,82 @@
+"""
+Benchmark de generate_basic_stats em exports "largos", com muitas colunas de
+texto livre: compara a implementação em uma passada por coluna com a
+implementação original (generate_basic_stats_por_coluna), que percorre cada
+coluna várias vezes, e confere se as duas geram o mesmo resultado.
+
+Uso (a partir de backend/):
+    python -m benchmarks.estatisticas --rows 10000 100000 --colunas-texto 40 -o estatisticas.json
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.data_service import (
+    clean_and_standardize_data, generate_basic_stats, generate_basic_stats_por_coluna
+)
+from benchmarks.gerador import gerar_respostas_largas
+from benchmarks.pipeline import _metadata
+
+
+def _melhor_tempo(funcao: Callable[[], Any], repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def executar(tamanhos: List[int], colunas_texto: int = 40, seed: int = 42,
+             repeticoes: int = 3) -> Dict[str, Any]:
+    """Mede as duas implementações em cada tamanho e retorna o resultado completo."""
+    resultados = []
+    for linhas in tamanhos:
+        df, _ = clean_and_standardize_data(gerar_respostas_largas(linhas, colunas_texto, seed))
+
+        uma_passada = _melhor_tempo(lambda: generate_basic_stats(df), repeticoes)
+        por_coluna = _melhor_tempo(lambda: generate_basic_stats_por_coluna(df), repeticoes)
+        equivalentes = json.dumps(generate_basic_stats(df), sort_keys=True) == \
+            json.dumps(generate_basic_stats_por_coluna(df), sort_keys=True)
+
+        resultado = {
+            'linhas': linhas,
+            'colunas': df.shape[1],
+            'segundos': {'generate_basic_stats': uma_passada, 'generate_basic_stats_por_coluna': por_coluna},
+            'aceleracao': round(por_coluna / uma_passada, 2),
+            'equivalentes': equivalentes
+        }
+        print(f"[{linhas} linhas x {df.shape[1]} colunas] uma passada {uma_passada:.3f} s, "
+              f"por coluna {por_coluna:.3f} s ({resultado['aceleracao']}x)", file=sys.stderr)
+        resultados.append(resultado)
+
+    return {'metadata': _metadata(seed), 'colunas_texto': colunas_texto, 'resultados': resultados}
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark de generate_basic_stats em exports largos')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Tamanhos (número de respostas) a medir')
+    parser.add_argument('--colunas-texto', type=int, default=40, help='Colunas extras de texto livre')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por medição (vale a melhor)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador de dados')
+    parser.add_argument('-o', '--output', help='Arquivo JSON de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.rows, args.colunas_texto, args.seed, args.repeticoes)
+
+    saida = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    else:
+        print(saida)
+
+    # Resultado divergente entre as implementações é erro
+    return 0 if all(r['equivalentes'] for r in resultado['resultados']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
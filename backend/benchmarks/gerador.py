@@ -0,0 +1,144 @@
+"""
+Gerador de respostas sintéticas do formulário do Mulheres Mil.
+
+Usa exatamente os cabeçalhos do Google Forms esperados por
+standardize_specific_columns e inclui os "defeitos" encontrados nos dados
+reais: faixa etária preenchida com escolaridade, espaços extras, respostas
+em branco, renda em texto livre e desafios descritos em texto livre.
+
+Uso:
+    python -m benchmarks.gerador --rows 1000 --seed 42 -o amostra.csv
+"""
+import argparse
+import io
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Cabeçalhos originais do formulário (chaves do column_mapping), na ordem do export
+CABECALHOS = [
+    'Carimbo de data/hora',
+    'Nome do Curso:',
+    'Instituição Ofertante:',
+    'Faixa etária predominante',
+    'Profissão:',
+    'Situação Socioeconômica: Renda per capta:',
+    'Escolaridade:',
+    'Motivação para ingresso no curso:',
+    'Desafios enfrentados:',
+    'Avaliação do Coordenador do Programa em Jardim:',
+    'Avaliação da assistente pedagógica do programa em Jardim:',
+    'Avaliação das aulas do programa em Jardim:',
+    'O que o Curso de Assistente Administrativo contribuiu para a minha vida e formação?',
+    'Que outro Curso eu gostaria de fazer pelo Programa Mulheres Mil?'
+]
+
+# (valores, pesos) de cada resposta de múltipla escolha
+CURSOS = (['💻 Assistente Administrativo', 'Assistente Administrativo', 'Cuidador de Idosos',
+           'Auxiliar de Cozinha', 'Costureira'], [40, 20, 15, 15, 10])
+INSTITUICOES = (['IFMS - Campus Jardim', 'IFMS - Campus Campo Grande', 'IFMS - Campus Corumbá',
+                 'IFMS - Campus Ponta Porã', 'IFMS - Campus Três Lagoas'], [35, 25, 15, 15, 10])
+FAIXAS = (['16 a 26 anos', '27 a 36 anos', '37 a 46 anos', '47 a 56 anos', 'Mais de 56 anos',
+           'Ensino fundamental completo', ' 37 a 46 anos', '', '18 anos'], [18, 25, 27, 15, 8, 2, 2, 2, 1])
+PROFISSOES = (['Do lar', 'Diarista', 'Autônoma', 'Vendedora', 'Desempregada', 'Cozinheira', '', 'Estudante'],
+              [25, 15, 15, 10, 15, 5, 10, 5])
+RENDAS = (['Até 1 salário mínimo', 'Menos de 1 salário mínimo', 'De 1 a 2 salários mínimos',
+           'Mais de 3 salários mínimos', 'R$ 200,00', 'um salário', 'Não sei', ''],
+          [30, 20, 20, 5, 5, 5, 5, 10])
+ESCOLARIDADES = (['Ensino Fundamental: Anos Finais (6º ao 9º ano)', 'Ensino Médio Completo',
+                  'Ensino Médio Incompleto', 'Ensino Superior Completo', 'Ensino Superior Incompleto',
+                  'Ensino Fundamental: Anos Iniciais (1º ao 5º ano)', ''], [20, 30, 15, 8, 7, 15, 5])
+MOTIVACOES = (['Qualificação profissional', 'Conseguir um emprego', 'Abrir o meu próprio negócio',
+               'Voltar a estudar', 'Conhecer pessoas'], [30, 30, 15, 15, 10])
+AVALIACOES = (['Excelente', 'Bom', 'Regular', 'Ruim', 'Péssimo', ''], [45, 30, 12, 4, 2, 7])
+CONTRIBUICOES = (['Aprendi a usar o computador', 'Mais confiança para procurar emprego',
+                  'Fiz novas amizades', 'Aprendi a organizar documentos', ''], [25, 25, 20, 20, 10])
+PROXIMOS_CURSOS = (['Informática avançada', 'Enfermagem', 'Cuidador de idosos', 'Corte e costura',
+                    'Estética e beleza', 'Cabeleireira', 'Eletricista', 'Confeitaria', 'Libras', ''],
+                   [15, 10, 10, 10, 10, 5, 5, 15, 5, 15])
+# Frases combinadas (1 a 3 por resposta) para compor os desafios em texto livre
+FRASES_DESAFIOS = (['Transporte, o ônibus demora muito', 'A distância até o campus', 'Falta de tempo',
+                    'Horário corrido com o trabalho', 'Deixar os filhos com alguém',
+                    'Cuidar da casa e das crianças', 'Falta de dinheiro para a passagem',
+                    'Problemas de saúde, chegava cansada', 'Demora na entrega do material',
+                    'Meu casamento', 'Nenhum', ''], [12, 8, 10, 8, 10, 8, 10, 6, 4, 2, 12, 10])
+
+
+def _escolher(rng: np.random.Generator, opcoes, n: int) -> np.ndarray:
+    valores, pesos = opcoes
+    pesos = np.asarray(pesos, dtype=float)
+    return rng.choice(np.asarray(valores, dtype=object), size=n, p=pesos / pesos.sum())
+
+
+def gerar_respostas(n: int, seed: int = 42) -> pd.DataFrame:
+    """Gera n respostas sintéticas (DataFrame com os cabeçalhos originais)."""
+    rng = np.random.default_rng(seed)
+
+    inicio = pd.Timestamp('2024-03-01 08:00:00')
+    segundos = np.sort(rng.integers(0, 120 * 24 * 3600, size=n))
+    timestamps = (inicio + pd.to_timedelta(segundos, unit='s')).strftime('%d/%m/%Y %H:%M:%S')
+
+    desafios = _escolher(rng, FRASES_DESAFIOS, n)
+    for _ in range(2):
+        extra = _escolher(rng, FRASES_DESAFIOS, n)
+        incluir = (rng.random(n) < 0.35) & (extra != '') & (desafios != '')
+        desafios = np.where(incluir, desafios + '. ' + extra, desafios)
+
+    colunas = [
+        np.asarray(timestamps, dtype=object),
+        _escolher(rng, CURSOS, n),
+        _escolher(rng, INSTITUICOES, n),
+        _escolher(rng, FAIXAS, n),
+        _escolher(rng, PROFISSOES, n),
+        _escolher(rng, RENDAS, n),
+        _escolher(rng, ESCOLARIDADES, n),
+        _escolher(rng, MOTIVACOES, n),
+        desafios,
+        _escolher(rng, AVALIACOES, n),
+        _escolher(rng, AVALIACOES, n),
+        _escolher(rng, AVALIACOES, n),
+        _escolher(rng, CONTRIBUICOES, n),
+        _escolher(rng, PROXIMOS_CURSOS, n)
+    ]
+    return pd.DataFrame(dict(zip(CABECALHOS, colunas)))
+
+
+def gerar_respostas_largas(n: int, colunas_texto: int = 40, seed: int = 42) -> pd.DataFrame:
+    """
+    Export "largo": as respostas de gerar_respostas seguidas de colunas extras
+    de texto livre (perguntas abertas), como em formulários com muitas perguntas.
+    Cada coluna extra mistura respostas repetidas, únicas e em branco.
+    """
+    df = gerar_respostas(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    frases = np.asarray(FRASES_DESAFIOS[0] + CONTRIBUICOES[0] + MOTIVACOES[0], dtype=object)
+    for i in range(colunas_texto):
+        valores = rng.choice(frases, size=n)
+        unicas = rng.random(n) < 0.3
+        valores[unicas] = valores[unicas] + ' (' + rng.integers(0, n, size=int(unicas.sum())).astype(str) + ')'
+        valores[rng.random(n) < 0.1] = ''
+        df[f'Pergunta aberta {i + 1}:'] = valores
+    return df
+
+
+def gerar_csv(n: int, seed: int = 42) -> bytes:
+    """Gera n respostas sintéticas como o conteúdo (UTF-8) de um CSV exportado."""
+    buffer = io.StringIO()
+    gerar_respostas(n, seed).to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description='Gera um CSV sintético de respostas do Mulheres Mil')
+    parser.add_argument('--rows', type=int, default=1000, help='Número de respostas')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador aleatório')
+    parser.add_argument('-o', '--output', required=True, help='Arquivo CSV de saída')
+    args = parser.parse_args(argv)
+
+    with open(args.output, 'wb') as f:
+        f.write(gerar_csv(args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark das etapas do pipeline: leitura do CSV, limpeza/padronização,
+estatísticas básicas, análise detalhada e ingestão em blocos (streaming).
+
+Para cada tamanho de dataset mede o tempo de cada etapa e, em uma segunda
+execução com tracemalloc, o pico de memória alocada. O resultado é gravado em
+JSON e pode ser comparado com o de outra versão (--baseline) para acompanhar
+regressões.
+
+Uso (a partir de backend/):
+    python -m benchmarks.pipeline --rows 1000 100000 1000000 -o resultados.json
+    python -m benchmarks.pipeline --rows 100000 --baseline resultados.json
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_service import generate_detailed_analysis
+from app.services.data_service import clean_and_standardize_data, generate_basic_stats
+from app.services.streaming_service import process_csv_stream
+from benchmarks.gerador import gerar_csv
+
+# Variação de tempo (em relação ao baseline) a partir da qual uma etapa é marcada como regressão
+LIMITE_REGRESSAO = 1.25
+
+
+def _medir(funcao: Callable[[], Any], memoria: bool) -> Dict[str, Any]:
+    """Executa a função e mede o tempo (ou, com memoria=True, o pico de memória)."""
+    if not memoria:
+        inicio = time.perf_counter()
+        resultado = funcao()
+        return {'segundos': time.perf_counter() - inicio, 'resultado': resultado}
+
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'pico_bytes': pico, 'resultado': resultado}
+
+
+def _executar_etapas(csv_bytes: bytes, memoria: bool, comparar_modos: bool) -> Dict[str, Dict[str, Any]]:
+    etapas = {}
+
+    leitura = _medir(lambda: pd.read_csv(io.BytesIO(csv_bytes)), memoria)
+    df = leitura.pop('resultado')
+    etapas['read_csv'] = leitura
+
+    if comparar_modos:
+        apply = _medir(lambda: clean_and_standardize_data(df, modo='apply'), memoria)
+        apply.pop('resultado')
+        etapas['clean_and_standardize_data[apply]'] = apply
+
+    limpeza = _medir(lambda: clean_and_standardize_data(df), memoria)
+    df_clean, _ = limpeza.pop('resultado')
+    etapas['clean_and_standardize_data'] = limpeza
+
+    for nome, funcao in [
+        ('generate_basic_stats', lambda: generate_basic_stats(df_clean)),
+        ('generate_detailed_analysis', lambda: generate_detailed_analysis(df_clean)),
+        ('process_csv_stream', lambda: process_csv_stream(io.BytesIO(csv_bytes), incluir_analise=True,
+                                                          persistir=False))
+    ]:
+        medicao = _medir(funcao, memoria)
+        medicao.pop('resultado')
+        etapas[nome] = medicao
+
+    return etapas
+
+
+def executar(tamanhos: List[int], seed: int = 42, memoria: bool = True,
+             comparar_modos: bool = True) -> Dict[str, Any]:
+    """Executa o benchmark para cada tamanho e retorna o resultado completo."""
+    resultados = []
+    for linhas in tamanhos:
+        csv_bytes = gerar_csv(linhas, seed)
+        print(f"[{linhas} linhas] {len(csv_bytes) / 1e6:.1f} MB", file=sys.stderr)
+
+        etapas = _executar_etapas(csv_bytes, memoria=False, comparar_modos=comparar_modos)
+        if memoria:
+            picos = _executar_etapas(csv_bytes, memoria=True, comparar_modos=comparar_modos)
+            for nome, medicao in picos.items():
+                etapas[nome]['pico_bytes'] = medicao['pico_bytes']
+
+        for nome, medicao in etapas.items():
+            pico = f", pico {medicao['pico_bytes'] / 1e6:.1f} MB" if 'pico_bytes' in medicao else ''
+            print(f"  {nome}: {medicao['segundos']:.3f} s{pico}", file=sys.stderr)
+
+        resultado = {'linhas': linhas, 'bytes_csv': len(csv_bytes), 'etapas': etapas}
+        if comparar_modos and linhas <= 100_000:
+            df = pd.read_csv(io.BytesIO(csv_bytes))
+            resultado['equivalencia_modos'] = _comparar_modos(df)
+        resultados.append(resultado)
+
+    return {'metadata': _metadata(seed), 'resultados': resultados}
+
+
+def _comparar_modos(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compara o resultado dos modos 'apply' e 'vectorized' da padronização no
+    dataset gerado (os casos de borda ficam em tests/test_padronizacao.py).
+    """
+    df_apply, logs_apply = clean_and_standardize_data(df, modo='apply', compactar=False)
+    df_vet, logs_vet = clean_and_standardize_data(df, modo='vectorized', compactar=False)
+    divergentes = [col for col in df_apply.columns.union(df_vet.columns, sort=False)
+                   if col not in df_apply.columns or col not in df_vet.columns
+                   or not df_apply[col].equals(df_vet[col])]
+    return {'equivalente': not divergentes and logs_apply == logs_vet, 'colunas_divergentes': divergentes}
+
+
+def _metadata(seed: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'seed': seed,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform()
+    }
+
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any],
+             limite: float = LIMITE_REGRESSAO) -> List[Dict[str, Any]]:
+    """
+    Compara os tempos com os de um resultado anterior (mesmos tamanhos e etapas).
+    Retorna uma entrada por etapa com a razão atual/baseline e se é regressão.
+    """
+    anteriores = {r['linhas']: r['etapas'] for r in baseline['resultados']}
+    comparacao = []
+    for resultado in atual['resultados']:
+        etapas_baseline = anteriores.get(resultado['linhas'], {})
+        for nome, medicao in resultado['etapas'].items():
+            if nome not in etapas_baseline:
+                continue
+            razao = medicao['segundos'] / etapas_baseline[nome]['segundos']
+            comparacao.append({
+                'linhas': resultado['linhas'],
+                'etapa': nome,
+                'razao_tempo': round(razao, 3),
+                'regressao': razao > limite
+            })
+    return comparacao
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline de dados do Mulheres Mil')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000],
+                        help='Tamanhos (número de respostas) a medir')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador de dados')
+    parser.add_argument('--sem-memoria', action='store_true', help='Não mede o pico de memória (mais rápido)')
+    parser.add_argument('--sem-apply', action='store_true',
+                        help="Não mede nem compara o modo de padronização 'apply'")
+    parser.add_argument('--baseline', help='JSON de uma execução anterior, para comparação')
+    parser.add_argument('-o', '--output', help='Arquivo JSON de saída (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.rows, args.seed, memoria=not args.sem_memoria,
+                         comparar_modos=not args.sem_apply)
+
+    regressoes = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            resultado['comparacao'] = comparar(resultado, json.load(f))
+        regressoes = [c for c in resultado['comparacao'] if c['regressao']]
+        for c in regressoes:
+            print(f"REGRESSÃO: {c['etapa']} ({c['linhas']} linhas) {c['razao_tempo']}x", file=sys.stderr)
+
+    saida = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    else:
+        print(saida)
+
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Configuração do gunicorn para produção:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers, threads, endereço e timeout vêm de app/utils/config.py
+(WEB_WORKERS, WEB_THREADS, WEB_BIND, WEB_TIMEOUT), sobrescritos por
+variáveis de ambiente de mesmo nome.
+"""
+import multiprocessing
+
+from app.utils.config import Config
+
+wsgi_app = 'wsgi:app'
+bind = Config.WEB_BIND
+
+# Vários processos (o pandas segura o GIL em boa parte da limpeza), cada um
+# com algumas threads para as requisições rápidas (consultas por dataset_id).
+# O que precisa valer para todos os workers fica em disco, em UPLOAD_FOLDER:
+# os datasets armazenados (datasets/), o estado dos jobs de /detailed?async=1
+# (jobs/, consultados por qualquer worker), os contadores de /api/metrics
+# (metrics/) e, com DATASET_CACHE_SPILL=1, o cache em Parquet (cache/).
+# O cache LRU de DataFrames em memória é de cada worker: um dataset carregado
+# em um worker é lido do disco (não reprocessado) pelos outros.
+workers = Config.WEB_WORKERS or multiprocessing.cpu_count()
+threads = Config.WEB_THREADS
+worker_class = 'gthread'
+timeout = Config.WEB_TIMEOUT
+
+# Importa wsgi.py (e com ele pandas e os serviços, já aquecidos) antes do fork
+preload_app = True
+
+
+def post_fork(server, worker):
+    # O pool de threads do pyarrow (leitura de CSV/Parquet) usa todas as CPUs
+    # por padrão; com vários workers, divide as CPUs entre eles
+    try:
+        import pyarrow
+    except ImportError:
+        return
+    pyarrow.set_cpu_count(max(1, multiprocessing.cpu_count() // workers))
@@ -0,0 +1,22 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Permite importar o pacote `app` rodando o pytest a partir de backend/ ou da raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """Cliente de teste da API, com uploads e datasets em uma pasta temporária."""
+    from app import create_app
+    from app.services.cache_service import dataset_cache
+    from app.services.dataset_store import dataset_store
+
+    monkeypatch.setenv('UPLOAD_FOLDER', str(tmp_path))
+    app = create_app()
+    yield app.test_client()
+    dataset_cache.clear()
+    dataset_store.root = None
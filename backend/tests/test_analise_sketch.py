@@ -0,0 +1,61 @@
+# backend/tests/test_analise_sketch.py
+"""
+A análise detalhada calculada por partes (blocos combinados com merge, estado
+salvo e retomado, ingestão em blocos) deve ser idêntica à calculada sobre o
+DataFrame inteiro, no formato original do JSON.
+"""
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.services.analysis_service import DetailedAnalysisSketch, analisar_desafios, generate_detailed_analysis
+from app.services.data_service import clean_and_standardize_data
+from app.services.streaming_service import process_csv_stream
+from benchmarks.gerador import gerar_csv, gerar_respostas
+
+
+@pytest.fixture(scope='module')
+def df_clean():
+    df, _ = clean_and_standardize_data(gerar_respostas(1500, seed=5))
+    return df
+
+
+def _blocos(df, n: int):
+    return [df.iloc[indices] for indices in np.array_split(np.arange(len(df)), n)]
+
+
+@pytest.mark.parametrize('n_blocos', [2, 7])
+def test_merge_igual_ao_calculo_completo(df_clean, n_blocos):
+    sketches = [DetailedAnalysisSketch.from_frame(bloco) for bloco in _blocos(df_clean, n_blocos)]
+    combinada = sketches[0]
+    for sketch in sketches[1:]:
+        combinada.merge(sketch)
+    assert combinada.result() == generate_detailed_analysis(df_clean)
+
+
+def test_update_a_partir_do_estado_salvo(df_clean):
+    # Como no acréscimo de respostas: estado salvo em JSON e atualizado só com as linhas novas
+    inicio, resto = df_clean.iloc[:1000], df_clean.iloc[1000:]
+    estado = json.loads(json.dumps(DetailedAnalysisSketch.from_frame(inicio).to_state()))
+    retomada = DetailedAnalysisSketch.from_state(estado).update(resto)
+    assert retomada.result() == generate_detailed_analysis(df_clean)
+
+
+def test_formato_do_json(df_clean):
+    analise = generate_detailed_analysis(df_clean)
+    assert list(analise) == ['perfil_demografico', 'satisfacao', 'desafios', 'demanda_futura',
+                             'qualidade_dados', 'recomendacoes']
+    assert list(analise['desafios']) == ['principais_desafios', 'insights_acionaveis']
+    assert analise['desafios']['principais_desafios'] == analisar_desafios(df_clean['desafios'])
+    assert analise['perfil_demografico']['total_mulheres'] == len(df_clean)
+    media = round(float(df_clean['avaliacao_aulas_score'].mean()), 2)
+    assert analise['satisfacao']['medias_avaliacoes']['aulas'] == media
+
+
+def test_ingestao_em_blocos(df_clean):
+    csv = gerar_csv(1500, seed=5)
+    resultado = process_csv_stream(io.BytesIO(csv), chunksize=400, incluir_analise=True, persistir=False)
+    assert resultado['data']['streaming']['chunks'] == 4
+    assert resultado['analysis'] == generate_detailed_analysis(df_clean)
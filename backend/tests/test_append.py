@@ -0,0 +1,135 @@
+# backend/tests/test_append.py
+"""
+Acréscimo de respostas a um dataset armazenado (POST /api/data/datasets/<id>/append):
+o dataset, os metadados e os agregados salvos devem ficar iguais aos do
+export completo processado do zero.
+"""
+import glob
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.analysis_service import generate_detailed_analysis
+from app.services.cache_service import dataset_cache
+from app.services.cube_service import CuboAgregado
+from app.services.data_service import load_clean_dataset
+from app.services.dataset_store import dataset_store
+from benchmarks.gerador import gerar_respostas
+
+CARIMBO = 'Carimbo de data/hora'
+CURSO = 'Nome do Curso:'
+
+
+@pytest.fixture(autouse=True)
+def parquet():
+    if not dataset_store.use_parquet:
+        pytest.skip('o acréscimo exige o dataset em Parquet (pyarrow)')
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _enviar(cliente, df: pd.DataFrame) -> str:
+    resposta = cliente.post('/api/data/upload', data={'file': (io.BytesIO(_csv(df)), 'respostas.csv')})
+    assert resposta.status_code == 200
+    return resposta.get_json()['data']['dataset_id']
+
+
+def _acrescentar(cliente, dataset_id: str, df: pd.DataFrame) -> dict:
+    resposta = cliente.post(f'/api/data/datasets/{dataset_id}/append', data=_csv(df), content_type='text/csv')
+    assert resposta.status_code == 200
+    return resposta.get_json()['data']
+
+
+def _referencia(df: pd.DataFrame) -> pd.DataFrame:
+    """O export completo limpo do zero (sem passar pelo repositório)."""
+    dataset, _ = load_clean_dataset(_csv(df))
+    return dataset.df_clean
+
+
+def _comparavel(df: pd.DataFrame) -> pd.DataFrame:
+    # As categorias do dataset acrescentado incluem as novas no fim: compara os valores
+    categoricas = {c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.astype(categoricas).reset_index(drop=True)
+
+
+def _assert_dataset_igual(dataset_id: str, export: pd.DataFrame):
+    dataset_cache.clear()
+    pd.testing.assert_frame_equal(_comparavel(dataset_store.load(dataset_id).df_clean),
+                                  _comparavel(_referencia(export)))
+
+
+def test_respostas_ja_gravadas_sao_ignoradas(cliente):
+    export = gerar_respostas(300, seed=7)
+    # Uma resposta nova no mesmo segundo da última gravada deve entrar; a gravada, não
+    export.loc[200, CARIMBO] = export.loc[199, CARIMBO]
+    dataset_id = _enviar(cliente, export.iloc[:200])
+
+    resultado = _acrescentar(cliente, dataset_id, export)
+    assert (resultado['linhas_recebidas'], resultado['linhas_novas'], resultado['linhas_ignoradas']) == (300, 100, 200)
+    assert resultado['rows_clean'] == 300
+
+    # Reenviar o mesmo export não grava nada de novo
+    resultado = _acrescentar(cliente, dataset_id, export)
+    assert (resultado['linhas_novas'], resultado['rows_clean']) == (0, 300)
+    _assert_dataset_igual(dataset_id, export)
+
+
+def test_acrescimo_com_novas_particoes(cliente):
+    export = gerar_respostas(240, seed=11)
+    export.loc[:119, CURSO] = 'Informática'
+    export.loc[120:, CURSO] = [f'Curso novo {i % 5}' for i in range(120)]
+    dataset_id = _enviar(cliente, export.iloc[:120])
+    # Pastas hive com os valores codificados como em URLs
+    dados = os.path.join(dataset_store.root, dataset_id, 'data')
+    assert not glob.glob(os.path.join(dados, '*', 'curso=Curso%20novo*'))
+
+    _acrescentar(cliente, dataset_id, export)
+
+    assert len({os.path.basename(p) for p in glob.glob(os.path.join(dados, '*', 'curso=Curso%20novo*'))}) == 5
+
+    layout = dataset_store.get_meta(dataset_id)['layout']
+    assert layout['particoes'] == ['instituicao', 'curso']
+    assert {f'Curso novo {i}' for i in range(5)} <= set(layout['categorias']['curso'])
+    _assert_dataset_igual(dataset_id, export)
+    # As partições novas respondem aos filtros como as gravadas no upload
+    filtrado = cliente.get(f'/api/analysis/crosstab?dataset_id={dataset_id}&agrupar=curso'
+                           f'&curso=Curso novo 3&curso=Informática').get_json()
+    esperado = _referencia(export)['curso'].isin(['Curso novo 3', 'Informática']).sum()
+    assert filtrado['total'] == esperado
+
+
+def test_meta_e_agregados_apos_acrescimo(cliente):
+    export = gerar_respostas(400, seed=3)
+    dataset_id = _enviar(cliente, export.iloc[:250])
+    meta_antes = dataset_store.get_meta(dataset_id)
+    # Agregados salvos antes do acréscimo: atualizados com as linhas novas, sem recálculo
+    etag = cliente.get(f'/api/analysis/detailed/{dataset_id}').headers['ETag']
+    cliente.get(f'/api/analysis/crosstab?dataset_id={dataset_id}&agrupar=renda_categoria')
+
+    resultado = _acrescentar(cliente, dataset_id, export)
+
+    meta = dataset_store.get_meta(dataset_id)
+    assert meta['rows_clean'] == resultado['rows_clean'] == 400
+    assert meta['shape'][0] == 250 + resultado['linhas_novas']
+    assert meta['created_at'] == meta_antes['created_at']
+    assert meta['updated_at'] == resultado['updated_at'] > meta_antes['created_at']
+    assert resultado['ultimo_timestamp'] == meta['layout']['ultimo_timestamp']
+    assert dataset_store.load_analysis_state(dataset_id) is not None
+    assert dataset_store.load_cube_state(dataset_id) is not None
+
+    referencia = _referencia(export)
+    resposta = cliente.get(f'/api/analysis/detailed/{dataset_id}', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['analysis'] == generate_detailed_analysis(referencia)
+
+    agrupar = ['renda_categoria', 'curso']
+    cruzada = cliente.get(f'/api/analysis/crosstab?dataset_id={dataset_id}'
+                          f'&agrupar={agrupar[0]}&agrupar={agrupar[1]}').get_json()
+    assert cruzada['grupos'] == CuboAgregado.from_frame(referencia).consultar(agrupar)['grupos']
+    assert cruzada['total'] == 400
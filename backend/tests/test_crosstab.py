@@ -0,0 +1,88 @@
+# backend/tests/test_crosstab.py
+"""
+Tabelas cruzadas (GET /api/analysis/crosstab), respondidas pelo cubo
+pré-calculado: os grupos devem ser os de um groupby sobre o dataset limpo, e
+dimensões desconhecidas ou sem coluna no dataset devem ser recusadas.
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.analysis_service import COLUNAS_DESAFIOS, PREFIXO_DESAFIO
+from app.services.data_service import clean_and_standardize_data
+from benchmarks.gerador import gerar_respostas
+
+CURSO = 'Nome do Curso:'
+
+
+def _enviar(cliente, df: pd.DataFrame) -> str:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    resposta = cliente.post('/api/data/upload', data={'file': (io.BytesIO(buffer.getvalue().encode('utf-8')),
+                                                                'respostas.csv')})
+    assert resposta.status_code == 200
+    return resposta.get_json()['data']['dataset_id']
+
+
+def _crosstab(cliente, dataset_id: str, agrupar: list, **filtros):
+    params = [('dataset_id', dataset_id)] + [('agrupar', d) for d in agrupar]
+    params += [(dimensao, valor) for dimensao, valores in filtros.items() for valor in valores]
+    return cliente.get('/api/analysis/crosstab', query_string=params)
+
+
+@pytest.fixture
+def respostas():
+    return gerar_respostas(600, seed=13)
+
+
+def test_grupos_iguais_ao_groupby(cliente, respostas):
+    dataset_id = _enviar(cliente, respostas)
+    df, _ = clean_and_standardize_data(respostas)
+    agrupar = ['faixa_etaria', 'renda_categoria']
+
+    resposta = _crosstab(cliente, dataset_id, agrupar)
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['total'] == len(df)
+
+    grupos = df.groupby(agrupar, observed=True)
+    obtidos = {tuple(g[d] for d in agrupar): g for g in dados['grupos']}
+    assert len(obtidos) == grupos.ngroups
+    for chave, linhas in grupos:
+        grupo = obtidos[tuple(str(v) for v in chave)]
+        assert grupo['total'] == len(linhas)
+        assert grupo['medias_avaliacoes']['aulas'] == round(float(linhas['avaliacao_aulas_score'].mean()), 2)
+        assert grupo['desafios'] == {c[len(PREFIXO_DESAFIO):]: int(linhas[c].sum()) for c in COLUNAS_DESAFIOS}
+    totais = [g['total'] for g in dados['grupos']]
+    assert totais == sorted(totais, reverse=True)
+
+
+def test_filtros(cliente, respostas):
+    dataset_id = _enviar(cliente, respostas)
+    df, _ = clean_and_standardize_data(respostas)
+    faixas = ['16 a 26 anos', '27 a 36 anos']
+
+    dados = _crosstab(cliente, dataset_id, ['curso'], faixa_etaria=faixas).get_json()
+
+    filtrado = df[df['faixa_etaria'].isin(faixas)]
+    assert dados['total'] == len(filtrado)
+    assert {g['curso']: g['total'] for g in dados['grupos']} == \
+        {str(curso): n for curso, n in filtrado['curso'].value_counts().items() if n}
+
+
+def test_dimensao_desconhecida(cliente, respostas):
+    dataset_id = _enviar(cliente, respostas)
+    assert _crosstab(cliente, dataset_id, ['profissao']).status_code == 400
+    assert _crosstab(cliente, '0' * 64, ['curso']).status_code == 404
+
+
+def test_dimensao_sem_coluna_no_dataset(cliente, respostas):
+    dataset_id = _enviar(cliente, respostas.drop(columns=[CURSO]))
+
+    assert _crosstab(cliente, dataset_id, ['curso']).status_code == 422
+    assert _crosstab(cliente, dataset_id, ['faixa_etaria'], curso=['Informática']).status_code == 422
+    # As demais dimensões continuam disponíveis
+    resposta = _crosstab(cliente, dataset_id, ['faixa_etaria'])
+    assert resposta.status_code == 200
+    assert resposta.get_json()['total'] == len(respostas)
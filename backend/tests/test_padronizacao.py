@@ -0,0 +1,143 @@
+# backend/tests/test_padronizacao.py
+"""
+Os modos 'apply' (linha a linha) e 'vectorized' de clean_and_standardize_data
+devem gerar exatamente o mesmo resultado.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.data_service import STANDARDIZATION_MODES, clean_and_standardize_data
+
+FAIXA = 'Faixa etária predominante'
+RENDA = 'Situação Socioeconômica: Renda per capta:'
+ESCOLARIDADE = 'Escolaridade:'
+CURSO = 'Nome do Curso:'
+DESAFIOS = 'Desafios enfrentados:'
+AVALIACAO = 'Avaliação das aulas do programa em Jardim:'
+
+
+def _padronizar(dados: dict, modo: str) -> pd.DataFrame:
+    # Sem compactação: o log de bytes em memória pode variar entre os modos
+    # (mesmos valores, objetos Python diferentes) sem que o resultado mude
+    df, _ = clean_and_standardize_data(pd.DataFrame(dados), modo=modo, compactar=False)
+    return df
+
+
+def _assert_modos_equivalentes(dados: dict) -> pd.DataFrame:
+    """Compara os dois modos (colunas, valores e logs) e retorna o resultado vetorizado."""
+    df_apply, logs_apply = clean_and_standardize_data(pd.DataFrame(dados), modo='apply', compactar=False)
+    df_vet, logs_vet = clean_and_standardize_data(pd.DataFrame(dados), modo='vectorized', compactar=False)
+    pd.testing.assert_frame_equal(df_apply, df_vet)
+    assert logs_apply == logs_vet
+    return df_vet
+
+
+def test_modos_disponiveis():
+    assert set(STANDARDIZATION_MODES) == {'apply', 'vectorized'}
+
+
+def test_acentos():
+    df = _assert_modos_equivalentes({
+        ESCOLARIDADE: ['Ensino Médio Completo', 'Ensino Medio Completo', 'Ensino Superior Incompleto'],
+        DESAFIOS: ['Falta de ônibus', 'falta de onibus', 'saúde da família'],
+        CURSO: ['💻 Assistente Administrativo', 'Assistente Administrativo 💻', 'Informática'],
+    })
+    # O mapa de escolaridade é exato: sem o acento o valor não é reconhecido
+    assert df['escolaridade_simplificada'].tolist() == ['Ensino Medio', 'Outra', 'Ensino Superior']
+    assert df['desafio_transporte'].tolist() == [1, 1, 0]
+    assert df['desafio_saude'].tolist() == [0, 0, 1]
+    assert df['desafio_familia'].tolist() == [0, 0, 1]
+    assert df['curso'].tolist() == ['Assistente Administrativo', 'Assistente Administrativo', 'Informática']
+
+
+def test_maiusculas_e_minusculas():
+    df = _assert_modos_equivalentes({
+        FAIXA: ['16 a 26 anos', '16 A 26 ANOS', '  27 a 36 anos  '],
+        RENDA: ['MAIS DE 3 salários mínimos', 'Mais De 3', 'UM salário'],
+    })
+    # A faixa etária diferencia maiúsculas (só os espaços são removidos); a renda não
+    assert df['faixa_etaria'].tolist() == ['16 a 26 anos', 'Outra', '27 a 36 anos']
+    assert df['renda_categoria'].tolist() == ['Mais de 3 SM', 'Mais de 3 SM', 'Ate 1 SM']
+
+
+@pytest.mark.parametrize('vazio', [np.nan, None, ''])
+def test_valores_vazios(vazio):
+    df = _assert_modos_equivalentes({
+        FAIXA: [vazio, '37 a 46 anos'],
+        RENDA: [vazio, 'Mais de 3'],
+        ESCOLARIDADE: [vazio, 'Ensino Superior Completo'],
+        AVALIACAO: [vazio, 'Excelente'],
+        CURSO: ['A', 'B'],  # linhas completamente vazias são removidas antes da padronização
+    })
+    assert df['faixa_etaria'].tolist() == ['Nao informado', '37 a 46 anos']
+    assert df['renda_categoria'].tolist() == ['Nao informado', 'Mais de 3 SM']
+    assert df['escolaridade_simplificada'].tolist() == ['Outra', 'Ensino Superior']
+    assert df['avaliacao_aulas_score'].tolist() == [0, 5]
+
+
+def test_colunas_inteiramente_vazias():
+    _assert_modos_equivalentes({
+        FAIXA: [np.nan, np.nan],
+        RENDA: [np.nan, np.nan],
+        ESCOLARIDADE: [np.nan, np.nan],
+        CURSO: ['A', 'B'],
+    })
+
+
+def test_categorias_desconhecidas():
+    df = _assert_modos_equivalentes({
+        FAIXA: ['99 anos', 'Mais de 56 anos'],
+        RENDA: ['Sem renda', 'não sei'],
+        ESCOLARIDADE: ['Doutorado', 'Ensino Médio Incompleto'],
+        AVALIACAO: ['Ótimo', 'Péssimo'],
+        DESAFIOS: ['Nenhum', 'Tempo corrido'],
+    })
+    assert df['faixa_etaria'].tolist() == ['Outra', 'Mais de 56 anos']
+    assert df['renda_categoria'].tolist() == ['Nao informado', 'Nao informado']
+    assert df['escolaridade_simplificada'].tolist() == ['Outra', 'Ensino Medio']
+    assert df['avaliacao_aulas_score'].tolist() == [0, 1]
+    assert df['desafio_tempo'].tolist() == [0, 1]
+
+
+def test_faixa_etaria_com_escolaridade():
+    # Erro conhecido do formulário: escolaridade respondida no campo da faixa etária
+    df = _assert_modos_equivalentes({
+        FAIXA: ['Ensino fundamental completo', 'Ensino fundamental completo, 30 anos', '47 a 56 anos'],
+    })
+    assert df['faixa_etaria'].tolist() == ['Nao informado', 'Nao informado', '47 a 56 anos']
+
+
+@pytest.mark.parametrize('texto, categoria', [
+    ('Mais de 3 salários mínimos', 'Mais de 3 SM'),
+    ('De 1 a 2 salários', '1-2 SM'),
+    ('2 salários', '1-2 SM'),
+    ('Até 1 salário mínimo', 'Ate 1 SM'),
+    ('um salário', 'Ate 1 SM'),
+    ('Menos de meio salário', 'Menos de 1 SM'),
+    ('Sem renda', 'Nao informado'),
+    ('   ', 'Nao informado'),
+])
+def test_renda_bordas(texto, categoria):
+    # A primeira regra com algum trecho presente define a categoria
+    df = _assert_modos_equivalentes({RENDA: [texto]})
+    assert df['renda_categoria'].tolist() == [categoria]
+
+
+def test_renda_valores_numericos():
+    # Valores como '200,00' ou lidos como número pelo pandas: os dois modos seguem a mesma ordem de regras
+    _assert_modos_equivalentes({RENDA: ['R$ 200,00', '200', '1.500', '3']})
+    _assert_modos_equivalentes({RENDA: [200.0, np.nan, 1500.0]})
+
+
+@pytest.mark.parametrize('modo', ['apply', 'vectorized'])
+def test_valores_repetidos(modo):
+    # O modo vetorizado padroniza só os valores distintos: o resultado é expandido para todas as linhas
+    faixas = ['16 a 26 anos', np.nan, 'Ensino fundamental completo', '16 a 26 anos'] * 50
+    df = _padronizar({FAIXA: faixas, CURSO: ['A'] * len(faixas)}, modo)
+    assert df['faixa_etaria'].value_counts().to_dict() == {'16 a 26 anos': 100, 'Nao informado': 100}
+
+
+def test_modo_invalido():
+    with pytest.raises(ValueError):
+        _padronizar({FAIXA: ['16 a 26 anos']}, 'outro')
@@ -0,0 +1,84 @@
+# backend/tests/test_regras_recarga.py
+"""
+Depois de uma recarga das regras de padronização, reenviar um CSV já
+processado deve limpá-lo de novo com as regras novas (outro dataset_id),
+sem reaproveitar o cache nem o dataset armazenado com as regras antigas.
+"""
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+from app.services.cache_service import dataset_cache
+from app.services.data_service import process_csv_data
+from app.services.dataset_store import dataset_store
+from app.services.streaming_service import process_csv_stream
+from app.utils.standardization_rules import regras_padronizacao
+
+CSV = ('Nome do Curso:,Situação Socioeconômica: Renda per capta:\n'
+       'Informática,Menos de meio salário\n'
+       'Costura,Mais de 3 salários mínimos\n').encode('utf-8')
+
+
+@pytest.fixture
+def regras_temporarias(tmp_path):
+    """Cópia editável do arquivo de regras e um DatasetStore vazio, restaurados no fim."""
+    original, intervalo, raiz = regras_padronizacao.caminho, regras_padronizacao.intervalo, dataset_store.root
+    caminho = str(tmp_path / 'regras.json')
+    shutil.copyfile(original, caminho)
+    regras_padronizacao.configure(caminho, intervalo=0)
+    dataset_store.configure(str(tmp_path / 'datasets'))
+    yield caminho
+    regras_padronizacao.configure(original, intervalo)
+    dataset_store.root = raiz
+    dataset_cache.clear()
+
+
+def _alterar_renda(caminho: str):
+    """'menos' passa a valer 'Ate 1 SM' (antes: 'Menos de 1 SM')."""
+    with open(caminho, encoding='utf-8') as f:
+        dados = json.load(f)
+    for regra in dados['renda']['regras']:
+        if regra['contem'] == ['menos']:
+            regra['categoria'] = 'Ate 1 SM'
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    # Garante uma assinatura (mtime, tamanho) diferente mesmo em sistemas de arquivos com mtime grosseiro
+    info = os.stat(caminho)
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+    assert regras_padronizacao.recarregar_se_mudou()
+
+
+def _renda(dataset_id: str) -> list:
+    return dataset_store.load(dataset_id).df_clean['renda_categoria'].astype(str).tolist()
+
+
+def test_reenvio_apos_recarga_usa_regras_novas(regras_temporarias):
+    antes = process_csv_data(CSV, 'respostas.csv')
+    assert _renda(antes['dataset_id']) == ['Menos de 1 SM', 'Mais de 3 SM']
+    # Sem recarga, o mesmo arquivo é o mesmo dataset
+    assert process_csv_data(CSV, 'respostas.csv')['cache']['hit']
+
+    _alterar_renda(regras_temporarias)
+    depois = process_csv_data(CSV, 'respostas.csv')
+
+    assert not depois['cache']['hit']
+    assert depois['dataset_id'] != antes['dataset_id']
+    assert _renda(depois['dataset_id']) == ['Ate 1 SM', 'Mais de 3 SM']
+    assert f"Regras de padronização: versão {regras_padronizacao.atuais().versao}" in depois['cleaning_logs']
+    # O dataset limpo com as regras antigas continua disponível pelo id antigo
+    assert _renda(antes['dataset_id']) == ['Menos de 1 SM', 'Mais de 3 SM']
+
+
+def test_streaming_usa_o_mesmo_dataset_id(regras_temporarias):
+    if not dataset_store.use_parquet:
+        pytest.skip('a ingestão em blocos só persiste com pyarrow')
+    assert process_csv_stream(io.BytesIO(CSV))['data']['dataset_id'] == process_csv_data(CSV)['dataset_id']
+
+    _alterar_renda(regras_temporarias)
+    dataset_id = process_csv_stream(io.BytesIO(CSV))['data']['dataset_id']
+
+    assert dataset_id == process_csv_data(CSV)['dataset_id']
+    assert _renda(dataset_id) == ['Ate 1 SM', 'Mais de 3 SM']
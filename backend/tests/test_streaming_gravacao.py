@@ -0,0 +1,50 @@
+# backend/tests/test_streaming_gravacao.py
+"""
+Na ingestão em blocos, um bloco com tipos diferentes dos anteriores (ex.:
+decimais ou texto em uma coluna até então inteira) não pode impedir a
+gravação do dataset: o schema do Parquet é promovido.
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.cache_service import dataset_cache
+from app.services.dataset_store import dataset_store
+from app.services.streaming_service import process_csv_stream
+
+
+@pytest.fixture
+def repositorio(tmp_path):
+    raiz = dataset_store.root
+    dataset_store.configure(str(tmp_path / 'datasets'))
+    if not dataset_store.use_parquet:
+        pytest.skip('a ingestão em blocos só persiste com pyarrow')
+    yield
+    dataset_store.root = raiz
+    dataset_cache.clear()
+
+
+def _csv(notas: list) -> bytes:
+    linhas = ['Nome do Curso:,nota'] + [f'Curso {i % 3},{nota}' for i, nota in enumerate(notas)]
+    return ('\n'.join(linhas) + '\n').encode('utf-8')
+
+
+def _gravar(csv: bytes) -> pd.DataFrame:
+    resultado = process_csv_stream(io.BytesIO(csv), chunksize=10)
+    assert resultado['data']['dataset_id'] is not None
+    return dataset_store.load(resultado['data']['dataset_id']).df_clean
+
+
+def test_inteiros_seguidos_de_decimais(repositorio):
+    notas = [str(i) for i in range(10)] + [f'{i}.5' for i in range(10, 25)]
+    df = _gravar(_csv(notas))
+    assert df['nota'].dtype == 'float64'
+    assert df['nota'].tolist() == pd.read_csv(io.BytesIO(_csv(notas)))['nota'].tolist()
+
+
+def test_numeros_seguidos_de_texto(repositorio):
+    notas = [str(i) for i in range(10)] + [f'{i}.5' for i in range(10, 20)] + ['n/d'] * 5
+    df = _gravar(_csv(notas))
+    assert df['nota'].tolist() == pd.read_csv(io.BytesIO(_csv(notas)))['nota'].tolist()
+    assert df['curso'].astype(str).tolist() == [f'Curso {i % 3}' for i in range(len(notas))]
@@ -0,0 +1,31 @@
+"""
+Ponto de entrada de produção (WSGI), para um servidor com vários processos:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Com preload_app (ver gunicorn.conf.py) este módulo é importado uma única vez,
+no processo principal, antes do fork dos workers: pandas, pyarrow, os serviços
+e as blueprints já estão carregados e o pipeline já foi executado uma vez
+(aquecimento), então os workers começam prontos e compartilham essas páginas
+de memória com o processo principal (copy-on-write).
+
+Para desenvolvimento continue usando run.py (servidor do Flask com reload).
+"""
+import gc
+import logging
+
+from app import create_app
+from app.services.warmup_service import aquecer
+
+logging.basicConfig(level=logging.INFO)
+
+app = create_app()
+
+if app.config['WEB_WARMUP']:
+    aquecer(app)
+
+# Tudo o que foi criado até aqui (módulos, taxonomias compiladas, tabelas do
+# aquecimento) sai do alcance do coletor de lixo: nos workers ele não percorre
+# esses objetos e não provoca a cópia das páginas compartilhadas
+gc.collect()
+gc.freeze()